@@ -128,3 +128,56 @@ STATIC_URL = '/static/'
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Clustering
+# Jumlah worker proses untuk sweep bandwidth MeanShift (1 = serial, -1 = semua core);
+# satu pool dipakai bersama oleh semua kategori posisi
+
+CLUSTERING_N_JOBS = 1
+
+# Pencarian bandwidth: "grid" (0.5–5.0, semua di-fit) atau "adaptive"
+
+CLUSTERING_BANDWIDTH_SEARCH = "grid"
+
+# Engine MeanShift: "sklearn" atau "native" (players.meanshift, hasil label sama)
+
+CLUSTERING_MEANSHIFT_ENGINE = "sklearn"
+
+# Silhouette dihitung dari satu matriks jarak per grup; jika matriks n x n
+# lebih besar dari batas ini, silhouette diestimasi dari sampel acak
+
+CLUSTERING_SILHOUETTE_MAX_MATRIX_MB = 256
+
+CLUSTERING_SILHOUETTE_SAMPLE_SIZE = 2000
+
+CLUSTERING_SILHOUETTE_SEED = 0
+
+# Mode append: pemain baru di-assign ke cluster tersimpan; jika porsi pemain
+# hasil assign melewati batas ini, clustering di-fit ulang penuh
+
+CLUSTERING_DRIFT_THRESHOLD = 0.1
+
+# Cache kolom fitur per musim (players.feature_cache); None = nonaktif
+
+FEATURE_CACHE_DIR = BASE_DIR / "feature_cache"
+
+# Job clustering asinkron (players.jobs): jumlah worker proses lokal dan
+# batas detik tanpa kabar sebelum job aktif dianggap gagal
+
+CLUSTERING_JOB_WORKERS = 2
+
+CLUSTERING_JOB_TIMEOUT = 3600
+
+# Metrik durasi per tahap (players.metrics), dibaca di /metrics (format teks
+# Prometheus). Nonaktif: timer tidak mengukur apa pun. METRICS_DIR: folder
+# bersama supaya proses Streamlit, server dan worker job terbaca di satu endpoint
+
+METRICS_ENABLED = False
+
+METRICS_DIR = None
+
+# Profil query SQL per panggilan fungsi services (players.profiling); dilihat
+# lewat "manage.py profile_queries" atau panel debug di sidebar Streamlit
+
+QUERY_PROFILE_ENABLED = False
@@ -14,8 +14,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+from players.views import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/', include('players.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
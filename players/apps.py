@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class PlayersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'players'
+
+    def ready(self):
+        from django.conf import settings
+        from . import metrics, profiling
+        metrics.configure(getattr(settings, "METRICS_ENABLED", False), getattr(settings, "METRICS_DIR", None))
+        profiling.configure(getattr(settings, "QUERY_PROFILE_ENABLED", False))
@@ -1,5 +1,7 @@
+import altair as alt
 import pandas as pd
 from typing import Dict, List, Any
+from .metrics import timed
 
 
 class BarDataMissing(Exception):
@@ -13,6 +15,7 @@ def get_features_for_group(group_name: str, features_by_pos: Dict[str, List[str]
     return feats
 
 # BAR CHART UNTUK HASIL CLUSTERING
+@timed("chart_data", chart="cluster")
 def build_cluster_feature_bar_df(res: Dict[str, Any], feature_cols: List[str]) -> pd.DataFrame:
     """
     Menghasilkan dataframe berisi rata-rata fitur per cluster.
@@ -38,3 +41,47 @@ def build_cluster_feature_bar_df(res: Dict[str, Any], feature_cols: List[str]) -
     long_df["Cluster"] = long_df["cluster"].apply(lambda c: f"C{int(c)}")
     long_df.drop(columns=["cluster"], inplace=True)
     return long_df
+
+# SATU CHART FACET PER KATEGORI POSISI / PERBANDINGAN
+# Satu spec Vega-Lite (data dikirim sekali) menggantikan satu chart per fitur.
+@timed("chart_build")
+def _faceted_bar_chart(long_df: pd.DataFrame, x: str, y: str, tooltip: list, labels: Dict[str, str],
+                       features: List[str], columns: int, width: int, height: int, x_sort=None) -> alt.FacetChart:
+    data = long_df.assign(
+        Fitur=long_df["Fitur"].astype(str).map(lambda f: labels.get(f, f)),
+        **{x: long_df[x].astype(str)},
+    )
+    return (
+        alt.Chart(data)
+        .mark_bar()
+        .encode(
+            x=alt.X(f"{x}:N", sort=x_sort, axis=alt.Axis(title=None, labelAngle=0)),
+            y=alt.Y(f"{y}:Q", axis=alt.Axis(title=None)),
+            color=alt.Color(f"{x}:N", sort=x_sort, title=None, scale=alt.Scale(scheme="tableau10")),
+            tooltip=tooltip,
+        )
+        .properties(width=width, height=height)
+        .facet(
+            facet=alt.Facet("Fitur:N", sort=[labels.get(f, f) for f in features], title=None,
+                            header=alt.Header(labelFontWeight="bold")),
+            columns=columns,
+        )
+        .resolve_scale(y="independent")
+    )
+
+def build_cluster_feature_chart(bar_long: pd.DataFrame, feature_cols: List[str], labels: Dict[str, str],
+                                columns: int = 1, width: int = 260, height: int = 180) -> alt.FacetChart:
+    """Rata-rata fitur per cluster (hasil build_cluster_feature_bar_df), satu panel per fitur."""
+    clusters = sorted(bar_long["Cluster"].astype(str).unique(), key=lambda c: int(c[1:]))  # "C0","C1",...
+    return _faceted_bar_chart(
+        bar_long, "Cluster", "Mean",
+        ["Cluster:N", alt.Tooltip("Mean:Q", title="Rata-rata", format=".3f")],
+        labels, feature_cols, columns, width, height, x_sort=clusters,
+    )
+
+def build_comparison_chart(long_df: pd.DataFrame, features: List[str], labels: Dict[str, str],
+                           columns: int = 2, width: int = 300, height: int = 180) -> alt.FacetChart:
+    """Anchor vs target (hasil prepare_comparison_long_df), satu panel per fitur."""
+    pemain = list(dict.fromkeys(long_df["Pemain"].astype(str)))  # anchor dulu, lalu target
+    return _faceted_bar_chart(long_df, "Pemain", "Nilai", ["Pemain:N", "Nilai:Q"],
+                              labels, features, columns, width, height, x_sort=pemain)
@@ -0,0 +1,204 @@
+# players/benchmarks.py
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+import sklearn
+from django.db import connection, transaction
+from .bar_chart import build_cluster_feature_bar_df
+from .clustering import (
+    FEATURES_BY_POS, POS_GROUPS, _select_group, get_cluster_results, get_player_features_df, run_meanshift,
+    run_meanshift_by_position,
+)
+from .cross_season import get_cross_season_matrix, get_cross_season_similar_players
+from .feature_cache import invalidate_feature_cache, write_feature_cache
+from .recommend import get_recommend_similar_players
+from .services import get_dataset_version, insert_dataset_and_players
+from .synthetic import make_league
+
+# =============================
+# BENCHMARK END-TO-END DENGAN LIGA SINTETIS
+# =============================
+# Semua data benchmark ditulis di dalam satu transaksi yang di-rollback.
+# Hasil: dict siap JSON {"meta": ..., "results": [{"name", "rows", "seconds", ...}]};
+# "seconds" = waktu terbaik dari beberapa run, dipakai untuk membandingkan dengan baseline.
+BENCHMARKS = [
+    "insert_dataset_and_players",
+    "get_player_features_df",
+    "get_player_features_df[cache]",
+    "run_meanshift",
+    "run_meanshift_by_position",
+    "build_cluster_feature_bar_df",
+    "get_cluster_results",
+    "get_recommend_similar_players",
+    "get_cross_season_similar_players",
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _record(name: str, rows: int, runs, **extra) -> dict:
+    return {
+        "name": name,
+        "rows": rows,
+        "seconds": min(runs),
+        "median": statistics.median(runs),
+        "runs": [round(r, 6) for r in runs],
+        **extra,
+    }
+
+def _timed(func, repeat: int):
+    """Jalankan func repeat kali; return (list durasi detik, hasil run terakhir)."""
+    runs, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - started)
+    return runs, result
+
+def environment() -> dict:
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "machine": platform.machine(),
+        "database": connection.vendor,
+    }
+
+# SATU UKURAN LIGA
+def _bench_size(n_rows: int, n_seasons: int, seed: int, repeat: int, cluster_max_rows: int,
+                recommend_calls: int, selected, log) -> list[dict]:
+    league = make_league(n_rows, n_seasons, seed=seed)
+    season, season_df = league[0]
+    season_rows = len(season_df)
+    want = lambda name: name in selected
+    results = []
+
+    runs = []
+    for name, df in league:
+        started = time.perf_counter()
+        insert_dataset_and_players("Liga Sintetis", name, df)
+        runs.append(time.perf_counter() - started)
+    if want("insert_dataset_and_players"):
+        results.append(_record("insert_dataset_and_players", n_rows, [sum(runs)],
+                               seasons=n_seasons, rows_per_second=n_rows / sum(runs)))
+    log(f"{n_rows} baris: {n_seasons} musim tersimpan")
+
+    if want("get_player_features_df"):
+        runs, _ = _timed(lambda: get_player_features_df(season), repeat)
+        results.append(_record("get_player_features_df", season_rows, runs))
+    if want("get_player_features_df[cache]"):
+        write_feature_cache(season, get_player_features_df(season), get_dataset_version(season))
+        try:
+            runs, _ = _timed(lambda: get_player_features_df(season), repeat)
+        finally:
+            invalidate_feature_cache(season)
+        results.append(_record("get_player_features_df[cache]", season_rows, runs))
+
+    if want("get_cross_season_similar_players"):
+        group = "Pemain Gelandang"
+        started = time.perf_counter()
+        matrix = get_cross_season_matrix(group)
+        build = time.perf_counter() - started
+        candidates = matrix["meta"].loc[matrix["season"] == season, "player"].to_numpy()
+        runs = []
+        for anchor in np.random.default_rng(seed).choice(candidates, recommend_calls):
+            started = time.perf_counter()
+            get_cross_season_similar_players(season, POS_GROUPS[group][0], anchor, top_n=10)
+            runs.append(time.perf_counter() - started)
+        results.append(_record("get_cross_season_similar_players", n_rows, runs, group=group,
+                               stacked_rows=len(matrix["meta"]), matrix_seconds=build, calls=len(runs)))
+
+    if season_rows > cluster_max_rows:
+        log(f"{n_rows} baris: clustering & rekomendasi dilewati ({season_rows} > {cluster_max_rows} baris/musim)")
+        return results
+
+    df_all = get_player_features_df(season)
+    group = max(POS_GROUPS, key=lambda g: len(_select_group(df_all, g)))
+    df_group = _select_group(df_all, group)
+    if want("run_meanshift"):
+        runs, res = _timed(lambda: run_meanshift(df_group, FEATURES_BY_POS[group]), 1)
+        results.append(_record("run_meanshift", len(df_group), runs, group=group))
+    else:
+        res = None
+    if want("run_meanshift_by_position"):
+        runs, _ = _timed(lambda: run_meanshift_by_position(season), 1)
+        results.append(_record("run_meanshift_by_position", season_rows, runs))
+    if want("build_cluster_feature_bar_df"):
+        res = res or run_meanshift(df_group, FEATURES_BY_POS[group])
+        runs, _ = _timed(lambda: build_cluster_feature_bar_df(res, FEATURES_BY_POS[group]), repeat)
+        results.append(_record("build_cluster_feature_bar_df", len(df_group), runs, group=group))
+
+    if want("get_cluster_results") or want("get_recommend_similar_players"):
+        runs, _ = _timed(lambda: get_cluster_results(season), 1)
+        if want("get_cluster_results"):
+            results.append(_record("get_cluster_results", season_rows, runs))
+    if want("get_recommend_similar_players"):
+        anchors = np.random.default_rng(seed).choice(df_group["player"].to_numpy(), recommend_calls)
+        position = POS_GROUPS[group][0]
+        runs = []
+        for anchor in anchors:
+            started = time.perf_counter()
+            get_recommend_similar_players(season, position, anchor, top_n=5)
+            runs.append(time.perf_counter() - started)
+        results.append(_record("get_recommend_similar_players", season_rows, runs, group=group, calls=len(runs)))
+    log(f"{n_rows} baris: selesai")
+    return results
+
+def run_suite(sizes, n_seasons: int = 5, seed: int = 0, repeat: int = 3, cluster_max_rows: int = 2_000,
+              recommend_calls: int = 20, only=None, log=lambda msg: None) -> dict:
+    """
+    Jalankan semua benchmark untuk tiap ukuran liga (total baris, dibagi ke
+    n_seasons musim). Fungsi per musim diukur di musim pertama; clustering &
+    rekomendasi hanya jika baris per musim <= cluster_max_rows.
+    """
+    selected = set(only or BENCHMARKS)
+    results = []
+    for n_rows in sizes:
+        try:
+            with transaction.atomic():
+                results += _bench_size(n_rows, n_seasons, seed, repeat, cluster_max_rows,
+                                       recommend_calls, selected, log)
+                raise _Rollback
+        except _Rollback:
+            pass
+    meta = {**environment(), "seed": seed, "seasons": n_seasons, "repeat": repeat,
+            "sizes": list(sizes), "cluster_max_rows": cluster_max_rows}
+    return {"meta": meta, "results": results}
+
+# BANDINGKAN DENGAN BASELINE
+def compare(current: dict, baseline: dict, tolerance: float = 0.2, min_delta: float = 0.005) -> list[dict]:
+    """
+    Cocokkan hasil per (name, rows). status "regression" jika lebih lambat dari
+    baseline lebih dari tolerance (relatif) DAN min_delta detik (absolut),
+    "improvement" untuk kebalikannya, "new"/"missing" jika tidak ada pasangannya.
+    """
+    base = {(r["name"], r["rows"]): r["seconds"] for r in baseline.get("results", [])}
+    rows = []
+    for r in current.get("results", []):
+        key = (r["name"], r["rows"])
+        before = base.pop(key, None)
+        if before is None:
+            rows.append({"name": key[0], "rows": key[1], "baseline": None, "current": r["seconds"],
+                         "ratio": None, "status": "new"})
+            continue
+        ratio = r["seconds"] / before if before > 0 else float("inf")
+        delta = r["seconds"] - before
+        if ratio > 1 + tolerance and delta > min_delta:
+            status = "regression"
+        elif ratio < 1 / (1 + tolerance) and -delta > min_delta:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": key[0], "rows": key[1], "baseline": before, "current": r["seconds"],
+                     "ratio": ratio, "status": status})
+    for (name, n_rows), before in base.items():
+        rows.append({"name": name, "rows": n_rows, "baseline": before, "current": None,
+                     "ratio": None, "status": "missing"})
+    return rows
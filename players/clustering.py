@@ -1,21 +1,27 @@
 # players/services.py
+import hashlib
+import time
+from typing import Callable
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler, normalize, RobustScaler
 from sklearn.decomposition import PCA
-from sklearn.cluster import MeanShift
-from sklearn.metrics import silhouette_score, davies_bouldin_score
-from .models import Player
+from sklearn.metrics import pairwise_distances_argmin
+from django.conf import settings
+from django.db import connection
+from .columnar import fetch_columns
+from . import metrics
+from .feature_cache import cache_enabled, read_feature_cache, write_feature_cache
+from .models import ClusterRun, Dataset, Player, PlayerNeighbor
+from .neighbors import build_neighbor_table
+from .positions import POS_GROUPS, in_group
+from .profiling import profiled
+from .services import get_dataset_version
+from .sweep import SilhouetteEvaluator, adaptive_sweep, fit_groups, score_candidate, sweep_bandwidths
 
 # =============================
 # FITUR YANG TERPAKAI UNTUK CLUSTERING
 # =============================
-POS_GROUPS = {
-    "Pemain Penyerang": ["ST", "LW", "RW"],
-    "Pemain Gelandang": ["AM", "CM", "DM", "LM", "RM"],
-    "Pemain Bertahan": ["CB", "LB", "RB"],
-}
-
 FEATURES_BY_POS = {
     "Pemain Penyerang": [
         "goal_per_game", "shot_per_game", "sot_per_game",
@@ -68,70 +74,119 @@ FEATURE_LABELS = {
 # =============================
 # MENGAMBIL DATA FITUR FITUR PEMAIN
 # =============================
+@profiled
 def get_player_features_df(season: str) -> pd.DataFrame:
+    """
+    Dibaca dari cache kolom per musim (players.feature_cache) jika ada dan
+    versinya sama dengan versi dataset sekarang; kalau tidak, diambil dari
+    database lalu cache ditulis (kecuali di dalam transaksi, supaya data yang
+    belum commit tidak ikut tersimpan).
+    """
+    if not cache_enabled():
+        return _query_player_features_df(season)
+    version = get_dataset_version(season)  # dibaca sebelum baris, lihat write_feature_cache
+    cached = read_feature_cache(season, version)
+    if cached is not None:
+        return cached
+
+    df = _query_player_features_df(season)
+    if not df.empty and not connection.in_atomic_block:
+        write_feature_cache(season, df, version)
+    return df
+
+def rebuild_feature_cache(season: str) -> None:
+    """Tulis ulang cache dari database tanpa melihat cache lama (dipanggil setelah commit upload)."""
+    version = get_dataset_version(season)
+    df = _query_player_features_df(season)
+    if not df.empty:
+        write_feature_cache(season, df, version)
+
+# KOLOM TEKS YANG DISIMPAN SEBAGAI KATEGORI
+CATEGORICAL_COLS = ["team", "nationality", "position"]
+
+@metrics.timed("orm_fetch")
+def _query_player_features_df(season: str) -> pd.DataFrame:
+    """Ambil langsung dari database ke array bertipe (lihat players.columnar)."""
     all_feats = sorted({f for feats in FEATURES_BY_POS.values() for f in feats})
-    qs = (
-        Player.objects
-        .filter(dataset__season=season)
-        .values(*META_COLS, *all_feats)
-        .order_by("player")
-    )
-    return pd.DataFrame(list(qs))
+    qs = Player.objects.filter(dataset__season=season).order_by("player", "id")
+    return fetch_columns(qs, [*META_COLS, *all_feats, "position_group_mask"], categorical=CATEGORICAL_COLS)
 
-# NORMALISASI
-def _prepare_matrix(df: pd.DataFrame, feat_cols):
-    X = (
+# FINGERPRINT ISI MATRIKS FITUR SATU MUSIM
+def _feature_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Hash isi kolom id, posisi dan fitur; berubah jika data musim berubah.
+    Baris diurutkan menurut id dulu, jadi urutan hasil query / cache tidak berpengaruh.
+    """
+    all_feats = sorted({f for feats in FEATURES_BY_POS.values() for f in feats})
+    df = df.sort_values("id", kind="stable")
+    hashed = pd.util.hash_pandas_object(df[["id", "position", *all_feats]], index=False)
+    return hashlib.sha256(hashed.values.tobytes()).hexdigest()
+
+# MATRIKS FITUR MENTAH (inf/NaN -> 0)
+def _feature_matrix(df: pd.DataFrame, feat_cols) -> np.ndarray:
+    return (
         df[feat_cols]
         .astype(float)
         .replace([np.inf, -np.inf], np.nan)
         .fillna(0.0)
         .values
     )
+
+# NORMALISASI
+@metrics.timed("prepare_matrix")
+def _prepare_matrix(df: pd.DataFrame, feat_cols):
+    X = _feature_matrix(df, feat_cols)
     scaler = StandardScaler()
     Xs = scaler.fit_transform(X)
     pca = PCA(n_components=2)
     X2 = pca.fit_transform(Xs)
-    return Xs, X2
+    return Xs, X2, scaler, pca
 
 # =============================
 # MEAN SHIFT CLUSTERING
 # =============================
-def run_meanshift(df: pd.DataFrame, feat_cols):
-    """Loop bandwidth 0.5–10 dengan error handling."""
-    Xs, X2 = _prepare_matrix(df, feat_cols)
-    bandwidths = np.arange(0.5, 5.5, 0.5)
-    results = []
-
-    for bw in bandwidths:
-        labels, n_clusters, = None, 0        
-        for bin_seed in [True]:
-            try:
-                ms = MeanShift(bandwidth=float(bw), bin_seeding=bin_seed, cluster_all=True)
-                labels = ms.fit_predict(Xs)
-                n_clusters = len(np.unique(labels))
-                break
-            except ValueError:
-                raise Exception("Clustering gagal")
-
-        sil, dbi = None, None
-        if labels is not None and n_clusters >= 2:
-            try:
-                sil = float(silhouette_score(Xs, labels))
-            except Exception:
-                pass
-            try:
-                dbi = float(davies_bouldin_score(Xs, labels))
-            except Exception:
-                pass
-
-        results.append({
-            "bw": float(bw),
-            "labels": labels,
-            "n_clusters": n_clusters,
-            "sil": sil,
-            "dbi": dbi,            
-        })
+# KANDIDAT BANDWIDTH
+BANDWIDTH_GRID = np.arange(0.5, 5.5, 0.5)
 
+def run_meanshift(df: pd.DataFrame, feat_cols, n_jobs: int | None = None, search: str | None = None,
+                  engine: str | None = None, progress: Callable[[float], None] | None = None):
+    """
+    Loop bandwidth 0.5–10 dengan error handling.
+    n_jobs: jumlah worker proses untuk sweep bandwidth
+    (default settings.CLUSTERING_N_JOBS, 1 = serial).
+    search: "grid" (fit semua bandwidth) atau "adaptive" (hanya sebagian,
+    lihat sweep.adaptive_sweep); default settings.CLUSTERING_BANDWIDTH_SEARCH.
+    engine: "sklearn" atau "native" (players.meanshift, satu KD-tree untuk
+    semua bandwidth); default settings.CLUSTERING_MEANSHIFT_ENGINE.
+    progress(bw): dipanggil setiap satu bandwidth selesai di-fit.
+    """
+    if n_jobs is None:
+        n_jobs = getattr(settings, "CLUSTERING_N_JOBS", 1)
+    if search is None:
+        search = getattr(settings, "CLUSTERING_BANDWIDTH_SEARCH", "grid")
+    if engine is None:
+        engine = getattr(settings, "CLUSTERING_MEANSHIFT_ENGINE", "sklearn")
+    prepared = _prepare_matrix(df, feat_cols)
+    Xs = prepared[0]
+    evaluator = _silhouette_evaluator(Xs)
+    if search == "adaptive":
+        results = adaptive_sweep(Xs, BANDWIDTH_GRID, evaluator=evaluator, engine=engine, progress=progress)
+    else:
+        results = sweep_bandwidths(Xs, BANDWIDTH_GRID, n_jobs=n_jobs, evaluator=evaluator, engine=engine,
+                                   progress=progress)
+    return _meanshift_result(df, feat_cols, prepared, evaluator, results)
+
+def _silhouette_evaluator(Xs: np.ndarray) -> SilhouetteEvaluator:
+    return SilhouetteEvaluator(
+        Xs,
+        max_matrix_bytes=getattr(settings, "CLUSTERING_SILHOUETTE_MAX_MATRIX_MB", 256) * 1024 ** 2,
+        sample_size=getattr(settings, "CLUSTERING_SILHOUETTE_SAMPLE_SIZE", 2000),
+        seed=getattr(settings, "CLUSTERING_SILHOUETTE_SEED", 0),
+    )
+
+def _meanshift_result(df: pd.DataFrame, feat_cols, prepared, evaluator: SilhouetteEvaluator, results) -> dict:
+    """Tabel evaluasi + kandidat terbaik dari hasil sweep yang sudah diskor."""
+    Xs, X2, scaler, pca = prepared
     df_eval = pd.DataFrame([{
         "Bandwidth": r["bw"],
         "Jumlah Cluster": r["n_clusters"],
@@ -154,27 +209,295 @@ def run_meanshift(df: pd.DataFrame, feat_cols):
         "best_sil": best_sil,
         "best_dbi": best_dbi,
         "same_bw": same_bw,
+        "sil_sampled": evaluator.sampled,
+        "scaler_mean": scaler.mean_,
+        "scaler_scale": scaler.scale_,
+        "pca_components": pca.components_,
+        "pca_mean": pca.mean_,
     }
 
-def run_meanshift_by_position(season: str):
+# MEMILIH PEMAIN SESUAI KATEGORI POSISI
+def _select_group(df_all: pd.DataFrame, group: str) -> pd.DataFrame:
+    """Pakai mask kategori yang dihitung saat ingest (Player.position_group_mask)."""
+    mask = in_group(df_all["position_group_mask"].to_numpy(), group)
+    return df_all.loc[mask].drop(columns="position_group_mask")
+
+# CLUSTERING SATU KATEGORI POSISI (DENGAN WAKTU EKSEKUSI)
+def _run_group(df_all: pd.DataFrame, group: str, n_jobs: int | None = None, progress=None):
+    """progress(group, bw) per bandwidth, lalu progress(group, None) saat kategori selesai."""
+    started = time.perf_counter()
+    df_pos = _select_group(df_all, group)
+    if len(df_pos) < 3:
+        res = None
+    else:
+        with metrics.labels(group=group):
+            res = run_meanshift(df_pos, FEATURES_BY_POS[group], n_jobs=n_jobs,
+                                progress=(lambda bw: progress(group, bw)) if progress else None)
+        res["elapsed"] = time.perf_counter() - started
+    if progress:
+        progress(group, None)
+    return res
+
+def _run_groups(df_all: pd.DataFrame, groups, n_jobs: int | None = None, progress=None):
+    """
+    Jalankan beberapa kategori posisi bersamaan. Untuk sweep grid, fit semua
+    kategori x bandwidth dikirim sekaligus ke satu process pool
+    (sweep.fit_groups, n_jobs worker; default settings.CLUSTERING_N_JOBS) dan
+    matriks tiap kategori dikirim sekali per worker. Pencarian adaptive
+    bergantung pada langkah sebelumnya, jadi tetap per kategori berurutan.
+    res["elapsed"]: detik sejak kategori mulai sampai hasilnya selesai diskor.
+    """
+    groups = list(groups)
+    if not groups:
+        return {}
+    if n_jobs is None:
+        n_jobs = getattr(settings, "CLUSTERING_N_JOBS", 1)
+    if getattr(settings, "CLUSTERING_BANDWIDTH_SEARCH", "grid") == "adaptive":
+        return {g: _run_group(df_all, g, n_jobs, progress) for g in groups}
+
+    started = time.perf_counter()
+    results, prepared = {}, {}
+    for group in groups:
+        df_pos = _select_group(df_all, group)
+        if len(df_pos) < 3:
+            results[group] = None
+            if progress:
+                progress(group, None)
+            continue
+        with metrics.labels(group=group):
+            prepared[group] = (df_pos, _prepare_matrix(df_pos, FEATURES_BY_POS[group]))
+
+    fits = fit_groups(
+        {g: matrix[0] for g, (_, matrix) in prepared.items()}, BANDWIDTH_GRID, n_jobs,
+        engine=getattr(settings, "CLUSTERING_MEANSHIFT_ENGINE", "sklearn"), progress=progress,
+    )
+    for group, (df_pos, matrix) in prepared.items():
+        with metrics.labels(group=group):
+            evaluator = _silhouette_evaluator(matrix[0])
+            scored = [score_candidate(matrix[0], r, evaluator) for r in fits[group]]
+            results[group] = _meanshift_result(df_pos, FEATURES_BY_POS[group], matrix, evaluator, scored)
+        results[group]["elapsed"] = time.perf_counter() - started
+        if progress:
+            progress(group, None)
+    return {g: results[g] for g in groups}
+
+def run_meanshift_by_position(season: str, n_jobs: int | None = None):
     """
     Jalankan clustering per kategori posisi
     dengan fitur yang disesuaikan untuk tiap kategori.
+    Kategori diproses bersamaan (lihat _run_groups); waktu tiap kategori
+    (detik) ada di res["elapsed"].
     """
     df_all = get_player_features_df(season)
     if df_all.empty:
         return {"Forward": None, "Midfielder": None, "Defender": None}
 
+    return _run_groups(df_all, POS_GROUPS, n_jobs=n_jobs)
+
+# =============================
+# PENYIMPANAN HASIL CLUSTERING (ClusterRun)
+# =============================
+def _best_to_json(best):
+    if best is None:
+        return None
+    return {
+        "bw": best["bw"],
+        "labels": np.asarray(best["labels"]).tolist(),
+        "n_clusters": int(best["n_clusters"]),
+        "sil": best["sil"],
+        "dbi": best["dbi"],
+    }
+
+def _best_from_json(best):
+    if best is None:
+        return None
+    return {**best, "labels": np.asarray(best["labels"])}
+
+def _save_cluster_run(dataset: Dataset, group: str, fingerprint: str, res) -> ClusterRun:
+    best_sil = res["best_sil"]
+    run, _ = ClusterRun.objects.update_or_create(
+        dataset=dataset,
+        group=group,
+        defaults={
+            "fingerprint": fingerprint,
+            "bandwidth": best_sil["bw"] if best_sil else None,
+            "player_ids": res["meta"]["id"].astype(int).tolist(),
+            "labels": np.asarray(best_sil["labels"]).tolist() if best_sil else [],
+            "scaler_mean": res["scaler_mean"].tolist(),
+            "scaler_scale": res["scaler_scale"].tolist(),
+            "pca_components": res["pca_components"].tolist(),
+            "pca_mean": res["pca_mean"].tolist(),
+            "pca_projection": res["pca"].tolist(),
+            "eval_table": [
+                {k: (None if pd.isna(v) else v) for k, v in row.items()}
+                for row in res["res_table"].to_dict("records")
+            ],
+            "best_sil": _best_to_json(best_sil),
+            "best_dbi": _best_to_json(res["best_dbi"]),
+            "cluster_centers": np.asarray(best_sil["centers"]).tolist() if best_sil else [],
+            "stale": False,
+            "n_appended": 0,
+        },
+    )
+    return run
+
+def _load_cluster_run(run: ClusterRun, df_pos: pd.DataFrame, feat_cols):
+    """Bangun ulang dict hasil run_meanshift dari ClusterRun tanpa fitting ulang."""
+    df_pos = df_pos.set_index("id", drop=False).loc[run.player_ids].reset_index(drop=True)
+    mean = np.asarray(run.scaler_mean, dtype=float)
+    scale = np.asarray(run.scaler_scale, dtype=float)
+    Xs = (_feature_matrix(df_pos, feat_cols) - mean) / scale
+
+    best_sil = _best_from_json(run.best_sil)
+    best_dbi = _best_from_json(run.best_dbi)
+    same_bw = best_sil and best_dbi and best_sil["bw"] == best_dbi["bw"]
+
+    return {
+        "res_table": pd.DataFrame(run.eval_table, columns=["Bandwidth", "Jumlah Cluster", "Silhouette", "DBI"]),
+        "pca": np.asarray(run.pca_projection, dtype=float).reshape(-1, 2),
+        "Xs": Xs,
+        "meta": df_pos,
+        "feature_df": df_pos[feat_cols].reset_index(drop=True),
+        "best_sil": best_sil,
+        "best_dbi": best_dbi,
+        "same_bw": same_bw,
+        "scaler_mean": mean,
+        "scaler_scale": scale,
+        "pca_components": np.asarray(run.pca_components, dtype=float),
+        "pca_mean": np.asarray(run.pca_mean, dtype=float),
+    }
+
+def _valid_runs(dataset: Dataset, fingerprint: str, groups=None) -> dict:
+    """ClusterRun per kategori yang fingerprint-nya sama dan drift-nya di bawah batas."""
+    max_drift = getattr(settings, "CLUSTERING_DRIFT_THRESHOLD", 0.1)
+    runs = ClusterRun.objects.filter(dataset=dataset, fingerprint=fingerprint)
+    if groups is not None:
+        runs = runs.filter(group__in=groups)
+    return {r.group: r for r in runs if r.drift <= max_drift}
+
+def is_run_current(dataset: Dataset, group: str) -> bool:
+    """ClusterRun kategori masih berlaku untuk data musim saat ini (lihat _valid_runs)."""
+    df_all = get_player_features_df(dataset.season)
+    return not df_all.empty and group in _valid_runs(dataset, _feature_fingerprint(df_all), [group])
+
+def get_cluster_results(season: str, refresh: bool = False, progress=None):
+    """
+    Sama seperti run_meanshift_by_position, tapi hasil per kategori posisi
+    disimpan di ClusterRun (plus tabel PlayerNeighbor untuk rekomendasi).
+    MeanShift hanya dijalankan ulang jika belum ada, fingerprint data musim
+    berubah, drift hasil append melewati settings.CLUSTERING_DRIFT_THRESHOLD,
+    atau refresh=True. progress: lihat _run_group (hanya untuk kategori yang di-fit).
+    """
+    dataset = Dataset.objects.filter(season=season).first()
+    df_all = get_player_features_df(season)
+    if dataset is None or df_all.empty:
+        return {"Forward": None, "Midfielder": None, "Defender": None}
+
+    fingerprint = _feature_fingerprint(df_all)
+    runs = {} if refresh else _valid_runs(dataset, fingerprint)
+
+    fresh = _run_groups(df_all, [g for g in POS_GROUPS if g not in runs], progress=progress)
+
     results = {}
-    for group, positions in POS_GROUPS.items():
-        df_pos = df_all[df_all["position"].apply(
-            lambda p: any(pos in str(p).upper().replace(" ", "").split(",") or
-                          pos in str(p).upper().replace(" ", "") for pos in positions)
-        )]
-        feat_cols = FEATURES_BY_POS[group]
-        if len(df_pos) < 3:
-            results[group] = None
-            continue
-        results[group] = run_meanshift(df_pos, feat_cols)
+    for group in POS_GROUPS:
+        with metrics.labels(group=group):
+            if group in fresh:
+                if fresh[group] is not None:
+                    with metrics.stage_timer("save_cluster_run"):
+                        _save_cluster_run(dataset, group, fingerprint, fresh[group])
+                    build_neighbor_table(dataset, group, fresh[group])
+                results[group] = fresh[group]
+                continue
+            df_pos = _select_group(df_all, group)
+            with metrics.stage_timer("load_cluster_run"):
+                results[group] = _load_cluster_run(runs[group], df_pos, FEATURES_BY_POS[group])
+            if not PlayerNeighbor.objects.filter(dataset=dataset, group=group).exists():
+                build_neighbor_table(dataset, group, results[group])
+
+    return results
 
+# HASIL TERSIMPAN SAJA (UNTUK REQUEST GET)
+class ClusteringRequired(Exception):
+    """Musim belum punya hasil clustering tersimpan yang masih berlaku (jalankan job clustering)."""
+
+def get_stored_cluster_results(season: str):
+    """
+    Seperti get_cluster_results, tapi hanya membaca ClusterRun yang masih
+    berlaku: tidak pernah menjalankan MeanShift maupun menulis ke database.
+    Raise ClusteringRequired jika ada kategori posisi yang perlu di-fit.
+    """
+    dataset = Dataset.objects.filter(season=season).first()
+    df_all = get_player_features_df(season)
+    if dataset is None or df_all.empty:
+        return {"Forward": None, "Midfielder": None, "Defender": None}
+
+    runs = _valid_runs(dataset, _feature_fingerprint(df_all))
+    results = {}
+    for group in POS_GROUPS:
+        df_pos = _select_group(df_all, group)
+        if group in runs:
+            results[group] = _load_cluster_run(runs[group], df_pos, FEATURES_BY_POS[group])
+        elif len(df_pos) < 3:
+            results[group] = None
+        else:
+            raise ClusteringRequired(f"Musim {season} belum memiliki hasil clustering terbaru ({group}).")
     return results
+
+# =============================
+# MODE APPEND: ASSIGN PEMAIN BARU KE MODE TERDEKAT
+# =============================
+def _assign_nearest(Xs_old: np.ndarray, labels_old, Xs_new: np.ndarray, centers=None) -> np.ndarray:
+    """
+    Label untuk Xs_new = mode (cluster_centers) terdekat. Run lama tanpa
+    cluster_centers memakai rata-rata tiap cluster sebagai pengganti.
+    """
+    labels_old = np.asarray(labels_old)
+    if centers is not None and len(centers):
+        return pairwise_distances_argmin(Xs_new, np.asarray(centers, dtype=float))
+    uniq = np.unique(labels_old)
+    means = np.vstack([Xs_old[labels_old == c].mean(axis=0) for c in uniq])
+    return uniq[pairwise_distances_argmin(Xs_new, means)]
+
+def append_to_cluster_runs(dataset: Dataset, since_id: int) -> dict:
+    """
+    Dipanggil setelah pemain baru (id > since_id) ditambahkan ke musim yang
+    sudah ada. Pemain baru diproyeksikan dengan scaler/PCA yang tersimpan dan
+    di-assign ke mode MeanShift terdekat tanpa fitting ulang; ClusterRun
+    ditandai stale. Fitting penuh baru terjadi lewat
+    get_cluster_results(refresh=True) atau saat drift melewati
+    settings.CLUSTERING_DRIFT_THRESHOLD. Run yang sudah tidak cocok dengan
+    data sebelum append dibiarkan (akan di-fit ulang).
+    Kembalian: {group: jumlah pemain baru}.
+    """
+    df_all = get_player_features_df(dataset.season)
+    old_fingerprint = _feature_fingerprint(df_all[df_all["id"] <= since_id].reset_index(drop=True))
+    fingerprint = _feature_fingerprint(df_all)
+    appended = {}
+    for run in ClusterRun.objects.filter(dataset=dataset, fingerprint=old_fingerprint):
+        feat_cols = FEATURES_BY_POS[run.group]
+        df_pos = _select_group(df_all, run.group)
+        df_new = df_pos[df_pos["id"] > since_id]
+        if not df_new.empty and run.best_sil:
+            mean = np.asarray(run.scaler_mean, dtype=float)
+            scale = np.asarray(run.scaler_scale, dtype=float)
+            Xs_new = (_feature_matrix(df_new, feat_cols) - mean) / scale
+            old = _load_cluster_run(run, df_pos, feat_cols)
+
+            labels = _assign_nearest(old["Xs"], run.best_sil["labels"], Xs_new, run.cluster_centers)
+            run.best_sil["labels"] = [*run.best_sil["labels"], *labels.tolist()]
+            run.labels = run.best_sil["labels"]
+            if run.best_dbi:
+                dbi_labels = _assign_nearest(old["Xs"], run.best_dbi["labels"], Xs_new)
+                run.best_dbi["labels"] = [*run.best_dbi["labels"], *dbi_labels.tolist()]
+
+            projection = (Xs_new - np.asarray(run.pca_mean)) @ np.asarray(run.pca_components).T
+            run.pca_projection = [*run.pca_projection, *projection.tolist()]
+            run.player_ids = [*run.player_ids, *df_new["id"].astype(int).tolist()]
+            run.n_appended += len(df_new)
+            run.stale = True
+            appended[run.group] = len(df_new)
+        run.fingerprint = fingerprint
+        run.save()
+        if run.group in appended:
+            build_neighbor_table(dataset, run.group, _load_cluster_run(run, df_pos, feat_cols))
+    return appended
@@ -0,0 +1,48 @@
+# players/columnar.py
+import numpy as np
+import pandas as pd
+from django.db import connection, models
+
+# JUMLAH BARIS PER fetchmany
+FETCH_CHUNK_ROWS = 10_000
+
+def _column_dtype(field: models.Field):
+    if isinstance(field, models.FloatField):
+        return np.float64
+    if isinstance(field, (models.IntegerField, models.AutoField)):
+        return np.int64
+    return object
+
+# AMBIL KOLOM QUERYSET LANGSUNG KE ARRAY NUMPY
+def fetch_columns(queryset, fields, categorical=()) -> pd.DataFrame:
+    """
+    Ganti pd.DataFrame(list(qs.values(...))): baris dibaca dari cursor per
+    FETCH_CHUNK_ROWS tuple dan langsung ditulis ke array NumPy bertipe yang
+    sudah dialokasikan (float64 / int64 / object), tanpa dict per baris.
+    Kolom di categorical dijadikan pd.Categorical.
+    Hanya untuk field biasa (tanpa from_db_value, mis. ArrayField/JSONField).
+    """
+    qs = queryset.values_list(*fields)
+    model = queryset.model
+    dtypes = [_column_dtype(model._meta.get_field(name)) for name in fields]
+
+    capacity = qs.count()
+    arrays = [np.empty(capacity, dtype=dtype) for dtype in dtypes]
+    sql, params = qs.query.sql_with_params()
+    size = 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(FETCH_CHUNK_ROWS):
+            end = size + len(rows)
+            if end > capacity:  # ada baris baru sejak count()
+                capacity = max(end, 2 * capacity)
+                arrays = [np.resize(a, capacity) for a in arrays]
+            for array, values in zip(arrays, zip(*rows)):
+                array[size:end] = values
+            size = end
+
+    data = {}
+    for name, array in zip(fields, arrays):
+        array = array[:size]
+        data[name] = pd.Categorical(array) if name in categorical else array
+    return pd.DataFrame(data, copy=False)
@@ -0,0 +1,159 @@
+# players/cross_season.py
+import threading
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler, normalize
+from .clustering import FEATURES_BY_POS, _feature_matrix, _select_group, get_player_features_df
+from .metrics import timed
+from .models import Dataset
+from .positions import token_matrix
+from .recommend import _OUTPUT_COLS, _group_for_position, _plain_columns
+from .services import get_data_version
+
+# =============================
+# PENCARIAN PEMAIN MIRIP LINTAS MUSIM
+# =============================
+# Satu matriks bertumpuk per kategori posisi berisi baris pemain dari semua
+# musim tersimpan. Standarisasi di-fit pada seluruh tumpukan (bukan per musim)
+# supaya nilai fitur antar musim sebanding. Matriks disimpan di memori proses
+# per versi data (get_data_version), jadi upload / hapus dataset membangunnya ulang.
+
+# BARIS PER BLOK PERKALIAN MATRIKS-VEKTOR
+BLOCK_ROWS = 65_536
+
+_lock = threading.Lock()
+_matrices = {}  # kategori posisi -> (versi data, matriks)
+
+# MATRIKS BERTUMPUK SATU KATEGORI POSISI
+@timed("cross_season_matrix")
+def build_cross_season_matrix(group: str) -> dict:
+    """
+    Kembalian dict:
+    - meta: kolom pemain (_OUTPUT_COLS) + season + league_name, satu baris per pemain-musim
+    - X: fitur per game terstandarisasi lalu dinormalisasi L2 (float32), cosine = X @ q
+    - season, league: pd.Categorical untuk filter
+    - position_codes, position_tokens: kode posisi per baris & matriks token per posisi unik
+    - scaler: StandardScaler yang di-fit pada seluruh tumpukan
+    """
+    feat_cols = FEATURES_BY_POS[group]
+    parts = []
+    for season, league in Dataset.objects.order_by("season").values_list("season", "league_name"):
+        df = _select_group(get_player_features_df(season), group)
+        if not df.empty:
+            parts.append(df.assign(season=season, league_name=league))
+    if not parts:
+        meta = pd.DataFrame(columns=[*_OUTPUT_COLS, "season", "league_name"])
+        return {"meta": meta, "X": np.empty((0, len(feat_cols)), dtype=np.float32), "scaler": None,
+                "season": pd.Categorical([]), "league": pd.Categorical([]),
+                "player_key": np.empty(0, dtype=object), "indonesian": np.empty(0, dtype=bool),
+                "position_codes": np.empty(0, dtype=np.int64), "position_tokens": np.empty((0, 0), dtype=bool)}
+
+    stacked = pd.concat(parts, ignore_index=True)
+    scaler = StandardScaler()
+    X = normalize(scaler.fit_transform(_feature_matrix(stacked, feat_cols))).astype(np.float32)
+    meta = stacked.reindex(columns=[*_OUTPUT_COLS, "season", "league_name"])
+    position_codes, positions = pd.factorize(meta["position"].astype(object), use_na_sentinel=False)
+    return {
+        "meta": meta,
+        "X": X,
+        "scaler": scaler,
+        "season": pd.Categorical(meta["season"]),
+        "league": pd.Categorical(meta["league_name"]),
+        "player_key": meta["player"].astype(str).str.lower().to_numpy(),
+        "indonesian": meta["nationality"].astype(str).str.strip().str.lower().eq("indonesia").to_numpy(),
+        "position_codes": position_codes,
+        "position_tokens": token_matrix(positions),
+    }
+
+def get_cross_season_matrix(group: str) -> dict:
+    """build_cross_season_matrix, dibangun sekali per versi data."""
+    version = get_data_version()
+    with _lock:
+        cached = _matrices.get(group)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    matrix = build_cross_season_matrix(group)
+    with _lock:
+        _matrices[group] = (version, matrix)
+    return matrix
+
+# TOP-K PER BLOK
+def blocked_top_k(X: np.ndarray, q: np.ndarray, k: int, allowed: np.ndarray | None = None,
+                  block_rows: int = BLOCK_ROWS) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Indeks & skor k baris dengan X @ q terbesar (urut menurun). Tiap blok
+    block_rows baris hanya menyimpan k kandidat terbaiknya (np.argpartition),
+    sehingga tidak ada sort penuh maupun array skor sepanjang X sekaligus.
+    allowed: mask boolean baris yang boleh dipilih.
+    """
+    idx_parts, sim_parts = [], []
+    for start in range(0, len(X), block_rows):
+        sims = X[start:start + block_rows] @ q
+        if allowed is not None:
+            sims = np.where(allowed[start:start + block_rows], sims, -np.inf)
+        top = np.argpartition(-sims, k - 1)[:k] if k < sims.size else np.arange(sims.size)
+        idx_parts.append(top + start)
+        sim_parts.append(sims[top])
+    if not idx_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=X.dtype)
+    idx, sims = np.concatenate(idx_parts), np.concatenate(sim_parts)
+    keep = np.isfinite(sims)
+    idx, sims = idx[keep], sims[keep]
+    order = np.argsort(-sims, kind="stable")[:k]
+    return idx[order], sims[order]
+
+# REKOMENDASI LINTAS MUSIM
+@timed("recommend_cross_season")
+def get_cross_season_similar_players(
+    season: str,
+    position_code: str,
+    anchor_player: str,
+    top_n: int = 5,
+    seasons=None,
+    leagues=None,
+    only_indonesian: bool = False,
+    filter_position: bool = False,
+    include_same_player: bool = False,
+) -> pd.DataFrame:
+    """
+    Pemain acuan dari musim season; kandidat dari semua musim tersimpan
+    (dibatasi seasons / leagues jika diisi), diurutkan menurut cosine
+    similarity di matriks bertumpuk. Tidak dibatasi cluster (cluster tiap
+    musim berbeda). include_same_player=False: musim lain pemain acuan
+    (nama sama) tidak ikut direkomendasikan. Kolom hasil: rank, kolom pemain,
+    season, league_name, similarity.
+    """
+    group = _group_for_position(position_code)
+    if not group:
+        raise ValueError("Kode posisi tidak valid.")
+    matrix = get_cross_season_matrix(group)
+    meta, X = matrix["meta"], matrix["X"]
+
+    key = str(anchor_player).lower()
+    season_code = matrix["season"].categories.get_indexer([season])[0]
+    anchor = np.flatnonzero((matrix["season"].codes == season_code) & (matrix["player_key"] == key))
+    if season_code < 0 or anchor.size == 0:
+        return pd.DataFrame()
+    anchor = int(anchor[0])
+
+    allowed = np.ones(len(meta), dtype=bool)
+    allowed[anchor] = False
+    if not include_same_player:
+        allowed &= matrix["player_key"] != key
+    if seasons:
+        allowed &= np.isin(matrix["season"].codes, matrix["season"].categories.get_indexer(list(seasons)))
+    if leagues:
+        allowed &= np.isin(matrix["league"].codes, matrix["league"].categories.get_indexer(list(leagues)))
+    if only_indonesian:
+        allowed &= matrix["indonesian"]
+    if filter_position:
+        codes, T = matrix["position_codes"], matrix["position_tokens"]
+        allowed &= (T & T[codes[anchor]]).any(axis=1)[codes]
+
+    idx, sims = blocked_top_k(X, X[anchor], top_n, allowed)
+    if idx.size == 0:
+        return pd.DataFrame()
+    out = meta.iloc[idx].reset_index(drop=True)
+    out["similarity"] = sims.astype(float)
+    out.insert(0, "rank", np.arange(1, idx.size + 1))
+    return _plain_columns(out)
@@ -0,0 +1,108 @@
+# players/feature_cache.py
+import json
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from .metrics import timed
+
+# =============================
+# CACHE KOLOM FITUR PER MUSIM DI DISK
+# =============================
+# Satu folder per musim: satu file .npy per kolom (numerik & kode kategori
+# di-memory-map saat dibaca, kolom teks lain disimpan sebagai kode) + manifest.json.
+# Manifest menyimpan versi dataset (get_dataset_version) saat data dibaca;
+# cache dengan versi lain ditolak, jadi cache yang sempat ditulis ulang dari
+# data sebelum upload / append di-commit tidak terpakai.
+MANIFEST = "manifest.json"
+
+logger = logging.getLogger(__name__)
+
+def _cache_root() -> Path | None:
+    root = getattr(settings, "FEATURE_CACHE_DIR", None)
+    return Path(root) if root else None
+
+def cache_enabled() -> bool:
+    return _cache_root() is not None
+
+def _season_dir(season: str) -> Path | None:
+    root = _cache_root()
+    if root is None:
+        return None
+    return root / str(season).replace("/", "-")
+
+def write_feature_cache(season: str, df: pd.DataFrame, version: str | None = None) -> None:
+    """
+    Tulis DataFrame fitur satu musim; folder lama diganti seluruhnya.
+    version: versi dataset yang dibaca SEBELUM baris df di-query.
+    Best-effort: kegagalan tulis/tukar folder hanya di-log (cache dilewati).
+    """
+    target = _season_dir(season)
+    if target is None or df.empty:
+        return
+    tmp = None
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # nama unik per penulis (proses/thread), di folder yang sama dengan target
+        tmp = Path(tempfile.mkdtemp(prefix=f"{target.name}.tmp-", dir=target.parent))
+        _write_columns(tmp, season, df, version)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+    except OSError:
+        logger.warning("Cache fitur musim %s gagal ditulis", season, exc_info=True)
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+def _write_columns(tmp: Path, season: str, df: pd.DataFrame, version: str | None) -> None:
+    columns = []
+    for name in df.columns:
+        col = df[name]
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            np.save(tmp / f"{name}.npy", col.cat.codes.to_numpy())
+            columns.append({"name": name, "kind": "category", "categories": col.cat.categories.tolist()})
+        elif not pd.api.types.is_numeric_dtype(col.dtype):
+            codes, uniques = pd.factorize(col)  # None/NaN -> -1
+            np.save(tmp / f"{name}.npy", codes.astype(np.int32))
+            columns.append({"name": name, "kind": "str", "categories": [str(u) for u in uniques]})
+        else:
+            np.save(tmp / f"{name}.npy", col.to_numpy())
+            columns.append({"name": name, "kind": "num"})
+    (tmp / MANIFEST).write_text(json.dumps({"season": season, "version": version, "rows": len(df), "columns": columns}))
+
+@timed("feature_cache_read")
+def read_feature_cache(season: str, version: str | None = None) -> pd.DataFrame | None:
+    """
+    Baca cache musim; None jika belum ada/rusak atau versinya bukan version
+    (jika version diisi). Kolom numerik adalah
+    memory-map read-only (tanpa salinan), kolom teks dibangun dari kode kategori.
+    """
+    path = _season_dir(season)
+    if path is None:
+        return None
+    try:
+        manifest = json.loads((path / MANIFEST).read_text())
+        if version is not None and manifest.get("version") != version:
+            return None
+        data = {}
+        for col in manifest["columns"]:
+            values = np.load(path / f"{col['name']}.npy", mmap_mode="r").view(np.ndarray)
+            if col["kind"] == "category":
+                values = pd.Categorical.from_codes(values, categories=col["categories"])
+            elif col["kind"] == "str":
+                lookup = np.empty(len(col["categories"]) + 1, dtype=object)
+                lookup[:-1] = col["categories"]
+                lookup[-1] = None  # kode -1
+                values = lookup[values]
+            data[col["name"]] = values
+    except (OSError, ValueError, KeyError):
+        return None
+    return pd.DataFrame(data, copy=False)
+
+def invalidate_feature_cache(season: str) -> None:
+    path = _season_dir(season)
+    if path is not None:
+        shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,162 @@
+# players/jobs.py
+import multiprocessing
+import threading
+import django
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from . import metrics
+from .clustering import BANDWIDTH_GRID, get_cluster_results
+from .models import ClusteringJob, Dataset
+from .positions import POS_GROUPS
+from .services import get_dataset_version
+
+# =============================
+# JOB CLUSTERING ASINKRON
+# =============================
+# Job disimpan di tabel ClusteringJob dan dijalankan di process pool lokal
+# (tanpa broker). Submit untuk data musim yang sama selagi job masih aktif
+# mengembalikan job yang sama (single-flight, dijaga unique constraint pada
+# dataset + fingerprint = versi dataset). Submit refresh ke job yang masih antre meng-upgrade
+# job itu menjadi refresh; job yang sudah berjalan diikuti apa adanya.
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    Pool dibuat sekali per proses (server ASGI / Streamlit). Worker di-spawn
+    bersih dan menjalankan django.setup() (DJANGO_SETTINGS_MODULE ikut env)
+    sebelum modul players diimpor.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, "CLUSTERING_JOB_WORKERS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        return _executor
+
+def _expire_stale_jobs() -> None:
+    """Job aktif yang tidak ada kabarnya melewati batas waktu dianggap gagal (worker mati)."""
+    limit = timezone.now() - timedelta(seconds=getattr(settings, "CLUSTERING_JOB_TIMEOUT", 3600))
+    ClusteringJob.objects.filter(status__in=ClusteringJob.ACTIVE, updated_at__lt=limit).update(
+        status=ClusteringJob.FAILED, error="Job tidak merespons (timeout).", updated_at=timezone.now(),
+    )
+
+def _initial_progress() -> dict:
+    return {g: {"total": len(BANDWIDTH_GRID), "bandwidths": [], "done": False} for g in POS_GROUPS}
+
+# SUBMIT JOB CLUSTERING
+def submit_clustering_job(season: str, refresh: bool = False) -> ClusteringJob:
+    """
+    Buat job clustering untuk musim (atau kembalikan job aktif untuk data yang
+    sama, di-upgrade ke refresh bila masih antre). Raise ValueError jika musim tidak ada.
+    """
+    dataset = Dataset.objects.filter(season=season).first()
+    if dataset is None:
+        raise ValueError(f"Musim {season} tidak ditemukan.")
+    fingerprint = get_dataset_version(season)  # berubah saat append; tanpa memuat data pemain
+
+    _expire_stale_jobs()
+    active = ClusteringJob.objects.filter(dataset=dataset, fingerprint=fingerprint, status__in=ClusteringJob.ACTIVE)
+    job = active.first()
+    if job is None:
+        try:
+            with transaction.atomic():
+                job = ClusteringJob.objects.create(
+                    dataset=dataset, fingerprint=fingerprint, refresh=refresh, progress=_initial_progress(),
+                )
+        except IntegrityError:  # submit lain menang balapan
+            job = active.get()
+        else:
+            transaction.on_commit(lambda: _dispatch(job.pk))
+            return job
+    if refresh and not job.refresh:
+        _upgrade_to_refresh(job)
+    return job
+
+def _upgrade_to_refresh(job: ClusteringJob) -> None:
+    """
+    Job yang masih antre dijadikan refresh. Worker membaca flag refresh setelah
+    status menjadi running (run_clustering_job), jadi upgrade yang lolos di sini
+    pasti terbaca; job yang sudah berjalan diikuti apa adanya.
+    """
+    if ClusteringJob.objects.filter(pk=job.pk, status=ClusteringJob.QUEUED).update(
+        refresh=True, updated_at=timezone.now(),
+    ):
+        job.refresh = True
+
+def _dispatch(job_id: int) -> None:
+    future = _get_executor().submit(_run_job_in_worker, job_id)
+    future.add_done_callback(lambda f: _on_worker_exit(job_id, f))
+
+def _on_worker_exit(job_id: int, future) -> None:
+    """Worker mati / pool rusak: job ditandai gagal supaya submit berikutnya tidak menunggu."""
+    global _executor
+    error = future.exception()
+    if error is None:
+        metrics.merge(future.result()[1])
+        return
+    with _executor_lock:
+        if _executor is not None and getattr(_executor, "_broken", False):
+            _executor = None
+    ClusteringJob.objects.filter(pk=job_id, status__in=ClusteringJob.ACTIVE).update(
+        status=ClusteringJob.FAILED, error=str(error) or type(error).__name__,
+        finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+    connection.close()
+
+# PROGRESS PER KATEGORI & BANDWIDTH
+class _ProgressTracker:
+    """Callback progress untuk get_cluster_results; state ditulis utuh ke baris job."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.state = _initial_progress()
+        self.lock = threading.Lock()
+
+    def __call__(self, group: str, bw: float | None) -> None:
+        with self.lock:
+            entry = self.state[group]
+            if bw is None:
+                entry["done"] = True
+            else:
+                entry["bandwidths"].append(float(bw))
+            self._save()
+
+    def finish(self) -> dict:
+        with self.lock:
+            for entry in self.state.values():
+                entry["done"] = True
+            return self.state
+
+    def _save(self) -> None:
+        ClusteringJob.objects.filter(pk=self.job_id).update(progress=self.state, updated_at=timezone.now())
+
+# DIJALANKAN DI WORKER
+def run_clustering_job(job_id: int) -> str:
+    ClusteringJob.objects.filter(pk=job_id).update(
+        status=ClusteringJob.RUNNING, started_at=timezone.now(), updated_at=timezone.now(),
+    )
+    job = ClusteringJob.objects.select_related("dataset").get(pk=job_id)  # refresh final (lihat _upgrade_to_refresh)
+    tracker = _ProgressTracker(job_id)
+    try:
+        get_cluster_results(job.dataset.season, refresh=job.refresh, progress=tracker)
+    except Exception as e:
+        ClusteringJob.objects.filter(pk=job_id).update(
+            status=ClusteringJob.FAILED, error=str(e), finished_at=timezone.now(), updated_at=timezone.now(),
+        )
+        return ClusteringJob.FAILED
+    ClusteringJob.objects.filter(pk=job_id).update(
+        status=ClusteringJob.DONE, progress=tracker.finish(), finished_at=timezone.now(), updated_at=timezone.now(),
+    )
+    return ClusteringJob.DONE
+
+def _run_job_in_worker(job_id: int) -> tuple[str, list]:
+    """Metrik tahap dari worker ikut dikirim balik dan digabung di proses induk (_on_worker_exit)."""
+    return run_clustering_job(job_id), metrics.handoff()
@@ -0,0 +1,109 @@
+import time
+from pathlib import Path
+import altair as alt
+from django.core.management.base import BaseCommand, CommandError
+from players.bar_chart import (
+    BarDataMissing, build_cluster_feature_bar_df, build_cluster_feature_chart, build_comparison_chart, get_features_for_group,
+)
+from players.clustering import FEATURE_LABELS, FEATURES_BY_POS, get_cluster_results, get_player_features_df
+from players.recommend import FEATURES_TO_COMPARE, prepare_comparison_long_df
+from players.services import get_seasons
+
+# HALAMAN HTML UNTUK MENGUKUR WAKTU RENDER DI BROWSER (vega-embed dari CDN)
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{name}</title>
+<script src="https://cdn.jsdelivr.net/npm/vega@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-lite@5"></script>
+<script src="https://cdn.jsdelivr.net/npm/vega-embed@6"></script>
+</head><body><h3 id="hasil">{name}: rendering...</h3><div id="charts"></div>
+<script>
+const specs = {specs};
+const t0 = performance.now();
+Promise.all(specs.map((spec) => {{
+  const el = document.createElement("div");
+  document.getElementById("charts").appendChild(el);
+  return vegaEmbed(el, spec, {{renderer: "svg", actions: false}});
+}})).then(() => requestAnimationFrame(() => {{
+  document.getElementById("hasil").textContent =
+    "{name}: " + specs.length + " chart, render " + (performance.now() - t0).toFixed(1) + " ms";
+}}));
+</script></body></html>
+"""
+
+
+def _per_feature_charts(long_df, x: str, y: str, features) -> list:
+    """Cara lama: satu alt.Chart per fitur (data disalin ke tiap spec)."""
+    charts = []
+    for fitur in features:
+        sub = long_df[long_df["Fitur"] == fitur]
+        charts.append(
+            alt.Chart(sub)
+            .mark_bar()
+            .encode(
+                x=alt.X(f"{x}:N", axis=alt.Axis(title=None, labelAngle=0)),
+                y=alt.Y(f"{y}:Q", axis=alt.Axis(title=None)),
+                color=alt.Color(f"{x}:N", title=None, scale=alt.Scale(scheme="tableau10")),
+                tooltip=[f"{x}:N", f"{y}:Q"],
+            )
+            .properties(title={"text": FEATURE_LABELS.get(fitur, fitur), "anchor": "middle"},
+                        width="container", height=220)
+        )
+    return charts
+
+
+class Command(BaseCommand):
+    help = "Bandingkan ukuran spec Vega-Lite & waktu serialisasi: chart per fitur vs satu chart facet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", default=None, help="Default: musim pertama yang tersimpan.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--html", default=None, help="Folder untuk halaman HTML pengukur waktu render di browser.")
+
+    def handle(self, *args, **options):
+        season = options["season"] or next(iter(get_seasons()), None)
+        if season is None:
+            raise CommandError("Belum ada dataset tersimpan.")
+        lama, baru = [], []
+
+        results = get_cluster_results(season)
+        for group, res in results.items():
+            if not res:
+                continue
+            try:
+                feature_cols = get_features_for_group(group, FEATURES_BY_POS)
+                bar_long = build_cluster_feature_bar_df(res, feature_cols)
+            except BarDataMissing:
+                continue
+            lama += _per_feature_charts(bar_long, "Cluster", "Mean", feature_cols)
+            baru.append(build_cluster_feature_chart(bar_long, feature_cols, FEATURE_LABELS))
+
+        feat_df = get_player_features_df(season)
+        if len(feat_df) >= 2:
+            anchor, target = feat_df["player"].iloc[:2]
+            long_df = prepare_comparison_long_df(feat_df, anchor, target, FEATURES_TO_COMPARE)
+            lama += _per_feature_charts(long_df, "Pemain", "Nilai", FEATURES_TO_COMPARE)
+            baru.append(build_comparison_chart(long_df, FEATURES_TO_COMPARE, FEATURE_LABELS))
+
+        self.stdout.write(f"Musim {season}")
+        self.stdout.write(f"{'cara':>12} {'chart':>6} {'KB spec':>10} {'ms serialisasi':>15}")
+        for name, charts in [("per fitur", lama), ("facet", baru)]:
+            specs, elapsed = self._serialize(charts, options["repeat"])
+            size = sum(len(s) for s in specs) / 1024
+            self.stdout.write(f"{name:>12} {len(charts):>6} {size:>10.1f} {elapsed * 1000:>15.1f}")
+            if options["html"]:
+                self._write_html(Path(options["html"]), name, specs)
+
+    def _serialize(self, charts, repeat: int):
+        """Waktu terbaik dari repeat kali to_json (yang dikirim Streamlit ke browser)."""
+        elapsed = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            specs = [chart.to_json() for chart in charts]
+            elapsed = min(elapsed, time.perf_counter() - started)
+        return specs, elapsed
+
+    def _write_html(self, folder: Path, name: str, specs) -> None:
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"charts_{name.replace(' ', '_')}.html"
+        path.write_text(HTML_TEMPLATE.format(name=name, specs="[" + ",".join(specs) + "]"))
+        self.stdout.write(f"  -> {path}")
@@ -0,0 +1,62 @@
+import time
+import tracemalloc
+import pandas as pd
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from players.clustering import FEATURES_BY_POS, META_COLS, _query_player_features_df
+from players.models import Player
+from players.services import insert_dataset_and_players
+from players.synthetic import make_upload_df
+
+BENCH_SEASON = "1900/1901"
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _values_df(season: str) -> pd.DataFrame:
+    """Cara lama: list of dict dari .values() lalu DataFrame."""
+    all_feats = sorted({f for feats in FEATURES_BY_POS.values() for f in feats})
+    qs = (
+        Player.objects
+        .filter(dataset__season=season)
+        .values(*META_COLS, *all_feats, "position_group_mask")
+        .order_by("player")
+    )
+    return pd.DataFrame(list(qs))
+
+
+class Command(BaseCommand):
+    help = "Bandingkan waktu & puncak memori ambil fitur musim: .values() vs fetch kolom bertipe (data di-rollback)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        df = make_upload_df(options["rows"], seed=options["seed"])
+        try:
+            with transaction.atomic():
+                insert_dataset_and_players("Benchmark", BENCH_SEASON, df)
+                self.stdout.write(f"{'metode':>10} {'detik':>10} {'puncak MB':>12} {'hasil MB':>10}")
+                for name, func in [("values", _values_df), ("columnar", _query_player_features_df)]:
+                    elapsed, peak, size = self._measure(func, options["repeat"])
+                    self.stdout.write(f"{name:>10} {elapsed:>10.3f} {peak:>12.1f} {size:>10.1f}")
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _measure(self, func, repeat: int):
+        """Waktu terbaik dari repeat kali, puncak memori Python (tracemalloc) satu kali."""
+        elapsed = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func(BENCH_SEASON)
+            elapsed = min(elapsed, time.perf_counter() - started)
+        tracemalloc.start()
+        result = func(BENCH_SEASON)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed, peak / 1024 ** 2, result.memory_usage(deep=True).sum() / 1024 ** 2
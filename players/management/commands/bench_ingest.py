@@ -0,0 +1,43 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from players.services import insert_dataset_and_players
+from players.synthetic import make_upload_df
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Bandingkan waktu insert_dataset_and_players dengan loader COPY vs bulk_create (data di-rollback)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--loaders", nargs="+", default=["copy", "bulk_create"])
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        loaders = options["loaders"]
+        if connection.vendor != "postgresql" and "copy" in loaders:
+            self.stderr.write("Database bukan PostgreSQL, loader copy dilewati.")
+            loaders = [l for l in loaders if l != "copy"]
+
+        self.stdout.write(f"{'rows':>10} {'loader':>12} {'detik':>10} {'baris/detik':>14}")
+        for n_rows in options["rows"]:
+            df = make_upload_df(n_rows, seed=options["seed"])
+            for loader in loaders:
+                elapsed = self._time_insert(df, loader)
+                self.stdout.write(f"{n_rows:>10} {loader:>12} {elapsed:>10.3f} {n_rows / elapsed:>14,.0f}")
+
+    def _time_insert(self, df, loader: str) -> float:
+        """Insert di dalam transaksi lalu rollback, supaya database tidak berubah."""
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                insert_dataset_and_players("Benchmark", "1900/1901", df, loader=loader)
+                elapsed = time.perf_counter() - started
+                raise _Rollback
+        except _Rollback:
+            pass
+        return elapsed
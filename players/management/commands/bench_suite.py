@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from players.benchmarks import BENCHMARKS, compare, run_suite
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark end-to-end (insert, baca fitur, MeanShift, rekomendasi, bar chart) di liga sintetis; "
+        "hasil JSON, opsional dibandingkan dengan baseline (data di-rollback)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                            help="Total baris liga per ukuran (mis. 1000 10000 100000 1000000).")
+        parser.add_argument("--seasons", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--cluster-max-rows", type=int, default=2_000,
+                            help="Lewati clustering & rekomendasi jika baris per musim lebih dari ini.")
+        parser.add_argument("--recommend-calls", type=int, default=20)
+        parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=None)
+        parser.add_argument("--output", default=None, help="Tulis hasil JSON ke file ini (default: stdout).")
+        parser.add_argument("--baseline", default=None, help="File JSON hasil sebelumnya untuk dibandingkan.")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Batas lebih lambat relatif (0.2 = 20%%).")
+        parser.add_argument("--min-delta", type=float, default=0.005, help="Batas lebih lambat absolut (detik).")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Baseline tidak bisa dibaca: {e}")
+
+        report = run_suite(
+            options["rows"], n_seasons=options["seasons"], seed=options["seed"], repeat=options["repeat"],
+            cluster_max_rows=options["cluster_max_rows"], recommend_calls=options["recommend_calls"],
+            only=options["only"], log=lambda msg: self.stderr.write(msg),
+        )
+        if baseline is not None:
+            report["comparison"] = compare(report, baseline, options["tolerance"], options["min_delta"])
+
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            Path(options["output"]).write_text(payload + "\n")
+            self._print_table(report)
+        else:
+            self.stdout.write(payload)
+
+        regressions = [r for r in report.get("comparison", []) if r["status"] == "regression"]
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regresi: "
+                + ", ".join(f"{r['name']} @ {r['rows']} baris ({r['ratio']:.2f}x)" for r in regressions)
+            )
+
+    def _print_table(self, report: dict) -> None:
+        status = {(r["name"], r["rows"]): r for r in report.get("comparison", [])}
+        self.stdout.write(f"{'benchmark':>32} {'baris':>9} {'detik':>10} {'median':>10} {'vs baseline':>14}")
+        for r in report["results"]:
+            cmp = status.get((r["name"], r["rows"]))
+            note = f"{cmp['ratio']:.2f}x {cmp['status']}" if cmp and cmp["ratio"] is not None else ""
+            self.stdout.write(f"{r['name']:>32} {r['rows']:>9} {r['seconds']:>10.4f} {r['median']:>10.4f} {note:>14}")
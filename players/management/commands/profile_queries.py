@@ -0,0 +1,66 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from players import profiling
+from players.clustering import get_player_features_df
+from players.positions import POS_GROUPS
+from players.services import (
+    get_data_version, get_dataset_version, get_list_of_dataset, get_player_detail, get_players_by_season,
+    get_seasons, insert_dataset_and_players,
+)
+from players.synthetic import make_upload_df
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Jumlah query, waktu SQL dan query paling lambat per panggilan fungsi services "
+        "(dan get_player_features_df) untuk satu musim."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--season", default=None, help="Default: musim pertama yang tersimpan.")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--no-feature-cache", action="store_true",
+                            help="Baca fitur langsung dari database (FEATURE_CACHE_DIR=None).")
+        parser.add_argument("--insert-rows", type=int, default=0,
+                            help="Ikut profil insert_dataset_and_players dengan N baris sintetis (di-rollback).")
+        parser.add_argument("--json", action="store_true", help="Cetak laporan sebagai JSON.")
+
+    def handle(self, *args, **options):
+        season = options["season"] or next(iter(get_seasons()), None)
+        if season is None:
+            raise CommandError("Belum ada dataset tersimpan.")
+        detail_player = next(iter(get_players_by_season(season, "ST")), "")
+
+        profiling.reset()
+        with profiling.capture(), override_settings(
+            **({"FEATURE_CACHE_DIR": None} if options["no_feature_cache"] else {})
+        ):
+            for _ in range(options["repeat"]):
+                get_seasons()
+                get_data_version()
+                get_dataset_version(season)
+                get_list_of_dataset()
+                for codes in POS_GROUPS.values():
+                    get_players_by_season(season, codes[0])
+                get_player_detail(season, detail_player)
+                get_player_features_df(season)
+            if options["insert_rows"]:
+                try:
+                    with transaction.atomic():
+                        insert_dataset_and_players("Profil", "1800/1801", make_upload_df(options["insert_rows"]))
+                        raise _Rollback
+                except _Rollback:
+                    pass
+
+        rows = profiling.report()
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+        else:
+            self.stdout.write(f"Musim {season}")
+            self.stdout.write(profiling.format_report(rows))
@@ -0,0 +1,89 @@
+# players/meanshift.py
+# Mean shift (flat kernel) versi proyek ini, setara sklearn.cluster.MeanShift
+# (bin_seeding=True, cluster_all=True), tetapi:
+# - KD-tree dibangun sekali per grup posisi dan dipakai ulang untuk semua bandwidth,
+# - semua seed digeser bersamaan per iterasi dengan NumPy (bukan satu per satu).
+# Tidak mengimpor Django supaya bisa dipakai di worker proses (lihat sweep.py).
+import numpy as np
+from sklearn.metrics import pairwise_distances_argmin
+from sklearn.neighbors import KDTree
+
+MAX_ITER = 300
+LEAF_SIZE = 30  # sama dengan default NearestNeighbors, urutan tetangga jadi identik
+
+# INDEX TETANGGA UNTUK SATU MATRIKS Xs
+def build_tree(Xs: np.ndarray) -> KDTree:
+    return KDTree(Xs, leaf_size=LEAF_SIZE)
+
+# SEED DARI GRID BERUKURAN bin_size (setara sklearn get_bin_seeds)
+def bin_seeds(X: np.ndarray, bin_size: float) -> np.ndarray:
+    bins = np.unique(np.round(X / bin_size), axis=0)
+    if len(bins) == len(X):
+        return X
+    return bins.astype(np.float32) * bin_size
+
+def _shift_seeds(X: np.ndarray, tree: KDTree, seeds: np.ndarray, bandwidth: float, max_iter: int):
+    """Geser semua seed ke rata-rata tetangga dalam radius bandwidth sampai konvergen."""
+    means = np.asarray(seeds, dtype=float).copy()
+    intensity = np.zeros(len(means), dtype=int)
+    iters = np.zeros(len(means), dtype=int)
+    stop_thresh = 1e-3 * bandwidth
+    active = np.arange(len(means))
+
+    while active.size:
+        neighbours = tree.query_radius(means[active], r=bandwidth)
+        counts = np.fromiter((len(ix) for ix in neighbours), dtype=int, count=len(neighbours))
+        intensity[active] = counts
+
+        # seed tanpa tetangga berhenti dengan intensity 0 (diabaikan nanti)
+        has_points = counts > 0
+        moving = active[has_points]
+        if not moving.size:
+            break
+        counts = counts[has_points]
+        flat = np.concatenate(neighbours[has_points])
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        new_means = np.add.reduceat(X[flat], offsets, axis=0) / counts[:, None]
+
+        shift = np.linalg.norm(new_means - means[moving], axis=1)
+        means[moving] = new_means
+        finished = (shift <= stop_thresh) | (iters[moving] == max_iter)
+        iters[moving[~finished]] += 1
+        active = moving[~finished]
+
+    return means, intensity
+
+def _unique_centers(centers: np.ndarray, bandwidth: float) -> np.ndarray:
+    """Buang center yang berjarak <= bandwidth dari center lain yang lebih padat."""
+    neighbours = KDTree(centers, leaf_size=LEAF_SIZE).query_radius(centers, r=bandwidth)
+    unique = np.ones(len(centers), dtype=bool)
+    for i, ix in enumerate(neighbours):
+        if unique[i]:
+            unique[ix] = False
+            unique[i] = True
+    return centers[unique]
+
+def mean_shift(X: np.ndarray, bandwidth: float, tree: KDTree | None = None, max_iter: int = MAX_ITER):
+    """
+    Kembalikan (labels, cluster_centers). tree hasil build_tree(X) boleh
+    dipakai ulang untuk banyak bandwidth. Raise ValueError jika tidak ada
+    titik dalam radius bandwidth dari seed manapun (sama seperti sklearn).
+    """
+    if tree is None:
+        tree = build_tree(X)
+    means, intensity = _shift_seeds(X, tree, bin_seeds(X, bandwidth), bandwidth, max_iter)
+
+    # center identik digabung (seed terakhir menang), lalu urut intensity lalu koordinat, menurun
+    center_intensity = {}
+    for mean, count in zip(map(tuple, means), intensity):
+        if count:
+            center_intensity[mean] = count
+    if not center_intensity:
+        raise ValueError(f"No point was within bandwidth={bandwidth:f} of any seed.")
+    centers = np.array(list(center_intensity.keys()))
+    counts = np.array(list(center_intensity.values()))
+    order = np.lexsort([*centers.T[::-1], counts])[::-1]
+
+    cluster_centers = _unique_centers(centers[order], bandwidth)
+    labels = pairwise_distances_argmin(X, cluster_centers)
+    return labels, cluster_centers
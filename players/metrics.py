@@ -0,0 +1,201 @@
+# players/metrics.py
+# Modul ini sengaja tidak mengimpor Django (dipakai juga oleh players.sweep);
+# status aktif diatur lewat configure() dari PlayersConfig.ready().
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# =============================
+# HISTOGRAM DURASI PER TAHAP
+# =============================
+# Satu metrik iprs_stage_seconds berlabel stage (+ group / bandwidth jika ada).
+# Nonaktif (default): stage_timer mengembalikan context kosong dan timed
+# langsung memanggil fungsi aslinya, tanpa perf_counter maupun lock.
+METRIC_NAME = "iprs_stage_seconds"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+DUMP_INTERVAL = 1.0
+
+_enabled = False
+_dump_dir: Path | None = None
+_dump_timer = None
+_lock = threading.Lock()
+_series = {}  # (stage, ((label, nilai), ...)) -> [count per bucket..., +Inf], sum
+_context = threading.local()
+_NOOP = contextlib.nullcontext()
+
+def configure(enabled: bool, dump_dir=None) -> None:
+    """
+    dump_dir: folder bersama antar proses (Streamlit, server, worker job);
+    tiap proses menulis snapshot-nya ke <pid>.json paling lambat DUMP_INTERVAL
+    detik setelah ada data baru (paling sering sekali per DUMP_INTERVAL).
+    """
+    global _enabled, _dump_dir
+    _enabled = bool(enabled)
+    _dump_dir = Path(dump_dir) if dump_dir else None
+
+def is_enabled() -> bool:
+    return _enabled
+
+# LABEL KONTEKS (mis. kategori posisi) UNTUK SEMUA TAHAP DI THREAD INI
+@contextlib.contextmanager
+def labels(**values):
+    previous = getattr(_context, "labels", {})
+    _context.labels = {**previous, **{k: str(v) for k, v in values.items() if v is not None}}
+    try:
+        yield
+    finally:
+        _context.labels = previous
+
+def observe(stage: str, seconds: float, **values) -> None:
+    if not _enabled:
+        return
+    merged = {**getattr(_context, "labels", {}), **{k: str(v) for k, v in values.items() if v is not None}}
+    key = (stage, tuple(sorted(merged.items())))
+    with _lock:
+        entry = _series.get(key)
+        if entry is None:
+            entry = _series[key] = [[0] * (len(BUCKETS) + 1), 0.0]
+        counts = entry[0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        entry[1] += seconds
+    _maybe_dump()
+
+class _StageTimer:
+    __slots__ = ("stage", "values", "started")
+
+    def __init__(self, stage: str, values: dict):
+        self.stage, self.values = stage, values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.started, **self.values)
+        return False
+
+def stage_timer(stage: str, **values):
+    """with stage_timer("prepare_matrix"): ..."""
+    return _StageTimer(stage, values) if _enabled else _NOOP
+
+def timed(stage: str, **values):
+    """Decorator: catat durasi setiap panggilan fungsi sebagai tahap stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _StageTimer(stage, values):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# SNAPSHOT (UNTUK DIGABUNG ANTAR PROSES)
+def snapshot(reset: bool = False) -> list[dict]:
+    with _lock:
+        out = [
+            {"stage": stage, "labels": dict(label_items), "counts": list(entry[0]), "sum": entry[1]}
+            for (stage, label_items), entry in _series.items()
+        ]
+        if reset:
+            _series.clear()
+    return out
+
+def merge(items) -> None:
+    """Tambahkan snapshot proses lain (mis. worker job clustering) ke registry proses ini."""
+    with _lock:
+        for item in items or ():
+            key = (item["stage"], tuple(sorted(item["labels"].items())))
+            entry = _series.setdefault(key, [[0] * (len(BUCKETS) + 1), 0.0])
+            entry[0] = [a + b for a, b in zip(entry[0], item["counts"])]
+            entry[1] += item["sum"]
+
+def _maybe_dump() -> None:
+    global _dump_timer
+    if _dump_dir is None:
+        return
+    with _lock:
+        if _dump_timer is not None:
+            return
+        _dump_timer = threading.Timer(DUMP_INTERVAL, _flush)
+        _dump_timer.daemon = True
+        _dump_timer.start()
+
+def _flush() -> None:
+    global _dump_timer
+    with _lock:
+        _dump_timer = None
+    dump()
+
+def dump() -> None:
+    if _dump_dir is None:
+        return
+    _dump_dir.mkdir(parents=True, exist_ok=True)
+    tmp = _dump_dir / f".{os.getpid()}.json.tmp"
+    tmp.write_text(json.dumps(snapshot()))
+    os.replace(tmp, _dump_dir / f"{os.getpid()}.json")
+
+def handoff() -> list[dict]:
+    """
+    Dipanggil di akhir tugas worker proses: snapshot untuk digabung (merge) di
+    proses induk. Jika dump_dir aktif, data worker sudah diekspor lewat filenya
+    sendiri, jadi yang dikirim kosong (supaya tidak terhitung dua kali).
+    """
+    if _dump_dir is not None:
+        dump()
+        return []
+    return snapshot(reset=True)
+
+def _collect() -> list[dict]:
+    """Registry proses ini + snapshot proses lain di dump_dir (file proses ini dilewati)."""
+    items = snapshot()
+    if _dump_dir is not None and _dump_dir.is_dir():
+        own = f"{os.getpid()}.json"
+        for path in _dump_dir.glob("*.json"):
+            if path.name == own:
+                continue
+            try:
+                items += json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+    merged = {}
+    for item in items:
+        key = (item["stage"], tuple(sorted(item["labels"].items())))
+        if key in merged:
+            merged[key]["counts"] = [a + b for a, b in zip(merged[key]["counts"], item["counts"])]
+            merged[key]["sum"] += item["sum"]
+        else:
+            merged[key] = {**item, "counts": list(item["counts"])}
+    return [merged[key] for key in sorted(merged)]
+
+# FORMAT TEKS PROMETHEUS
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _label_text(stage: str, label_items: dict, **extra) -> str:
+    pairs = {"stage": stage, **label_items, **extra}
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+def render() -> str:
+    lines = [
+        f"# HELP {METRIC_NAME} Durasi tahap (fetch ORM, _prepare_matrix, fit MeanShift, silhouette, chart, ...).",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for item in _collect():
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), item["counts"]):
+            cumulative += count
+            lines.append(f"{METRIC_NAME}_bucket{_label_text(item['stage'], item['labels'], le=bound)} {cumulative}")
+        base = _label_text(item["stage"], item["labels"])
+        lines.append(f"{METRIC_NAME}_sum{base} {item['sum']:.6f}")
+        lines.append(f"{METRIC_NAME}_count{base} {cumulative}")
+    return "\n".join(lines) + "\n"
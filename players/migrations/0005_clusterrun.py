@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0004_rename_player_name_player_player_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClusterRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=50)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('bandwidth', models.FloatField(blank=True, null=True)),
+                ('player_ids', models.JSONField(default=list)),
+                ('labels', models.JSONField(default=list)),
+                ('scaler_mean', models.JSONField(default=list)),
+                ('scaler_scale', models.JSONField(default=list)),
+                ('pca_components', models.JSONField(default=list)),
+                ('pca_mean', models.JSONField(default=list)),
+                ('pca_projection', models.JSONField(default=list)),
+                ('eval_table', models.JSONField(default=list)),
+                ('best_sil', models.JSONField(blank=True, null=True)),
+                ('best_dbi', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cluster_runs', to='players.dataset')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'unique_together': {('dataset', 'group')},
+            },
+        ),
+    ]
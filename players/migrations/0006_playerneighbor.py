@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0005_clusterrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.CharField(max_length=50)),
+                ('cluster', models.IntegerField()),
+                ('similarity', models.FloatField()),
+                ('rank', models.PositiveIntegerField()),
+                ('is_indonesian', models.BooleanField(default=False)),
+                ('same_position', models.BooleanField(default=False)),
+                ('anchor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='players.player')),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_neighbors', to='players.dataset')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='players.player')),
+            ],
+            options={
+                'ordering': ['anchor', 'rank'],
+                'indexes': [models.Index(fields=['anchor', 'group', 'rank'], name='players_pla_anchor__06a05a_idx'), models.Index(fields=['anchor', 'group', 'is_indonesian', 'same_position', 'rank'], name='players_pla_anchor__8448cd_idx'), models.Index(fields=['dataset', 'group'], name='players_pla_dataset_6482cb_idx')],
+            },
+        ),
+    ]
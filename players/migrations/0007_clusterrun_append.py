@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0006_playerneighbor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clusterrun',
+            name='cluster_centers',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='clusterrun',
+            name='n_appended',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='clusterrun',
+            name='stale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:59
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Salinan beku aturan players.positions saat migrasi ini dibuat
+# (migrasi tidak boleh ikut berubah jika modul itu berubah).
+POS_GROUPS = {
+    'Pemain Penyerang': ['ST', 'LW', 'RW'],
+    'Pemain Gelandang': ['AM', 'CM', 'DM', 'LM', 'RM'],
+    'Pemain Bertahan': ['CB', 'LB', 'RB'],
+}
+
+
+def pos_tokens(position):
+    if position is None:
+        return set()
+    return {t for t in re.split(r'[^A-Z]+', str(position).upper()) if t}
+
+
+def group_mask(position):
+    p = str(position).upper().replace(' ', '')
+    parts = p.split(',')
+    mask = 0
+    for i, positions in enumerate(POS_GROUPS.values()):
+        if any(pos in parts or pos in p for pos in positions):
+            mask |= 1 << i
+    return mask
+
+
+def fill_position_index(apps, schema_editor):
+    Player = apps.get_model('players', 'Player')
+    PlayerPosition = apps.get_model('players', 'PlayerPosition')
+    for position in Player.objects.values_list('position', flat=True).distinct():
+        rows = Player.objects.filter(position__isnull=True) if position is None else Player.objects.filter(position=position)
+        rows.update(position_group_mask=group_mask(position))
+        codes = sorted(pos_tokens(position))
+        if codes:
+            PlayerPosition.objects.bulk_create(
+                [
+                    PlayerPosition(dataset_id=dataset_id, player_id=player_id, code=code)
+                    for player_id, dataset_id in rows.values_list('id', 'dataset_id')
+                    for code in codes
+                ],
+                batch_size=1000,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0007_clusterrun_append'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='position_group_mask',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PlayerPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=50)),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_positions', to='players.dataset')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='players.player')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dataset', 'code'], name='players_pla_dataset_acd092_idx')],
+            },
+        ),
+        migrations.RunPython(fill_position_index, migrations.RunPython.noop),
+    ]
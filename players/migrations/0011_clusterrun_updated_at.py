@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0010_clusteringjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clusterrun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
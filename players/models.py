@@ -21,6 +21,9 @@ class Dataset(models.Model):
     class Meta:
         unique_together = ('league_name', 'season')
         ordering = ['-uploaded_at']
+        indexes = [
+            models.Index(fields=['season']),
+        ]
 
     def __str__(self):
         return f"{self.league_name} ({self.season})"
@@ -32,6 +35,8 @@ class Player(models.Model):
     team=models.CharField(max_length=50, blank=True, null=True)
     nationality=models.CharField(max_length=50, blank=True, null=True)
     position=models.CharField(max_length=50, blank=True, null=True)
+    # diisi saat ingest dari kolom position (lihat players.positions)
+    position_group_mask=models.PositiveSmallIntegerField(default=0)
     age=models.PositiveIntegerField(default=0)
     appearance=models.PositiveIntegerField(default=0)
     total_minute=models.PositiveIntegerField(default=0)
@@ -58,6 +63,118 @@ class Player(models.Model):
 
     class Meta:
         ordering=['-uploaded_at']
+        indexes = [
+            models.Index(fields=['dataset', 'player']),
+        ]
 
     def __str__(self):
         return f"{self.player}"
+
+# MODEL UNTUK KODE POSISI PEMAIN (SATU BARIS PER TOKEN POSISI, DIISI SAAT INGEST)
+class PlayerPosition(models.Model):
+    dataset=models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='player_positions')
+    player=models.ForeignKey(Player, on_delete=models.CASCADE, related_name='positions')
+    code=models.CharField(max_length=50)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dataset', 'code']),
+        ]
+
+    def __str__(self):
+        return f"{self.player_id} - {self.code}"
+
+# MODEL UNTUK HASIL CLUSTERING PER MUSIM DAN KATEGORI POSISI
+class ClusterRun(models.Model):
+    dataset=models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='cluster_runs')
+    group=models.CharField(max_length=50)
+    fingerprint=models.CharField(max_length=64)
+    bandwidth=models.FloatField(blank=True, null=True)
+    player_ids=models.JSONField(default=list)
+    labels=models.JSONField(default=list)
+    scaler_mean=models.JSONField(default=list)
+    scaler_scale=models.JSONField(default=list)
+    pca_components=models.JSONField(default=list)
+    pca_mean=models.JSONField(default=list)
+    pca_projection=models.JSONField(default=list)
+    eval_table=models.JSONField(default=list)
+    best_sil=models.JSONField(blank=True, null=True)
+    best_dbi=models.JSONField(blank=True, null=True)
+    cluster_centers=models.JSONField(default=list)
+    # pemain yang ditambahkan setelah fitting (mode append) -> run dianggap usang
+    stale=models.BooleanField(default=False)
+    n_appended=models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)  # versi hasil clustering (ETag API)
+
+    class Meta:
+        unique_together = ('dataset', 'group')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.dataset} - {self.group}"
+
+    @property
+    def drift(self) -> float:
+        """Porsi pemain yang di-assign tanpa fitting ulang."""
+        return self.n_appended / len(self.player_ids) if self.player_ids else 0.0
+
+# MODEL UNTUK TABEL PEMAIN TERMIRIP (TOP-K) PER MUSIM DAN KATEGORI POSISI
+class PlayerNeighbor(models.Model):
+    dataset=models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='player_neighbors')
+    group=models.CharField(max_length=50)
+    anchor=models.ForeignKey(Player, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor=models.ForeignKey(Player, on_delete=models.CASCADE, related_name='+')
+    cluster=models.IntegerField()
+    similarity=models.FloatField()
+    rank=models.PositiveIntegerField()
+    is_indonesian=models.BooleanField(default=False)
+    same_position=models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['anchor', 'rank']
+        indexes = [
+            models.Index(fields=['anchor', 'group', 'rank']),
+            models.Index(fields=['anchor', 'group', 'is_indonesian', 'same_position', 'rank']),
+            models.Index(fields=['dataset', 'group']),
+        ]
+
+    def __str__(self):
+        return f"{self.anchor_id} -> {self.neighbor_id} ({self.similarity:.3f})"
+
+# MODEL UNTUK JOB CLUSTERING ASINKRON (LIHAT players.jobs)
+class ClusteringJob(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+    ACTIVE = (QUEUED, RUNNING)
+
+    dataset=models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='clustering_jobs')
+    fingerprint=models.CharField(max_length=64)
+    refresh=models.BooleanField(default=False)
+    status=models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    # {group: {"total": n, "bandwidths": [...], "done": bool}}
+    progress=models.JSONField(default=dict)
+    error=models.TextField(blank=True, default='')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # single-flight: satu job aktif per data musim yang sama (refresh tidak ikut kunci)
+            models.UniqueConstraint(
+                fields=['dataset', 'fingerprint'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_clustering_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset} - {self.status}"
@@ -0,0 +1,106 @@
+# players/neighbors.py
+import numpy as np
+import pandas as pd
+from django.db import connection, transaction
+from sklearn.preprocessing import normalize
+from .metrics import timed
+from .models import Dataset, PlayerNeighbor
+from .positions import token_matrix
+from .services import _copy_rows
+
+# JUMLAH TETANGGA YANG DISIMPAN PER PEMAIN ACUAN (PER KOMBINASI FILTER)
+NEIGHBOR_TOP_K = 20
+
+# SEL MATRIKS SIMILARITY PER BLOK (BARIS ANCHOR x ANGGOTA CLUSTER)
+NEIGHBOR_BLOCK_CELLS = 1 << 22
+
+def neighbor_frame(res, top_k: int = NEIGHBOR_TOP_K, block_cells: int = NEIGHBOR_BLOCK_CELLS) -> pd.DataFrame:
+    """
+    Hitung tetangga cosine tiap pemain dalam cluster yang sama (silhouette terbaik).
+    Per pemain acuan disimpan gabungan top-K untuk tiap kombinasi filter
+    (semua / Indonesia / posisi sama / keduanya), sehingga query dengan filter
+    apa pun tetap tepat untuk top_n <= top_k. rank = urutan similarity di
+    antara tetangga tersimpan pemain acuan itu (1..K = top-K tanpa filter).
+    Similarity dihitung per blok baris anchor (paling banyak block_cells sel)
+    dan top-K dipilih dengan np.argpartition, tanpa sort penuh per anchor.
+    """
+    columns = ["anchor_id", "neighbor_id", "cluster", "similarity", "rank", "is_indonesian", "same_position"]
+    best = res.get("best_sil") if res else None
+    if not best:
+        return pd.DataFrame(columns=columns)
+
+    meta = res["meta"]
+    labels = np.asarray(best["labels"])
+    Xn = normalize(res["Xs"])
+    ids = meta["id"].to_numpy()
+    indo = meta["nationality"].astype(str).str.strip().str.lower().eq("indonesia").to_numpy()
+    T = token_matrix(meta["position"]).astype(np.uint8)
+
+    parts = []
+    for cluster in np.unique(labels):
+        members = np.flatnonzero(labels == cluster)
+        m = members.size
+        if m <= 1:
+            continue
+        Xm, Tm, indo_m = Xn[members], T[members], indo[members]
+        k = min(top_k, m)
+        step = max(1, block_cells // m)
+        for start in range(0, m, step):
+            rows = np.arange(min(step, m - start))
+            sims = Xm[start:start + rows.size] @ Xm.T
+            sims[rows, start + rows] = -np.inf  # pemain acuan bukan tetangganya sendiri
+            shares = (Tm[start:start + rows.size] @ Tm.T) > 0
+
+            # kandidat: top-k tiap kombinasi filter (-1 = slot kosong)
+            cand = []
+            for mask in (None, indo_m[None, :], shares, shares & indo_m[None, :]):
+                masked = sims if mask is None else np.where(mask, sims, -np.inf)
+                if k < m:
+                    top = np.argpartition(-masked, k - 1, axis=1)[:, :k]
+                else:
+                    top = np.broadcast_to(np.arange(m), masked.shape)
+                cand.append(np.where(np.isfinite(np.take_along_axis(masked, top, axis=1)), top, -1))
+            cand = np.concatenate(cand, axis=1)
+
+            # urutkan per anchor menurut similarity, buang kandidat ganda
+            row = np.repeat(rows, cand.shape[1])
+            col = cand.ravel()
+            row, col = row[col >= 0], col[col >= 0]
+            order = np.lexsort((col, -sims[row, col], row))
+            row, col = row[order], col[order]
+            first = np.r_[True, (row[1:] != row[:-1]) | (col[1:] != col[:-1])]
+            row, col = row[first], col[first]
+            starts = np.flatnonzero(np.r_[True, row[1:] != row[:-1]])
+            rank = np.arange(row.size) - np.repeat(starts, np.diff(np.r_[starts, row.size])) + 1
+
+            cand_idx = members[col]
+            parts.append(pd.DataFrame({
+                "anchor_id": ids[members[start + row]],
+                "neighbor_id": ids[cand_idx],
+                "cluster": int(cluster),
+                "similarity": sims[row, col],
+                "rank": rank,
+                "is_indonesian": indo[cand_idx],
+                "same_position": shares[row, col],
+            }))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(parts, ignore_index=True)[columns]
+
+# SIMPAN TABEL TETANGGA SATU MUSIM DAN KATEGORI POSISI
+@transaction.atomic
+@timed("neighbor_table")
+def build_neighbor_table(dataset: Dataset, group: str, res, top_k: int = NEIGHBOR_TOP_K) -> int:
+    PlayerNeighbor.objects.filter(dataset=dataset, group=group).delete()
+    frame = neighbor_frame(res, top_k)
+    if frame.empty:
+        return 0
+    frame.insert(0, "dataset_id", dataset.id)
+    frame.insert(1, "group", group)
+    if connection.vendor == "postgresql":
+        _copy_rows(PlayerNeighbor, frame)
+    else:
+        PlayerNeighbor.objects.bulk_create(
+            [PlayerNeighbor(**row) for row in frame.to_dict("records")], batch_size=1000
+        )
+    return len(frame)
@@ -0,0 +1,74 @@
+# players/positions.py
+import math
+import re
+import numpy as np
+import pandas as pd
+
+# KATEGORI POSISI
+POS_GROUPS = {
+    "Pemain Penyerang": ["ST", "LW", "RW"],
+    "Pemain Gelandang": ["AM", "CM", "DM", "LM", "RM"],
+    "Pemain Bertahan": ["CB", "LB", "RB"],
+}
+
+# BIT TIAP KATEGORI DI Player.position_group_mask
+GROUP_BITS = {group: 1 << i for i, group in enumerate(POS_GROUPS)}
+
+# UBAH STRING POSISI JADI TOKEN
+def pos_tokens(pos_str) -> set[str]:
+    """Ubah string posisi jadi set token huruf besar (spasi, /, -, koma, dll)."""
+    if pos_str is None:
+        return set()
+    if isinstance(pos_str, float) and math.isnan(pos_str):
+        return set()
+    s = str(pos_str).upper()
+    tokens = [t for t in re.split(r"[^A-Z]+", s) if t]
+    return set(tokens)
+
+# MASK KATEGORI POSISI SATU STRING POSISI
+def group_mask(pos_str) -> int:
+    """
+    Gabungan bit GROUP_BITS untuk kategori yang cocok: kode posisi ada di
+    daftar (dipisah koma) atau muncul sebagai substring, seperti aturan
+    pemilihan grup sebelumnya.
+    """
+    p = str(pos_str).upper().replace(" ", "")
+    parts = p.split(",")
+    mask = 0
+    for group, positions in POS_GROUPS.items():
+        if any(pos in parts or pos in p for pos in positions):
+            mask |= GROUP_BITS[group]
+    return mask
+
+# MASK KATEGORI UNTUK SATU KOLOM POSISI (DIHITUNG SEKALI PER STRING UNIK)
+def group_masks(positions) -> np.ndarray:
+    codes, uniques = pd.factorize(pd.Series(positions, dtype=object), use_na_sentinel=False)
+    masks = np.array([group_mask(p) for p in uniques], dtype=np.int64)
+    return masks[codes]
+
+# PASANGAN (PEMAIN, KODE POSISI) UNTUK TABEL PlayerPosition
+def position_codes(player_ids, positions) -> pd.DataFrame:
+    """
+    Satu baris per token posisi tiap pemain (kolom player_id, code).
+    Semua token disimpan, termasuk kode di luar POS_GROUPS (GK, LWB, CF, ...).
+    """
+    codes, uniques = pd.factorize(pd.Series(positions, dtype=object), use_na_sentinel=False)
+    tokens = np.empty(len(uniques), dtype=object)
+    tokens[:] = [sorted(pos_tokens(p)) for p in uniques]
+    frame = pd.DataFrame({"player_id": np.asarray(player_ids, dtype=np.int64), "code": tokens[codes]})
+    return frame.explode("code").dropna(subset=["code"]).reset_index(drop=True)
+
+def token_matrix(positions) -> np.ndarray:
+    """Matriks boolean baris x kode posisi (dihitung sekali per string unik)."""
+    codes, uniques = pd.factorize(pd.Series(positions, dtype=object), use_na_sentinel=False)
+    tokens = [pos_tokens(p) for p in uniques]
+    names = sorted(set().union(*tokens))
+    index = {c: j for j, c in enumerate(names)}
+    T = np.zeros((len(uniques), len(names)), dtype=bool)
+    for i, toks in enumerate(tokens):
+        T[i, [index[t] for t in toks]] = True
+    return T[codes]
+
+# MASK BOOLEAN PEMAIN YANG MASUK SATU KATEGORI
+def in_group(masks, group: str) -> np.ndarray:
+    return (np.asarray(masks, dtype=np.int64) & GROUP_BITS[group]) != 0
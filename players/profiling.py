@@ -0,0 +1,136 @@
+# players/profiling.py
+import contextlib
+import functools
+import threading
+import time
+from django.db import connection
+
+# =============================
+# PROFIL QUERY SQL PER PANGGILAN FUNGSI
+# =============================
+# Fungsi bertanda @profiled mencatat jumlah query, total waktu SQL dan query
+# paling lambat di setiap panggilan (lewat connection.execute_wrapper).
+# Nonaktif (default): wrapper langsung memanggil fungsi aslinya.
+# Panggilan bersarang (mis. insert_dataset_and_players -> get_player_features_df)
+# dihitung di kedua fungsi. COPY lewat cursor.copy (players.services._copy_rows)
+# tidak melewati execute_wrapper, jadi tidak ikut terhitung.
+SLOWEST_PER_FUNCTION = 5
+SQL_PREVIEW_CHARS = 300
+
+_enabled = False
+_captures = 0  # jumlah blok capture() yang sedang aktif
+_lock = threading.Lock()
+_stats = {}  # nama fungsi -> ringkasan semua panggilan
+_calls = []  # panggilan yang direkam capture() aktif
+_local = threading.local()  # stack panggilan @profiled di thread ini
+
+def configure(enabled: bool) -> None:
+    global _enabled
+    _enabled = bool(enabled)
+
+def is_enabled() -> bool:
+    return _enabled
+
+def _record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for frame in _local.stack:
+            frame["queries"] += 1
+            frame["sql_seconds"] += elapsed
+            frame["statements"].append((elapsed, sql))
+
+def _finish(frame: dict) -> None:
+    frame["statements"].sort(key=lambda s: s[0], reverse=True)
+    slowest = [(round(sec, 6), sql[:SQL_PREVIEW_CHARS]) for sec, sql in frame["statements"][:SLOWEST_PER_FUNCTION]]
+    call = {key: frame[key] for key in ("function", "queries", "sql_seconds", "seconds")}
+    call["slowest"] = slowest
+    with _lock:
+        s = _stats.setdefault(frame["function"], {
+            "function": frame["function"], "calls": 0, "queries": 0, "max_queries": 0,
+            "sql_seconds": 0.0, "seconds": 0.0, "slowest": [],
+        })
+        s["calls"] += 1
+        s["queries"] += call["queries"]
+        s["max_queries"] = max(s["max_queries"], call["queries"])
+        s["sql_seconds"] += call["sql_seconds"]
+        s["seconds"] += call["seconds"]
+        s["slowest"] = sorted(s["slowest"] + slowest, key=lambda q: q[0], reverse=True)[:SLOWEST_PER_FUNCTION]
+        if _captures:
+            _calls.append(call)
+
+def profiled(func):
+    """Decorator untuk fungsi publik yang mengakses database."""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not (_enabled or _captures):
+            return func(*args, **kwargs)
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        frame = {"function": name, "queries": 0, "sql_seconds": 0.0, "seconds": 0.0, "statements": []}
+        started = time.perf_counter()
+        stack.append(frame)
+        try:
+            if len(stack) == 1:
+                with connection.execute_wrapper(_record_query):
+                    return func(*args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            stack.pop()
+            frame["seconds"] = time.perf_counter() - started
+            _finish(frame)
+    return wrapper
+
+# LAPORAN
+def report() -> list[dict]:
+    """Ringkasan per fungsi, urut dari total waktu SQL terbesar."""
+    with _lock:
+        rows = [{**s, "slowest": list(s["slowest"])} for s in _stats.values()]
+    for row in rows:
+        row["queries_per_call"] = row["queries"] / row["calls"]
+    return sorted(rows, key=lambda r: r["sql_seconds"], reverse=True)
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+def format_report(rows=None) -> str:
+    rows = report() if rows is None else rows
+    lines = [f"{'fungsi':<36} {'panggilan':>9} {'query/call':>10} {'maks':>5} {'ms SQL':>9} {'ms total':>9}"]
+    for r in rows:
+        lines.append(
+            f"{r['function']:<36} {r['calls']:>9} {r['queries_per_call']:>10.1f} {r['max_queries']:>5} "
+            f"{r['sql_seconds'] * 1000:>9.1f} {r['seconds'] * 1000:>9.1f}"
+        )
+        for sec, sql in r["slowest"]:
+            lines.append(f"    {sec * 1000:>8.2f} ms  {' '.join(sql.split())[:120]}")
+    return "\n".join(lines)
+
+# UNTUK TEST: BATAS JUMLAH QUERY PER FUNGSI
+@contextlib.contextmanager
+def capture():
+    """
+    Aktifkan profil selama blok (meski nonaktif secara global) dan kumpulkan
+    panggilan yang terjadi di blok itu:
+        with capture() as calls:
+            get_list_of_dataset()
+        assert calls[-1]["queries"] == 1
+    """
+    global _captures
+    with _lock:
+        _captures += 1
+        start = len(_calls)
+    calls = []
+    try:
+        yield calls
+    finally:
+        with _lock:
+            calls.extend(_calls[start:])
+            _captures -= 1
+            if not _captures:
+                _calls.clear()
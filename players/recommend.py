@@ -1,9 +1,14 @@
-import math
-import re
 import numpy as np
 import pandas as pd
-from players.clustering import POS_GROUPS, run_meanshift_by_position
+from players.clustering import (
+    FEATURES_BY_POS, META_COLS, POS_GROUPS, get_cluster_results, get_stored_cluster_results, is_run_current,
+)
+from players.metrics import timed
+from players.models import Dataset, Player, PlayerNeighbor
+from players.neighbors import NEIGHBOR_TOP_K
+from players.positions import token_matrix
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
 
 # FITUR YANG AKAN DITAMPILKAN DALAM HASIL PERBANDINGAN
 FEATURES_TO_COMPARE = [
@@ -15,6 +20,13 @@ FEATURES_TO_COMPARE = [
     "error", "total_duel_per_game", "aerial_duel_per_game"
 ]
 
+# KOLOM HASIL REKOMENDASI (SAMA DENGAN KOLOM meta HASIL CLUSTERING)
+_OUTPUT_COLS = [*META_COLS, *sorted({f for feats in FEATURES_BY_POS.values() for f in feats})]
+
+# KOLOM KATEGORI (team, nationality, position) -> teks biasa untuk hasil rekomendasi
+def _plain_columns(df: pd.DataFrame) -> pd.DataFrame:
+    return df.astype({c: "str" for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)})
+
 # MENGKATEGORIKAN POSISI KE PENYERANG, GELANDANG ATAU BERTAHAN
 def _group_for_position(pos_code: str) -> str | None:
     p = str(pos_code).upper().strip()
@@ -23,42 +35,169 @@ def _group_for_position(pos_code: str) -> str | None:
             return g
     return None
 
-def _pos_tokens(pos_str) -> set[str]:
-    """Ubah string posisi jadi set token huruf besar (spasi, /, -, koma, dll)."""
-    if pos_str is None:
-        return set()
-    if isinstance(pos_str, float) and math.isnan(pos_str):
-        return set()
-    s = str(pos_str).upper()
-    tokens = [t for t in re.split(r"[^A-Z]+", s) if t]
-    return set(tokens)
-
-# FILTER POSISI
-def _matches_position(pos_str: str, anchor_tokens: set[str]) -> bool:
-    """True kalau ada minimal satu token posisi yang sama dengan anchor."""
-    tokens = _pos_tokens(pos_str)
-    return bool(tokens & anchor_tokens)
+# MENCARI PEMAIN REKOMENDASI DARI TABEL PlayerNeighbor
+def _anchor_id(dataset: Dataset, group: str, anchor_player: str) -> int | None:
+    """
+    Id pemain acuan yang punya baris tetangga di group. Nama dicari di Player
+    lewat index (dataset, player): cocok persis dulu, baru tanpa beda huruf
+    besar/kecil (di dalam dataset saja); tetangga lalu dicari per anchor_id.
+    """
+    name = str(anchor_player)
+    players = Player.objects.filter(dataset=dataset)
+    ids = list(players.filter(player=name).order_by("id").values_list("id", flat=True))
+    if not ids:
+        ids = list(players.filter(player__iexact=name).order_by("player", "id").values_list("id", flat=True))
+    if len(ids) == 1:
+        return ids[0] if PlayerNeighbor.objects.filter(anchor_id=ids[0], group=group).exists() else None
+    found = set(
+        PlayerNeighbor.objects.filter(anchor_id__in=ids, group=group, rank=1).values_list("anchor_id", flat=True)
+    )
+    return next((i for i in ids if i in found), None)
+
+def _recommend_from_table(season: str, group: str, anchor_player: str, top_n: int,
+                          only_indonesian: bool, filter_position: bool, fit: bool = True) -> pd.DataFrame:
+    dataset = Dataset.objects.filter(season=season).first()
+    if dataset is None:
+        return pd.DataFrame()
+
+    # tabel tetangga ikut usang bersama ClusterRun-nya (fingerprint / drift)
+    if not is_run_current(dataset, group):
+        if not fit:  # hasil tersimpan saja: raise ClusteringRequired bila perlu fit ulang
+            return _recommend_live(season, group, anchor_player, top_n, only_indonesian, filter_position, fit=False)
+        get_cluster_results(season)  # fit ulang + bangun ulang tabel tetangga
+
+    anchor_id = _anchor_id(dataset, group, anchor_player)
+    if anchor_id is None:
+        if PlayerNeighbor.objects.filter(dataset=dataset, group=group).exists():
+            return pd.DataFrame()
+        if not fit:  # tanpa tabel tetangga: hitung dari hasil tersimpan saja
+            return _recommend_live(season, group, anchor_player, top_n, only_indonesian, filter_position, fit=False)
+        get_cluster_results(season)  # clustering + bangun tabel tetangga
+        anchor_id = _anchor_id(dataset, group, anchor_player)
+        if anchor_id is None:
+            return pd.DataFrame()
+
+    qs = PlayerNeighbor.objects.filter(anchor_id=anchor_id, group=group)
+    if only_indonesian:
+        qs = qs.filter(is_indonesian=True)
+    if filter_position:
+        qs = qs.filter(same_position=True)
+    rows = list(qs.order_by("rank").values(*[f"neighbor__{c}" for c in _OUTPUT_COLS], "similarity")[:top_n])
+    if not rows:
+        return pd.DataFrame()
+    out = pd.DataFrame(rows)
+    out.columns = [*_OUTPUT_COLS, "similarity"]
+    return out
 
 # MENCARI PEMAIN REKOMENDASI DAN MENGHITUNG COSINE SIMILARITY
+@timed("recommend")
 def get_recommend_similar_players(
     season: str,
     position_code: str,
     anchor_player: str,
     top_n: int = 5,
     only_indonesian: bool = False,
-    filter_position: bool = False
+    filter_position: bool = False,
+    fit: bool = True
 ):
     """
     Rekomendasi berbasis cosine:
     - pakai grup sesuai position_code,
     - pakai konfigurasi cluster dengan silhouette terbaik,
     - top-N dari cluster yang sama dengan anchor.
+    Untuk top_n <= NEIGHBOR_TOP_K jawaban diambil dari tabel PlayerNeighbor
+    (dibangun saat clustering selesai); selain itu dihitung langsung.
+    fit=False: hanya memakai hasil clustering tersimpan (tanpa MeanShift /
+    tulis database); raise ClusteringRequired jika belum ada.
     """
     group = _group_for_position(position_code)
     if not group:
         raise ValueError("Kode posisi tidak valid.")
+    if top_n <= NEIGHBOR_TOP_K:
+        return _recommend_from_table(season, group, anchor_player, top_n, only_indonesian, filter_position, fit)
+    return _recommend_live(season, group, anchor_player, top_n, only_indonesian, filter_position, fit)
+
+# REKOMENDASI UNTUK BANYAK PEMAIN ACUAN SEKALIGUS
+@timed("recommend_bulk")
+def get_recommend_similar_players_bulk(
+    season: str,
+    anchors,
+    top_n: int = 5,
+    only_indonesian: bool = False,
+    filter_position: bool = False
+) -> pd.DataFrame:
+    """
+    Versi batch get_recommend_similar_players.
+    anchors: iterable pasangan (position_code, anchor_player).
+    Hasil clustering dimuat sekali; similarity semua anchor dalam satu grup
+    dihitung dengan satu perkalian matriks. Kembalian: satu DataFrame dengan
+    kolom anchor_player, position_code, rank, kolom pemain, similarity.
+    """
+    anchors = [(str(code), str(name)) for code, name in anchors]
+    by_group: dict[str, list[tuple[str, str]]] = {}
+    for code, name in anchors:
+        group = _group_for_position(code)
+        if not group:
+            raise ValueError("Kode posisi tidak valid.")
+        by_group.setdefault(group, []).append((code, name))
+
+    columns = ["anchor_player", "position_code", "rank", *_OUTPUT_COLS, "similarity"]
+    if not anchors:
+        return pd.DataFrame(columns=columns)
+
+    all_results = get_cluster_results(season)
+    parts = []
+    for group, group_anchors in by_group.items():
+        res = all_results.get(group)
+        if not res or not res.get("best_sil"):
+            continue
+        meta = res["meta"]
+        labels = np.asarray(res["best_sil"]["labels"])
+
+        # pemain acuan = baris pertama dengan nama sama (seperti versi tunggal)
+        first_idx = (
+            pd.Series(np.arange(len(meta)), index=meta["player"].astype(str).str.lower())
+            .groupby(level=0).first()
+        )
+        found = [(code, name, first_idx.get(name.lower())) for code, name in group_anchors]
+        found = [(code, name, int(i)) for code, name, i in found if i is not None]
+        if not found:
+            continue
+        idx = np.array([i for _, _, i in found])
+
+        Xn = normalize(res["Xs"])
+        sims = Xn[idx] @ Xn.T  # anchor x pemain
+
+        allowed = labels[idx][:, None] == labels[None, :]
+        allowed[np.arange(idx.size), idx] = False
+        if only_indonesian:
+            indo = meta["nationality"].astype(str).str.strip().str.lower().eq("indonesia").to_numpy()
+            allowed &= indo[None, :]
+        if filter_position:
+            T = token_matrix(meta["position"]).astype(np.uint8)
+            allowed &= (T[idx] @ T.T) > 0
+
+        keyed = np.where(allowed, sims, -np.inf)
+        order = np.argsort(-keyed, axis=1, kind="stable")[:, :top_n]
+        for row, (code, name, _) in enumerate(found):
+            picked = order[row][allowed[row, order[row]]]
+            if picked.size == 0:
+                continue
+            out = meta.iloc[picked].reindex(columns=_OUTPUT_COLS).reset_index(drop=True)
+            out["similarity"] = sims[row, picked]
+            out.insert(0, "rank", np.arange(1, picked.size + 1))
+            out.insert(0, "position_code", code)
+            out.insert(0, "anchor_player", name)
+            parts.append(out)
+
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return _plain_columns(pd.concat(parts, ignore_index=True)[columns])
 
-    all_results = run_meanshift_by_position(season)
+# HITUNG REKOMENDASI LANGSUNG DARI HASIL CLUSTERING
+def _recommend_live(season: str, group: str, anchor_player: str, top_n: int,
+                    only_indonesian: bool, filter_position: bool, fit: bool = True) -> pd.DataFrame:
+    all_results = get_cluster_results(season) if fit else get_stored_cluster_results(season)
     res = all_results.get(group)
     if not res or not res.get("best_sil"):
         return pd.DataFrame()
@@ -74,8 +213,6 @@ def get_recommend_similar_players(
 
     anchor_idx = int(meta[anchor_mask].index[0])
     anchor_cluster = int(labels[anchor_idx])
-    anchor_pos_str = meta.loc[anchor_idx, "position"]
-    anchor_tokens = _pos_tokens(anchor_pos_str)
 
     # ambil hanya pemain dalam cluster yang sama
     same_idx = np.where(labels == anchor_cluster)[0]
@@ -93,7 +230,9 @@ def get_recommend_similar_players(
 
     # FILTER POSISI YANG SAMA DENGAN PEMAIN ACUAN
     if "position" in meta.columns and filter_position:
-        same_idx = [j for j in same_idx if _matches_position(meta.loc[j, "position"], anchor_tokens)]
+        T = token_matrix(meta["position"])
+        shares = (T[same_idx] & T[anchor_idx]).any(axis=1)
+        same_idx = list(np.asarray(same_idx)[shares])
 
     # hitung cosine similarity antara pemain acuan dan pemain dalam cluster yg sama
     anchor_vec = Xs[anchor_idx:anchor_idx+1]
@@ -106,7 +245,7 @@ def get_recommend_similar_players(
     out = out[out.index != anchor_idx]
     out = out.sort_values("similarity", ascending=False).head(top_n)
 
-    return out.reset_index(drop=True)
+    return _plain_columns(out).reset_index(drop=True)
 
 # MEMBACA FITUR UNTUK YANG DIPAKAI UNTUK PEMAIN ACUAN DAN PEMAIN REKOMENDASI
 def get_feature_rows(feat_df: pd.DataFrame, anchor_player: str, target_player: str, features: list[str]) -> tuple[pd.Series, pd.Series]:
@@ -136,6 +275,7 @@ def build_long_compare_df(anchor_row: pd.Series, target_row: pd.Series, features
     return long_df
 
 # UNTUK MEMBUAT CHART PERBANDINGAN
+@timed("chart_data", chart="comparison")
 def prepare_comparison_long_df(feat_df: pd.DataFrame, anchor_player: str, target_player: str, features: list[str]) -> pd.DataFrame:
     """
     Satu pintu: ambil baris → bentuk long-form → kembalikan ke UI.
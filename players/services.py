@@ -1,31 +1,209 @@
 from __future__ import annotations
 import re
-from typing import List
+from typing import Iterable, Iterator, List
+import numpy as np
 import pandas as pd
-from django.db import transaction
-from .models import Dataset, Player
-from django.db.models import Count
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Dataset, Player, PlayerPosition
+from .feature_cache import invalidate_feature_cache
+from .metrics import timed
+from .positions import group_masks, position_codes
+from .profiling import profiled
+from django.db.models import Count, Max
 from django.core.exceptions import ValidationError
 import io
 
 
+# KOLOM DATASET -> FIELD Player (nama kolom dicocokkan tanpa membedakan huruf besar/kecil)
+PLAYER_COLUMNS = [
+    ("player", "player", "str"),
+    ("team", "team", "str"),
+    ("nationality", "nationality", "str"),
+    ("position", "position", "str"),
+    ("age", "age", "int"),
+    ("appearance", "appearance", "int"),
+    ("total minute", "total_minute", "int"),
+    ("total goal", "total_goal", "int"),
+    ("goal/game", "goal_per_game", "float"),
+    ("shot/game", "shot_per_game", "float"),
+    ("sot/game", "sot_per_game", "float"),
+    ("assist", "assist", "int"),
+    ("assist/game", "assist_per_game", "float"),
+    ("successful dribble/game", "successful_dribble_per_game", "float"),
+    ("key pass/game", "key_pass_per_game", "float"),
+    ("successful pass/game", "successful_pass_per_game", "float"),
+    ("long ball/game", "long_ball_per_game", "float"),
+    ("successful crossing/game", "successful_crossing_per_game", "float"),
+    ("ball recovered/game", "ball_recovered_per_game", "float"),
+    ("dribbled past/game", "dribbled_past_per_game", "float"),
+    ("clearance/game", "clearance_per_game", "float"),
+    ("error leading to shot", "error", "int"),
+    ("error leading to shot/game", "error_per_game", "float"),
+    ("total duel won/game", "total_duel_per_game", "float"),
+    ("aerial duel won/game", "aerial_duel_per_game", "float"),
+]
+
 #VALIDASI DATASET
-def get_required(row, cols, key, as_str=False):
-    """Ambil nilai dari kolom. Raise Exception jika kolom tidak ditemukan."""
-    if key not in cols:
-        raise KeyError(f"Kolom {key} harus ada di dataset.")
-                    #    f"Kolom yang tersedia: {list(cols.keys())}")
-    val = row[cols[key]]
-    if pd.isna(val):
-        return None
-    return str(val).strip() if as_str else val
+def _resolve_columns(columns) -> dict:
+    """Cocokkan kolom dataset sekali saja. Raise KeyError jika kolom tidak ditemukan."""
+    cols = {str(c).strip().lower(): c for c in columns}
+    resolved = {}
+    for key, field, _ in PLAYER_COLUMNS:
+        if key not in cols:
+            raise KeyError(f"Kolom {key} harus ada di dataset.")
+        resolved[field] = cols[key]
+    return resolved
 
+def _coerce_column(series: pd.Series, key: str, kind: str, row_offset: int = 0) -> np.ndarray:
+    """Konversi satu kolom secara vektor; sel kosong menjadi None."""
+    missing = series.isna().to_numpy()
+    if kind == "str":
+        values = series.astype(str).str.strip().to_numpy(dtype=object)
+    else:
+        numbers = pd.to_numeric(series, errors="coerce").astype(float)
+        invalid = numbers.isna().to_numpy() & ~missing
+        if kind == "int":
+            invalid |= np.isinf(numbers.to_numpy())
+        if invalid.any():
+            row = int(np.flatnonzero(invalid)[0])
+            raise ValueError(f"Kolom {key} harus berisi angka (baris {row_offset + row + 2}: {series.iloc[row]!r}).")
+        if kind == "int":
+            numbers = np.trunc(numbers.fillna(0)).astype(np.int64)
+        values = numbers.to_numpy(dtype=object)
+    values[missing] = None
+    return values
 
-# POST DATASET KE DATABASE
-@transaction.atomic
-def insert_dataset_and_players(league_name: str, season: str, df: pd.DataFrame) -> int:
-    cols = {c.lower(): c for c in df.columns}
+def _player_table(df: pd.DataFrame, cols: dict | None = None, row_offset: int = 0) -> dict:
+    """
+    Ubah DataFrame upload menjadi dict field Player -> array nilai.
+    cols hasil _resolve_columns boleh diberikan supaya tidak dicocokkan ulang per chunk.
+    """
+    if cols is None:
+        cols = _resolve_columns(df.columns)
+    table = {}
+    for key, field, kind in PLAYER_COLUMNS:
+        table[field] = _coerce_column(df[cols[field]], key, kind, row_offset)
+    table["position_group_mask"] = group_masks(table["position"])
+    return table
+
+def _build_players(ds: Dataset, table: dict) -> List[Player]:
+    """
+    Bangun objek Player langsung dari array kolom.
+    Argumen posisional (urutan concrete_fields) jauh lebih cepat dari kwargs di Model.__init__.
+    """
+    n_rows = len(next(iter(table.values()), []))
+    columns = []
+    for field in Player._meta.concrete_fields:
+        if field.attname in table:
+            columns.append(table[field.attname])
+        elif field.attname == "dataset_id":
+            columns.append([ds.id] * n_rows)
+        else:
+            columns.append([None] * n_rows)  # id & uploaded_at diisi saat bulk_create
+    return [Player(*values) for values in zip(*columns)]
+
+# COPY FROM STDIN (KHUSUS POSTGRESQL)
+COPY_CHUNK_ROWS = 100_000
+
+def _copy_rows(model, frame: pd.DataFrame) -> None:
+    """
+    Tulis DataFrame (kolom = attname field model) ke tabel model lewat
+    COPY FROM STDIN per potongan COPY_CHUNK_ROWS baris, di transaksi yang sedang aktif.
+    """
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(model._meta.get_field(name).column) for name in frame.columns)
+    sql = f"COPY {qn(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        for start in range(0, len(frame), COPY_CHUNK_ROWS):
+            buf = io.StringIO()
+            frame.iloc[start:start + COPY_CHUNK_ROWS].to_csv(buf, header=False, index=False, na_rep="\\N")
+            buf.seek(0)
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buf)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+
+def _copy_players(ds: Dataset, table: dict) -> None:
+    frame = pd.DataFrame(table)
+    frame.insert(0, "dataset_id", ds.id)
+    frame["uploaded_at"] = timezone.now().isoformat()
+    _copy_rows(Player, frame)
+
+def _load_players(ds: Dataset, table: dict, loader: str = "auto") -> None:
+    """
+    loader: "copy" (PostgreSQL), "bulk_create", atau "auto"
+    (copy untuk PostgreSQL, bulk_create untuk database lain).
+    """
+    if loader == "auto":
+        loader = "copy" if connection.vendor == "postgresql" else "bulk_create"
+    if loader == "copy":
+        if connection.vendor != "postgresql":
+            raise ValueError("Loader copy hanya tersedia untuk PostgreSQL.")
+        _copy_players(ds, table)
+    elif loader == "bulk_create":
+        bulk = _build_players(ds, table)
+        if bulk:
+            Player.objects.bulk_create(bulk, batch_size=1000)
+    else:
+        raise ValueError(f"Loader {loader} tidak dikenal.")
+
+# ISI TABEL PlayerPosition UNTUK PEMAIN YANG BARU DISIMPAN
+def _index_positions(ds: Dataset, since_id: int = 0) -> None:
+    """Satu baris PlayerPosition per token posisi untuk pemain dataset dengan id > since_id."""
+    rows = list(ds.players.filter(id__gt=since_id).values_list("id", "position"))
+    ids, positions = zip(*rows) if rows else ((), ())
+    frame = position_codes(ids, positions)
+    if frame.empty:
+        return
+    frame.insert(0, "dataset_id", ds.id)
+    if connection.vendor == "postgresql":
+        _copy_rows(PlayerPosition, frame)
+    else:
+        PlayerPosition.objects.bulk_create(
+            [PlayerPosition(**row) for row in frame.to_dict("records")], batch_size=1000
+        )
+
+# BACA FILE UPLOAD PER CHUNK
+UPLOAD_CHUNK_ROWS = 5_000
+
+def iter_upload_chunks(file, filename: str | None = None, chunk_rows: int = UPLOAD_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Baca file dataset (.xlsx atau .csv) per chunk berisi chunk_rows baris,
+    supaya memori tidak bergantung pada ukuran file.
+    xlsx dibaca dengan worksheet read-only openpyxl, csv dengan read_csv(chunksize=...).
+    """
+    name = (filename or getattr(file, "name", "") or "").lower()
+    if name.endswith(".csv"):
+        yield from pd.read_csv(file, chunksize=chunk_rows)
+        return
 
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        batch = []
+        for row in rows:
+            if all(v is None or v == "" for v in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_rows:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        wb.close()
+
+# VALIDASI MUSIM DAN BUAT DATASET
+def _create_dataset(league_name: str, season: str) -> Dataset:
     # validasi format musim
     pattern = r"^\d{4}/\d{4}$"
     if not re.match(pattern, season):
@@ -45,85 +223,135 @@ def insert_dataset_and_players(league_name: str, season: str, df: pd.DataFrame)
     )
     if not created:
         ds.players.all().delete()
+        ds.cluster_runs.all().delete()
+    return ds
 
-    bulk = []
-    for _, row in df.iterrows():
-        player = get_required(row, cols, "player", as_str=True)
-        team = get_required(row, cols, "team", as_str=True)
-        nat = get_required(row, cols, "nationality", as_str=True)
-        pos  = get_required(row, cols, "position", as_str=True)
-        age  = get_required(row, cols, "age")
-        app  = get_required(row, cols, "appearance")
-        total_minute  = get_required(row, cols, "total minute")
-        total_goal  = get_required(row, cols, "total goal")
-        goal_pg = get_required(row, cols, "goal/game")
-        shot_pg = get_required(row, cols, "shot/game")
-        sot_pg = get_required(row, cols, "sot/game")
-        assist = get_required(row, cols, "assist")
-        assist_pg = get_required(row, cols, "assist/game")
-        dribble_pg = get_required(row, cols, "successful dribble/game")
-        keypass_pg = get_required(row, cols, "key pass/game")
-        pass_pg = get_required(row, cols, "successful pass/game")
-        longball_pg = get_required(row, cols, "long ball/game")
-        crossing_pg = get_required(row, cols, "successful crossing/game")
-        ballrecovered_pg = get_required(row, cols, "ball recovered/game")
-        dribbledpast_pg = get_required(row, cols, "dribbled past/game")
-        clearance_pg = get_required(row, cols, "clearance/game")
-        error = get_required(row, cols, "error leading to shot")
-        error_pg = get_required(row, cols, "error leading to shot/game")
-        totalduel_pg = get_required(row, cols, "total duel won/game")
-        aerialduel_pg = get_required(row, cols, "aerial duel won/game")
-
-        bulk.append(
-            Player(
-                dataset=ds,
-                player=player,
-                team=team, 
-                nationality=nat, 
-                position=pos,
-                age=age,
-                appearance=app,
-                total_minute=total_minute,
-                total_goal=total_goal,
-                goal_per_game=goal_pg,
-                shot_per_game=shot_pg,
-                sot_per_game=sot_pg,
-                assist=assist,
-                assist_per_game=assist_pg,
-                successful_dribble_per_game=dribble_pg,
-                key_pass_per_game=keypass_pg,
-                successful_pass_per_game=pass_pg,
-                long_ball_per_game=longball_pg,
-                successful_crossing_per_game=crossing_pg,
-                ball_recovered_per_game=ballrecovered_pg,
-                dribbled_past_per_game=dribbledpast_pg,
-                clearance_per_game=clearance_pg,
-                error=error,
-                error_per_game=error_pg,
-                total_duel_per_game=totalduel_pg,
-                aerial_duel_per_game=aerialduel_pg
-            )
-        )
+def _get_dataset_for_append(league_name: str, season: str) -> Dataset:
+    ds = Dataset.objects.filter(season=season.strip()).first()
+    if ds is None:
+        raise ValidationError(f"Data untuk {league_name} musim {season} belum ada.")
+    return ds
+
+def _new_rows(table: dict, seen: set) -> dict:
+    """
+    Buang baris yang pemainnya (nama + tim) sudah ada di dataset atau sudah
+    muncul di chunk sebelumnya. seen diperbarui di tempat.
+    """
+    keys = [(str(p).lower(), str(t).lower()) for p, t in zip(table["player"], table["team"])]
+    keep = np.zeros(len(keys), dtype=bool)
+    for i, key in enumerate(keys):
+        if key not in seen:
+            seen.add(key)
+            keep[i] = True
+    return {field: values[keep] for field, values in table.items()}
+
+def _existing_keys(ds: Dataset) -> set:
+    return {(str(p).lower(), str(t).lower()) for p, t in ds.players.values_list("player", "team")}
+
+def _refresh_feature_cache(season: str) -> None:
+    """Buang cache fitur musim sekarang, tulis ulang (paksa) setelah transaksi commit."""
+    from .clustering import rebuild_feature_cache  # import lokal: clustering -> neighbors -> services
+    invalidate_feature_cache(season)
+    transaction.on_commit(lambda: rebuild_feature_cache(season))
+
+def _finish_append(ds: Dataset, since_id: int) -> None:
+    """Assign pemain baru ke cluster tersimpan; uploaded_at diperbarui (versi data/ETag API)."""
+    from .clustering import append_to_cluster_runs  # import lokal: clustering -> neighbors -> services
+    append_to_cluster_runs(ds, since_id)
+    Dataset.objects.filter(pk=ds.pk).update(uploaded_at=timezone.now())
+
+# POST DATASET KE DATABASE
+@profiled
+@transaction.atomic
+def insert_dataset_and_players(league_name: str, season: str, df: pd.DataFrame, loader: str = "auto",
+                               append: bool = False) -> int:
+    """
+    append=True: musim harus sudah ada; hanya pemain baru (nama + tim) yang
+    disimpan, lalu di-assign ke cluster tersimpan (lihat append_to_cluster_runs).
+    """
+    if not append:
+        ds = _create_dataset(league_name, season)
+        _load_players(ds, _player_table(df), loader=loader)
+        _index_positions(ds)
+        _refresh_feature_cache(ds.season)
+        return ds.id
 
-    if bulk:
-        Player.objects.bulk_create(bulk, batch_size=1000)
+    ds = _get_dataset_for_append(league_name, season)
+    since_id = ds.players.aggregate(Max("id"))["id__max"] or 0
+    table = _new_rows(_player_table(df), _existing_keys(ds))
+    if len(table["player"]):
+        _load_players(ds, table, loader=loader)
+        _index_positions(ds, since_id)
+        _refresh_feature_cache(ds.season)
+        _finish_append(ds, since_id)
     return ds.id
 
+# POST DATASET KE DATABASE PER CHUNK (UNTUK FILE BESAR)
+@profiled
+@transaction.atomic
+def insert_dataset_and_players_stream(league_name: str, season: str, chunks: Iterable[pd.DataFrame], loader: str = "auto",
+                                      append: bool = False) -> int:
+    """
+    Sama seperti insert_dataset_and_players, tapi menerima iterator chunk
+    (misal dari iter_upload_chunks). Tiap chunk divalidasi dan ditulis
+    begitu dibaca, semuanya dalam satu transaksi.
+    """
+    since_id = 0
+    if append:
+        ds = _get_dataset_for_append(league_name, season)
+        since_id = ds.players.aggregate(Max("id"))["id__max"] or 0
+        seen = _existing_keys(ds)
+    else:
+        ds = _create_dataset(league_name, season)
+    cols = None
+    row_offset = 0
+    inserted = 0
+    for chunk in chunks:
+        if cols is None:
+            cols = _resolve_columns(chunk.columns)
+        table = _player_table(chunk, cols, row_offset)
+        if append:
+            table = _new_rows(table, seen)
+        _load_players(ds, table, loader=loader)
+        inserted += len(table["player"])
+        row_offset += len(chunk)
+    if inserted:
+        _index_positions(ds, since_id)
+    if inserted or not append:
+        _refresh_feature_cache(ds.season)
+    if append and inserted:
+        _finish_append(ds, since_id)
+    return ds.id
+
+# VERSI DATA (untuk kunci cache & ETag)
+@profiled
+def get_data_version() -> str:
+    """Berubah setiap ada dataset diunggah, ditambah (append), atau dihapus."""
+    agg = Dataset.objects.aggregate(n=Count("id"), last_id=Max("id"), last=Max("uploaded_at"))
+    return f"{agg['n']}:{agg['last_id']}:{agg['last']}"
+
+@profiled
+def get_dataset_version(season: str) -> str | None:
+    """Versi dataset satu musim (id + uploaded_at); None jika musim tidak ada."""
+    row = Dataset.objects.filter(season=season).values_list("id", "uploaded_at").first()
+    return f"{row[0]}:{row[1]}" if row else None
+
 # BACA DAFTAR MUSIM
+@profiled
 def get_seasons() -> List[str]:
     return list(
         Dataset.objects.values_list("season", flat=True).distinct().order_by("season")
     )
 
 # BACA DAFTAR PEMAIN
+@profiled
+@timed("players_by_season")
 def get_players_by_season(season: str, position: str) -> List[str]:
+    """Pemain yang string posisinya memuat kode posisi (lewat index PlayerPosition (dataset, code))."""
     players = list(
-        Player.objects.filter(
-            dataset__season=season, 
-            position__icontains=position,
-        ).order_by("player").values_list("player", flat=True)
+        Player.objects.filter(positions__dataset__season=season, positions__code=str(position).strip().upper())
+        .order_by("player").values_list("player", flat=True)
     )
-    print(len(players))
     return players
 
 # DOWNLOAD TEMPLATE DATASET
@@ -164,6 +392,7 @@ def make_template_excel_bytes() -> bytes:
     return buf.getvalue()
 
 #BACA DATA PEMAIN ACUAN YANG DIPILIHS
+@profiled
 def get_player_detail(season: str, player_name: str) -> dict | None:
     """
     Ambil 1 baris detail pemain untuk musim tertentu. Return dict atau None.
@@ -185,23 +414,31 @@ def get_player_detail(season: str, player_name: str) -> dict | None:
     )
 
 #BACA DETAIL MUSIM YANG TERSIMPAN
+@profiled
 def get_list_of_dataset():
     """
     Kembalikan list dict: id, league_name, season, player_count, uploaded_at
     """
-    return list(
+    fields = ('id', 'league_name', 'season', 'player_count', 'uploaded_at')
+    rows = (
         Dataset.objects
         .annotate(player_count=Count('players'))
-        .values('id', 'league_name', 'season', 'player_count', 'uploaded_at')
         .order_by('-uploaded_at')
+        .values_list(*fields)
     )
+    return [dict(zip(fields, row)) for row in rows]
 
 #HAPUS MUSIM
+@profiled
 def delete_dataset(dataset_id: int) -> bool:
     """
     Hapus 1 data liga 
+    (ClusterRun milik dataset ikut terhapus lewat CASCADE, cache fitur musim dibuang)
     """
+    seasons = list(Dataset.objects.filter(id=dataset_id).values_list("season", flat=True))
     deleted, _ = Dataset.objects.filter(id=dataset_id).delete()
+    for season in seasons:
+        invalidate_feature_cache(season)
     return deleted > 0
 
 
@@ -0,0 +1,325 @@
+# players/sweep.py
+# Modul ini sengaja tidak mengimpor Django supaya bisa di-import
+# oleh worker ProcessPoolExecutor (start method forkserver maupun spawn).
+import multiprocessing
+import os
+import time
+from typing import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import MeanShift, estimate_bandwidth
+from sklearn.metrics import davies_bouldin_score, pairwise_distances
+from .meanshift import build_tree, mean_shift
+from .metrics import labels, observe, stage_timer
+
+# BATAS MATRIKS JARAK PENUH SEBELUM BERALIH KE SILHOUETTE SAMPEL
+SILHOUETTE_MAX_MATRIX_BYTES = 256 * 1024 ** 2
+SILHOUETTE_SAMPLE_SIZE = 2000
+SILHOUETTE_SEED = 0
+
+# FIT SATU BANDWIDTH
+def fit_bandwidth(Xs: np.ndarray, bw: float, engine: str = "sklearn", tree=None) -> dict:
+    """
+    engine "sklearn" memakai sklearn.cluster.MeanShift, "native" memakai
+    players.meanshift (tree hasil build_tree(Xs) dipakai ulang jika diberikan).
+    """
+    labels, centers, n_clusters, = None, None, 0
+    for bin_seed in [True]:
+        try:
+            if engine == "native":
+                labels, centers = mean_shift(Xs, float(bw), tree=tree)
+            else:
+                ms = MeanShift(bandwidth=float(bw), bin_seeding=bin_seed, cluster_all=True)
+                labels = ms.fit_predict(Xs)
+                centers = ms.cluster_centers_
+            n_clusters = len(np.unique(labels))
+            break
+        except ValueError:
+            raise Exception("Clustering gagal")
+
+    return {
+        "bw": float(bw),
+        "labels": labels,
+        "centers": centers,
+        "n_clusters": n_clusters,
+    }
+
+# =============================
+# EVALUASI SILHOUETTE DENGAN MATRIKS JARAK BERSAMA
+# =============================
+def silhouette_from_distances(D: np.ndarray, labels: np.ndarray) -> float:
+    """
+    Silhouette rata-rata dari matriks jarak yang sudah dihitung.
+    Jumlah jarak tiap titik ke tiap cluster didapat dari satu perkalian
+    D x one-hot (sparse), jadi biayanya O(n^2) per labelling tanpa
+    menghitung ulang jarak.
+    """
+    n = len(labels)
+    uniq, codes = np.unique(labels, return_inverse=True)
+    k = len(uniq)
+    if not 2 <= k <= n - 1:
+        raise ValueError(f"Jumlah label {k} tidak valid untuk silhouette (harus 2..{n - 1}).")
+
+    onehot = sparse.csr_matrix((np.ones(n), (codes, np.arange(n))), shape=(k, n))
+    sums = np.asarray(onehot @ D).T  # n x k: total jarak titik i ke cluster c
+    counts = np.bincount(codes, minlength=k).astype(float)
+    rows = np.arange(n)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        intra = sums[rows, codes] / (counts[codes] - 1)
+        means = sums / counts
+        means[rows, codes] = np.inf
+        inter = means.min(axis=1)
+        sil = (inter - intra) / np.maximum(intra, inter)
+    return float(np.mean(np.nan_to_num(sil)))
+
+class SilhouetteEvaluator:
+    """
+    Hitung matriks jarak Xs sekali (lazy), lalu skor semua kandidat label.
+    Jika matriks n x n melebihi max_matrix_bytes, silhouette diestimasi
+    dari sampel acak sample_size titik (seed tetap, sampel sama untuk semua kandidat).
+    """
+
+    def __init__(self, Xs: np.ndarray, max_matrix_bytes: int = SILHOUETTE_MAX_MATRIX_BYTES,
+                 sample_size: int = SILHOUETTE_SAMPLE_SIZE, seed: int = SILHOUETTE_SEED):
+        n = len(Xs)
+        self.Xs = Xs
+        self.sample_idx = None
+        if n * n * Xs.dtype.itemsize > max_matrix_bytes and sample_size < n:
+            rng = np.random.RandomState(seed)
+            self.sample_idx = np.sort(rng.choice(n, size=sample_size, replace=False))
+        self._distances = None
+
+    @property
+    def sampled(self) -> bool:
+        return self.sample_idx is not None
+
+    @property
+    def distances(self) -> np.ndarray:
+        if self._distances is None:
+            X = self.Xs if self.sample_idx is None else self.Xs[self.sample_idx]
+            with stage_timer("distance_matrix"):
+                self._distances = pairwise_distances(X)
+        return self._distances
+
+    def score(self, labels: np.ndarray) -> float:
+        labels = np.asarray(labels)
+        if self.sample_idx is not None:
+            labels = labels[self.sample_idx]
+        return silhouette_from_distances(self.distances, labels)
+
+# HITUNG SILHOUETTE DAN DBI SATU KANDIDAT
+def score_candidate(Xs: np.ndarray, result: dict, evaluator: SilhouetteEvaluator) -> dict:
+    labels, n_clusters = result["labels"], result["n_clusters"]
+    sil, dbi = None, None
+    if labels is not None and n_clusters >= 2:
+        try:
+            with stage_timer("silhouette", bandwidth=result["bw"]):
+                sil = evaluator.score(labels)
+        except Exception:
+            pass
+        try:
+            with stage_timer("davies_bouldin", bandwidth=result["bw"]):
+                dbi = float(davies_bouldin_score(Xs, labels))
+        except Exception:
+            pass
+    return {**result, "sil": sil, "dbi": dbi}
+
+# =============================
+# WORKER PROCESS POOL
+# =============================
+# Matriks dikirim sekali per worker lewat initializer pool (bukan per
+# bandwidth); satu pool bisa melayani beberapa kategori sekaligus (fit_groups).
+def fit_pool(n_jobs: int | None, n_tasks: int | None = None, initializer=None,
+             initargs=()) -> ProcessPoolExecutor | None:
+    """
+    Process pool untuk fit bandwidth, atau None jika n_jobs berarti serial.
+    Start method forkserver/spawn, bukan fork: proses induk (server, Streamlit)
+    punya thread lain, dan fork dari proses berthread tidak aman.
+    """
+    workers = _resolve_n_jobs(n_jobs, n_tasks)
+    if workers <= 1:
+        return None
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method),
+                               initializer=initializer, initargs=initargs)
+
+# STATE WORKER fit_groups: matriks per kategori (dari initializer) + tree native per kategori
+_worker_state = {}
+
+def _init_group_worker(matrices: dict, engine: str) -> None:
+    _worker_state.clear()
+    _worker_state.update(matrices=matrices, engine=engine, trees={})
+
+def _fit_group_worker(group: str, bw: float) -> tuple[dict, float]:
+    started = time.perf_counter()
+    Xs, engine = _worker_state["matrices"][group], _worker_state["engine"]
+    tree = None
+    if engine == "native":
+        tree = _worker_state["trees"].get(group)
+        if tree is None:
+            tree = _worker_state["trees"][group] = build_tree(Xs)
+    result = fit_bandwidth(Xs, bw, engine, tree)
+    return result, time.perf_counter() - started
+
+def _timed_fit(Xs: np.ndarray, bw: float, engine: str, tree) -> dict:
+    with stage_timer("meanshift_fit", bandwidth=float(bw)):
+        return fit_bandwidth(Xs, bw, engine, tree)
+
+def _resolve_n_jobs(n_jobs: int | None, n_tasks: int | None = None) -> int:
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    return max(1, n_jobs if n_tasks is None else min(n_jobs, n_tasks))
+
+def _fit_all(Xs: np.ndarray, bandwidths: list[float], n_jobs: int | None, engine: str,
+             progress: Callable[[float], None] | None = None) -> list[dict]:
+    single = (lambda _, bw: progress(bw)) if progress else None
+    return fit_groups({None: Xs}, bandwidths, n_jobs, engine, single)[None]
+
+# FIT SEMUA BANDWIDTH UNTUK BEBERAPA KATEGORI SEKALIGUS
+def fit_groups(matrices: dict, bandwidths, n_jobs: int | None = None, engine: str = "sklearn",
+               progress: Callable[[str, float], None] | None = None) -> dict:
+    """
+    matrices: {kategori: Xs} (kunci None = satu matriks tanpa label kategori).
+    Semua tugas (kategori x bandwidth) dikirim sekaligus ke satu process
+    pool, jadi kategori berjalan bersamaan.
+    Matriks dikirim sekali per worker (initializer pool), bukan per tugas;
+    tree native dibangun sekali per kategori di tiap worker.
+    progress(kategori, bw) dipanggil setiap satu bandwidth selesai di-fit.
+    Return {kategori: hasil fit (belum diskor) urut bandwidths}, identik
+    dengan hasil serial. Jika pool gagal, sisa tugas dijalankan serial.
+    """
+    bandwidths = [float(bw) for bw in bandwidths]
+    fits = {group: [] for group in matrices}
+    try:
+        pool = fit_pool(n_jobs, len(matrices) * len(bandwidths),
+                        initializer=_init_group_worker, initargs=(dict(matrices), engine))
+    except OSError:
+        pool = None
+    if pool is not None:
+        try:
+            futures = [(g, pool.submit(_fit_group_worker, g, bw)) for g in matrices for bw in bandwidths]
+            for group, future in futures:
+                r, seconds = future.result()
+                with labels(group=group):
+                    observe("meanshift_fit", seconds, bandwidth=r["bw"])
+                fits[group].append(r)
+                if progress:
+                    progress(group, r["bw"])
+        except (OSError, BrokenProcessPool):
+            pass
+        finally:
+            pool.shutdown(cancel_futures=True)
+    for group, Xs in matrices.items():
+        todo = bandwidths[len(fits[group]):]
+        tree = build_tree(Xs) if todo and engine == "native" else None
+        for bw in todo:
+            with labels(group=group):
+                fits[group].append(_timed_fit(Xs, bw, engine, tree))
+            if progress:
+                progress(group, bw)
+    return fits
+
+# SWEEP SEMUA BANDWIDTH (SERIAL ATAU PARALEL)
+def sweep_bandwidths(Xs: np.ndarray, bandwidths, n_jobs: int | None = None,
+                     evaluator: SilhouetteEvaluator | None = None, engine: str = "sklearn",
+                     progress: Callable[[float], None] | None = None) -> list[dict]:
+    """
+    Fit MeanShift untuk setiap bandwidth lalu skor semua hasil dengan
+    satu SilhouetteEvaluator (matriks jarak dihitung sekali per grup).
+    n_jobs None/1 = serial, -1 = semua core, n > 1 = n worker proses untuk fitting.
+    progress(bw) dipanggil setiap satu bandwidth selesai di-fit.
+    Urutan hasil selalu sama dengan urutan bandwidths, sehingga hasil
+    paralel identik dengan hasil serial. Jika pool gagal dibuat, fallback ke serial.
+    """
+    bandwidths = [float(bw) for bw in bandwidths]
+    if evaluator is None:
+        evaluator = SilhouetteEvaluator(Xs)
+    fits = _fit_all(Xs, bandwidths, n_jobs, engine, progress)
+    return [score_candidate(Xs, r, evaluator) for r in fits]
+
+# =============================
+# PENCARIAN BANDWIDTH ADAPTIF
+# =============================
+def adaptive_sweep(Xs: np.ndarray, bandwidths, evaluator: SilhouetteEvaluator | None = None,
+                   seed_bw: float | None = None, engine: str = "sklearn",
+                   progress: Callable[[float], None] | None = None) -> list[dict]:
+    """
+    Cari bandwidth terbaik di grid tanpa fit semua kandidat.
+    - Mulai dari bandwidth grid terdekat dengan estimate_bandwidth(Xs).
+    - Naik/turun 2 langkah grid selama silhouette membaik (di tepi grid
+      dicoba 1 langkah), lalu perhalus: kedua tetangga 1 langkah selalu di-fit.
+    - Kandidat dipangkas: bandwidth di atas hasil < 2 cluster dan
+      bandwidth di bawah hasil 1 cluster per titik tidak di-fit.
+    Hasil (hanya bandwidth yang di-fit, urut bandwidth) berformat sama dengan sweep_bandwidths.
+    Pencarian berjalan serial karena tiap langkah bergantung pada langkah sebelumnya.
+    """
+    grid = sorted(float(bw) for bw in bandwidths)
+    n = len(Xs)
+    if evaluator is None:
+        evaluator = SilhouetteEvaluator(Xs)
+    if seed_bw is None:
+        seed_bw = estimate_bandwidth(Xs, quantile=0.3, n_samples=min(n, 1000), random_state=0)
+
+    tree = build_tree(Xs) if engine == "native" else None
+    done = {}
+
+    def run(i: int) -> dict:
+        if i not in done:
+            done[i] = score_candidate(Xs, _timed_fit(Xs, grid[i], engine, tree), evaluator)
+            if progress:
+                progress(grid[i])
+        return done[i]
+
+    def sil(i: int) -> float:
+        return -np.inf if done[i]["sil"] is None else done[i]["sil"]
+
+    def pruned(i: int) -> bool:
+        if not 0 <= i < len(grid):
+            return True
+        for j, r in done.items():
+            if r["n_clusters"] < 2 and i > j:
+                return True
+            if r["n_clusters"] >= n and i < j:
+                return True
+        return False
+
+    def climb(cur: int, step: int, directions) -> int:
+        for direction in directions:
+            moved = False
+            while True:
+                nxt = cur + direction * step
+                if pruned(nxt):
+                    # langkah 2 keluar grid / terpangkas: tetangga 1 langkah tetap dicoba
+                    nxt = cur + direction
+                    if step == 1 or pruned(nxt):
+                        break
+                run(nxt)
+                if sil(nxt) <= sil(cur):
+                    break
+                cur, moved = nxt, True
+            if moved:
+                break
+        return cur
+
+    def refine(cur: int) -> int:
+        """Selalu fit kedua tetangga (cur-1 dan cur+1), pindah ke yang terbaik selama membaik."""
+        while True:
+            neighbours = [i for i in (cur - 1, cur + 1) if not pruned(i)]
+            for i in neighbours:
+                run(i)
+            best = max(neighbours, key=sil, default=cur)
+            if sil(best) <= sil(cur):
+                return cur
+            cur = best
+
+    cur = int(np.argmin([abs(bw - seed_bw) for bw in grid]))
+    run(cur)
+    cur = climb(cur, 2, (1, -1))
+    cur = refine(cur)
+
+    return [done[i] for i in sorted(done)]
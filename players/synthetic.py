@@ -0,0 +1,126 @@
+# players/synthetic.py
+import numpy as np
+import pandas as pd
+from .services import PLAYER_COLUMNS
+
+POSITIONS = ["ST", "LW", "RW", "AM", "CM", "DM", "LM", "RM", "CB", "LB", "RB"]
+NATIONALITIES = ["Indonesia", "Brazil", "Japan", "Korea Republic", "Netherlands", "Argentina"]
+
+# POSISI KEDUA YANG WAJAR UNTUK TIAP POSISI UTAMA (mis. "DM, CM")
+SECONDARY_POSITIONS = {
+    "ST": ["LW", "RW", "AM"],
+    "LW": ["LM", "ST", "RW"],
+    "RW": ["RM", "ST", "LW"],
+    "AM": ["CM", "ST", "LW", "RW"],
+    "CM": ["DM", "AM"],
+    "DM": ["CM", "CB"],
+    "LM": ["LW", "LB", "CM"],
+    "RM": ["RW", "RB", "CM"],
+    "CB": ["DM", "RB", "LB"],
+    "LB": ["LM", "CB"],
+    "RB": ["RM", "CB"],
+}
+# PEMAIN PER POSISI TIDAK MERATA (BEK TENGAH & GELANDANG TENGAH PALING BANYAK)
+POSITION_WEIGHTS = np.array([10, 6, 6, 7, 13, 8, 5, 5, 18, 11, 11], dtype=float)
+ATTACKING_FEATURES = {
+    "total_goal", "goal_per_game", "shot_per_game", "sot_per_game",
+    "successful_dribble_per_game", "key_pass_per_game", "assist", "assist_per_game",
+}
+DEFENSIVE_FEATURES = {
+    "clearance_per_game", "ball_recovered_per_game", "aerial_duel_per_game", "total_duel_per_game",
+}
+
+# DATASET SINTETIS DENGAN FORMAT SAMA SEPERTI FILE UPLOAD
+def make_upload_df(n_rows: int, seed: int = 0, realistic: bool = False,
+                   multi_position: float = 0.3, missing: float = 0.01, inf: float = 0.002) -> pd.DataFrame:
+    """
+    Bangkitkan DataFrame berkolom sama dengan template upload
+    (nama kolom = kunci PLAYER_COLUMNS), deterministik untuk seed yang sama.
+    realistic=True: posisi ganda ("DM, CM") dengan porsi multi_position,
+    jumlah pemain per posisi tidak merata, statistik per game miring
+    (lognormal, banyak nol, bergantung posisi), sel kosong (NaN) dengan
+    porsi missing dan inf di kolom float dengan porsi inf.
+    """
+    rng = np.random.default_rng(seed)
+    positions = _positions(rng, n_rows, multi_position) if realistic else None
+    primary = np.array([p.split(",")[0] for p in positions]) if realistic else None
+    data = {}
+    for key, field, kind in PLAYER_COLUMNS:
+        if field == "player":
+            values = [f"Player {seed}-{i}" for i in range(n_rows)]
+        elif field == "team":
+            values = [f"Team {i}" for i in rng.integers(0, 18, n_rows)]
+        elif field == "nationality":
+            values = rng.choice(NATIONALITIES, n_rows, p=[0.7, 0.1, 0.05, 0.05, 0.05, 0.05])
+        elif field == "position":
+            values = positions if realistic else rng.choice(POSITIONS, n_rows)
+        elif not realistic:
+            values = rng.integers(0, 40, n_rows) if kind == "int" else np.round(rng.gamma(2.0, 0.8, n_rows), 2)
+        else:
+            values = _skewed_stat(rng, field, kind, primary)
+        data[key.title()] = values
+    df = pd.DataFrame(data)
+    if realistic:
+        _inject_invalid(rng, df, missing, inf)
+    return df
+
+def _positions(rng, n_rows: int, multi_position: float) -> np.ndarray:
+    main = rng.choice(POSITIONS, n_rows, p=POSITION_WEIGHTS / POSITION_WEIGHTS.sum())
+    out = main.astype(object)
+    multi = np.flatnonzero(rng.random(n_rows) < multi_position)
+    for i in multi:
+        extra = rng.choice(SECONDARY_POSITIONS[main[i]], size=rng.integers(1, 3), replace=False)
+        out[i] = ", ".join([main[i], *extra])
+    return out
+
+def _skewed_stat(rng, field: str, kind: str, primary: np.ndarray) -> np.ndarray:
+    """Statistik miring ke kanan; fitur menyerang tinggi untuk penyerang, bertahan untuk bek."""
+    n_rows = len(primary)
+    if field == "age":
+        return np.clip(np.round(rng.normal(26, 4, n_rows)), 16, 40).astype(np.int64)
+    if field == "appearance":
+        return rng.binomial(34, rng.beta(2, 1.5, n_rows))
+    if field == "total_minute":
+        return rng.integers(0, 91, n_rows) * rng.binomial(34, 0.6, n_rows)
+
+    scale = np.ones(n_rows)
+    if field in ATTACKING_FEATURES:
+        scale[np.isin(primary, ["ST", "LW", "RW", "AM"])] = 3.0
+        scale[np.isin(primary, ["CB", "LB", "RB"])] = 0.3
+    elif field in DEFENSIVE_FEATURES:
+        scale[np.isin(primary, ["CB", "LB", "RB", "DM"])] = 2.5
+    values = rng.lognormal(mean=-1.0, sigma=1.0, size=n_rows) * scale
+    values[rng.random(n_rows) < 0.25] = 0.0  # banyak pemain tanpa catatan
+    if kind == "int":
+        return np.round(values * 5).astype(np.int64)
+    return np.round(values, 2)
+
+def _inject_invalid(rng, df: pd.DataFrame, missing: float, inf: float) -> None:
+    """
+    Sel kosong (NaN) hanya di kolom teks yang boleh kosong (team, nationality,
+    position); kolom angka Player wajib terisi. inf (mis. hasil bagi 0 menit)
+    di kolom float.
+    """
+    for key, field, kind in PLAYER_COLUMNS:
+        col = key.title()
+        if kind == "str" and field != "player":
+            df[col] = df[col].where(rng.random(len(df)) >= missing)
+        elif kind == "float":
+            values = df[col].to_numpy(dtype=float, copy=True)
+            values[rng.random(len(df)) < inf] = np.inf
+            df[col] = values
+
+# LIGA SINTETIS BEBERAPA MUSIM
+def make_league(n_rows: int, n_seasons: int = 1, seed: int = 0, first_year: int = 1900,
+                **kwargs) -> list[tuple[str, pd.DataFrame]]:
+    """
+    Bagi n_rows pemain ke n_seasons musim ("1900/1901", ...), masing-masing dari
+    make_upload_df(realistic=True) dengan seed turunan. Return list (musim, DataFrame).
+    """
+    sizes = np.full(n_seasons, n_rows // n_seasons)
+    sizes[: n_rows % n_seasons] += 1
+    return [
+        (f"{first_year + i}/{first_year + i + 1}",
+         make_upload_df(int(size), seed=seed * 1000 + i, realistic=True, **kwargs))
+        for i, size in enumerate(sizes)
+    ]
@@ -1,3 +1,921 @@
-from django.test import TestCase
+import io
+import tempfile
+from pathlib import Path
+from unittest import skipUnless
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from sklearn.cluster import MeanShift
+from sklearn.datasets import make_blobs
+from sklearn.metrics import pairwise_distances, silhouette_score
+from sklearn.preprocessing import StandardScaler
+
+from players import metrics, profiling
+from players.bar_chart import build_comparison_chart
+from players.benchmarks import compare
+from players.clustering import (
+    BANDWIDTH_GRID, FEATURES_BY_POS, POS_GROUPS, ClusteringRequired, _feature_fingerprint, _feature_matrix,
+    _prepare_matrix, _run_groups, _select_group, get_cluster_results, get_player_features_df,
+    get_stored_cluster_results, run_meanshift, run_meanshift_by_position,
+)
+from players.columnar import fetch_columns
+from players.cross_season import blocked_top_k, get_cross_season_similar_players
+from players.feature_cache import read_feature_cache, write_feature_cache
+from players.jobs import submit_clustering_job
+from players.meanshift import build_tree, mean_shift
+from players.models import ClusteringJob, ClusterRun, Dataset, Player, PlayerNeighbor, PlayerPosition
+from players.neighbors import neighbor_frame
+from players.positions import group_masks, in_group, position_codes
+from players.recommend import (
+    _anchor_id, _group_for_position, _recommend_from_table, _recommend_live, get_recommend_similar_players_bulk,
+)
+from players.services import (
+    _player_table, delete_dataset, get_data_version, get_dataset_version, get_list_of_dataset, get_player_detail,
+    get_players_by_season, get_seasons, insert_dataset_and_players, insert_dataset_and_players_stream,
+    iter_upload_chunks,
+)
+from players.sweep import (
+    SilhouetteEvaluator, adaptive_sweep, fit_groups, silhouette_from_distances, sweep_bandwidths,
+)
+from players.synthetic import make_league, make_upload_df
+
+
+class NativeMeanShiftTests(SimpleTestCase):
+    def test_labels_match_sklearn(self):
+        rng = np.random.RandomState(0)
+        X = StandardScaler().fit_transform(rng.gamma(2.0, 1.0, size=(300, 9)))
+        tree = build_tree(X)
+        for bw in (1.5, 2.5, 3.5, 4.5):
+            ms = MeanShift(bandwidth=bw, bin_seeding=True, cluster_all=True).fit(X)
+            labels, centers = mean_shift(X, bw, tree=tree)
+            np.testing.assert_array_equal(labels, ms.labels_)
+            np.testing.assert_allclose(centers, ms.cluster_centers_)
+
+
+def _index_name(model, *fields):
+    return next(i.name for i in model._meta.indexes if tuple(i.fields) == fields)
+
+
+@skipUnless(connection.vendor == "postgresql", "Data sintetis (generate_series) & EXPLAIN khusus PostgreSQL")
+class PlayerIndexPlanTests(TestCase):
+    """EXPLAIN query utama di tabel Player sintetis 1 juta baris."""
+    ROWS = 1_000_000
+    N_DATASETS = 20
+    POSITIONS = ["ST", "LW", "RW", "AM", "CM", "DM, CM", "DM", "LM", "RM", "CB", "LB", "RB", "LWB", "RWB"]
+
+    @classmethod
+    def setUpTestData(cls):
+        Dataset.objects.bulk_create([
+            Dataset(league_name="Liga Sintetis", season=f"{2000 + i}/{2001 + i}") for i in range(cls.N_DATASETS)
+        ])
+        position = "(ARRAY[{}])[1 + g % {}]".format(
+            ", ".join(f"'{p}'" for p in cls.POSITIONS), len(cls.POSITIONS)
+        )
+        exprs = {
+            "dataset_id": "d.id",
+            "player": "'Player ' || g",
+            "team": "'Team ' || (g % 400)",
+            "nationality": "CASE WHEN g % 5 = 0 THEN 'Indonesia' ELSE 'Brazil' END",
+            "position": position,
+            "position_group_mask": "0",
+            "uploaded_at": "now()",
+        }
+        columns, values = [], []
+        for field in Player._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            columns.append(connection.ops.quote_name(field.column))
+            if field.attname in exprs:
+                values.append(exprs[field.attname])
+            elif field.get_internal_type() == "FloatField":
+                values.append("random() * 5")
+            else:
+                values.append("g % 40")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO players_player ({', '.join(columns)}) "
+                f"SELECT {', '.join(values)} FROM generate_series(0, {cls.ROWS - 1}) AS g "
+                f"JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS k FROM players_dataset) AS d "
+                f"ON d.k = g % {cls.N_DATASETS}"
+            )
+            cursor.execute(
+                "INSERT INTO players_playerposition (dataset_id, player_id, code) "
+                "SELECT dataset_id, id, code FROM players_player, "
+                "unnest(regexp_split_to_array(upper(position), '[^A-Z]+')) AS code WHERE code <> ''"
+            )
+            cursor.execute("ANALYZE players_player")
+            cursor.execute("ANALYZE players_playerposition")
+            cursor.execute("ANALYZE players_dataset")
+
+    def _plan(self, func, *args) -> str:
+        """Jalankan func, lalu EXPLAIN query terakhir yang dikirim ke database."""
+        with CaptureQueriesContext(connection) as ctx:
+            func(*args)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN " + ctx.captured_queries[-1]["sql"])
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_players_by_season_uses_position_code_index(self):
+        plan = self._plan(get_players_by_season, "2005/2006", "CM")
+        self.assertIn(_index_name(PlayerPosition, "dataset", "code"), plan)
+        self.assertNotIn("Seq Scan on players_player", plan)
+
+    def test_player_detail_uses_dataset_player_index(self):
+        plan = self._plan(get_player_detail, "2005/2006", "Player 105")
+        self.assertIn(_index_name(Player, "dataset", "player"), plan)
+        self.assertNotIn("Seq Scan on players_player", plan)
+
+
+class ApiETagTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(league_name="Liga 1 Indonesia", season="2024/2025")
+        Player.objects.create(dataset=cls.dataset, player="Pemain A", team="Tim A",
+                              nationality="Indonesia", position="CM")
+
+    def test_unchanged_data_returns_304(self):
+        first = self.client.get("/api/seasons/")
+        self.assertEqual(first.json(), {"seasons": ["2024/2025"]})
+        again = self.client.get("/api/seasons/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_etag_changes_with_dataset_version(self):
+        params = {"season": "2024/2025", "player": "Pemain A"}
+        first = self.client.get("/api/players/detail/", params)
+        self.assertEqual(first.json()["player"]["team"], "Tim A")
+        Dataset.objects.filter(pk=self.dataset.pk).update(uploaded_at=timezone.now())
+        again = self.client.get("/api/players/detail/", params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again["ETag"], first["ETag"])
+
+    def test_missing_parameters_and_unknown_season(self):
+        self.assertEqual(self.client.get("/api/players/").status_code, 400)
+        self.assertEqual(self.client.get("/api/players/", {"season": "1999/2000", "position": "CM"}).status_code, 404)
+
+
+@override_settings(FEATURE_CACHE_DIR=None)
+class StoredClusterEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(60, seed=0))
+        cls.anchor = get_players_by_season("2024/2025", "CM")[0]
+
+    def test_get_without_stored_run_points_to_job_and_never_fits(self):
+        for url, params in [
+            ("/api/clusters/", {"season": "2024/2025"}),
+            ("/api/recommendations/", {"season": "2024/2025", "position": "CM", "player": self.anchor}),
+            ("/api/recommendations/", {"season": "2024/2025", "position": "CM", "player": self.anchor,
+                                       "top_n": 50}),
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 409)
+            self.assertEqual(response.json()["job"], "/api/jobs/clustering/")
+            self.assertFalse(response.has_header("ETag"))
+            self.assertFalse(response.has_header("Last-Modified"))
+        self.assertFalse(ClusterRun.objects.filter(dataset__season="2024/2025").exists())
+        self.assertFalse(PlayerNeighbor.objects.filter(dataset__season="2024/2025").exists())
+
+    def test_get_serves_stored_run(self):
+        get_cluster_results("2024/2025")
+        runs = ClusterRun.objects.count()
+        self.assertEqual(self.client.get("/api/clusters/", {"season": "2024/2025"}).status_code, 200)
+        recs = self.client.get("/api/recommendations/",
+                               {"season": "2024/2025", "position": "CM", "player": self.anchor})
+        self.assertEqual(recs.status_code, 200)
+        self.assertEqual(ClusterRun.objects.count(), runs)
+
+    def test_etag_follows_cluster_state(self):
+        params = {"season": "2024/2025", "position": "CM", "player": self.anchor}
+        get_cluster_results("2024/2025")
+        first = self.client.get("/api/recommendations/", params)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first.has_header("Last-Modified"))
+        same = self.client.get("/api/recommendations/", params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(same.status_code, 304)
+        # run ditandai usang tanpa perubahan Dataset: ETag lama tidak berlaku lagi
+        run = ClusterRun.objects.filter(dataset__season="2024/2025").first()
+        run.stale = True
+        run.save()
+        again = self.client.get("/api/recommendations/", params, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 200)
+        self.assertNotEqual(again["ETag"], first["ETag"])
+
+    def test_anchor_resolved_through_player_index(self):
+        get_cluster_results("2024/2025")
+        dataset = Dataset.objects.get(season="2024/2025")
+        anchor = Player.objects.get(dataset=dataset, player=self.anchor)
+        self.assertEqual(_anchor_id(dataset, "Pemain Gelandang", self.anchor), anchor.pk)
+        self.assertEqual(_anchor_id(dataset, "Pemain Gelandang", self.anchor.upper()), anchor.pk)
+        self.assertIsNone(_anchor_id(dataset, "Pemain Gelandang", "Tidak Ada"))
+        with CaptureQueriesContext(connection) as ctx:
+            _anchor_id(dataset, "Pemain Gelandang", self.anchor)
+        self.assertNotIn("UPPER", " ".join(q["sql"] for q in ctx.captured_queries))
+
+
+class ClusteringJobSubmitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dataset = Dataset.objects.create(league_name="Liga 1 Indonesia", season="2024/2025")
+        Player.objects.create(dataset=cls.dataset, player="Pemain A", team="Tim A",
+                              nationality="Indonesia", position="CM")
+
+    def test_identical_active_job_is_reused(self):
+        first = submit_clustering_job("2024/2025")
+        self.assertEqual(submit_clustering_job("2024/2025").pk, first.pk)
+        upgraded = submit_clustering_job("2024/2025", refresh=True)
+        self.assertEqual(upgraded.pk, first.pk)
+        self.assertTrue(upgraded.refresh)
+        self.assertEqual(ClusteringJob.objects.filter(status=ClusteringJob.QUEUED).count(), 1)
+        self.assertTrue(ClusteringJob.objects.get(pk=first.pk).refresh)
+
+    def test_refresh_joins_running_job(self):
+        first = submit_clustering_job("2024/2025")
+        ClusteringJob.objects.filter(pk=first.pk).update(status=ClusteringJob.RUNNING)
+        joined = submit_clustering_job("2024/2025", refresh=True)
+        self.assertEqual(joined.pk, first.pk)
+        self.assertFalse(ClusteringJob.objects.get(pk=first.pk).refresh)
+
+    def test_finished_job_allows_new_submit(self):
+        first = submit_clustering_job("2024/2025")
+        ClusteringJob.objects.filter(pk=first.pk).update(status=ClusteringJob.DONE)
+        self.assertNotEqual(submit_clustering_job("2024/2025").pk, first.pk)
+
+    def test_fingerprint_is_dataset_version(self):
+        with CaptureQueriesContext(connection) as ctx:
+            first = submit_clustering_job("2024/2025")
+        self.assertEqual(first.fingerprint, get_dataset_version("2024/2025"))
+        self.assertFalse(any("players_player" in q["sql"] for q in ctx.captured_queries))
+        # append memperbarui uploaded_at: data baru mendapat job baru
+        Dataset.objects.filter(pk=self.dataset.pk).update(uploaded_at=timezone.now())
+        self.assertNotEqual(submit_clustering_job("2024/2025").pk, first.pk)
+
+    def test_unknown_season_rejected(self):
+        response = self.client.post("/api/jobs/clustering/", {"season": "1999/2000"})
+        self.assertEqual(response.status_code, 404)
+
+
+class FacetChartTests(SimpleTestCase):
+    def test_comparison_is_one_spec_with_one_dataset(self):
+        features = ["age", "assist", "total_goal"]
+        long_df = pd.DataFrame({
+            "Fitur": features * 2,
+            "Pemain": ["A"] * 3 + ["B"] * 3,
+            "Nilai": [25, 3, 10, 28, 1, 4],
+        })
+        spec = build_comparison_chart(long_df, features, {"age": "Age"}).to_dict()
+        self.assertEqual(len(spec["datasets"]), 1)
+        self.assertEqual(spec["facet"]["sort"], ["Age", "assist", "total_goal"])
+        self.assertEqual(spec["resolve"]["scale"]["y"], "independent")
+
+
+class SyntheticLeagueTests(SimpleTestCase):
+    def test_realistic_upload_is_seeded_and_messy(self):
+        df = make_upload_df(5_000, seed=3, realistic=True)
+        self.assertTrue(df.equals(make_upload_df(5_000, seed=3, realistic=True)))
+        self.assertTrue(df["Position"].str.contains(", ", na=False).any())
+        self.assertTrue(df["Team"].isna().any())
+        self.assertTrue(np.isinf(df["Goal/Game"]).any())
+        self.assertGreater(df["Shot/Game"].replace(np.inf, np.nan).skew(), 1)
+
+    def test_league_splits_rows_over_seasons(self):
+        league = make_league(1_001, n_seasons=3, seed=1)
+        self.assertEqual([season for season, _ in league], ["1900/1901", "1901/1902", "1902/1903"])
+        self.assertEqual(sum(len(df) for _, df in league), 1_001)
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    def test_regression_needs_relative_and_absolute_slowdown(self):
+        baseline = {"results": [
+            {"name": "a", "rows": 10, "seconds": 1.0},
+            {"name": "b", "rows": 10, "seconds": 0.001},
+            {"name": "c", "rows": 10, "seconds": 1.0},
+        ]}
+        current = {"results": [
+            {"name": "a", "rows": 10, "seconds": 1.5},
+            {"name": "b", "rows": 10, "seconds": 0.003},  # 3x, tapi hanya 2 ms
+            {"name": "d", "rows": 10, "seconds": 1.0},
+        ]}
+        status = {r["name"]: r["status"] for r in compare(current, baseline, tolerance=0.2, min_delta=0.005)}
+        self.assertEqual(status, {"a": "regression", "b": "ok", "c": "missing", "d": "new"})
+
+
+class StageMetricsTests(SimpleTestCase):
+    def setUp(self):
+        metrics.snapshot(reset=True)
+        self.addCleanup(metrics.configure, False)
+        self.addCleanup(metrics.snapshot, True)
+
+    def test_disabled_timers_record_nothing(self):
+        metrics.configure(False)
+        with metrics.stage_timer("prepare_matrix"):
+            pass
+        self.assertEqual(metrics.timed("recommend")(lambda: 42)(), 42)
+        self.assertEqual(metrics.snapshot(), [])
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    def test_histogram_rendered_in_prometheus_text_format(self):
+        metrics.configure(True)
+        with metrics.labels(group="Forward"):
+            metrics.observe("meanshift_fit", 0.3, bandwidth=1.5)
+            metrics.observe("meanshift_fit", 100.0, bandwidth=1.5)
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        text = response.content.decode()
+        labels = 'stage="meanshift_fit",bandwidth="1.5",group="Forward"'
+        self.assertIn(f'iprs_stage_seconds_bucket{{{labels},le="0.25"}} 0', text)
+        self.assertIn(f'iprs_stage_seconds_bucket{{{labels},le="0.5"}} 1', text)
+        self.assertIn(f'iprs_stage_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f"iprs_stage_seconds_count{{{labels}}} 2", text)
+        self.assertIn(f"iprs_stage_seconds_sum{{{labels}}} 100.300000", text)
+
+
+class QueryBudgetTests(TestCase):
+    """Jumlah query per panggilan tidak boleh tumbuh dengan jumlah dataset/pemain (N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            dataset = Dataset.objects.create(league_name="Liga 1 Indonesia", season=f"{2020 + i}/{2021 + i}")
+            players = Player.objects.bulk_create([
+                Player(dataset=dataset, player=f"Pemain {j}", team="Tim A", nationality="Indonesia", position="CM")
+                for j in range(5)
+            ])
+            PlayerPosition.objects.bulk_create([
+                PlayerPosition(dataset=dataset, player=player, code="CM") for player in players
+            ])
+
+    def assertQueryBudget(self, budget: int, func, *args):
+        with profiling.capture() as calls:
+            func(*args)
+        self.assertEqual(calls[-1]["function"], func.__name__)
+        self.assertLessEqual(calls[-1]["queries"], budget, calls[-1]["slowest"])
+
+    def test_service_query_budgets(self):
+        self.assertQueryBudget(1, get_list_of_dataset)
+        self.assertQueryBudget(1, get_seasons)
+        self.assertQueryBudget(1, get_data_version)
+        self.assertQueryBudget(1, get_players_by_season, "2021/2022", "CM")
+        self.assertQueryBudget(1, get_player_detail, "2021/2022", "Pemain 0")
+
+    @override_settings(FEATURE_CACHE_DIR=None)
+    def test_feature_frame_query_budget(self):
+        self.assertQueryBudget(2, get_player_features_df, "2021/2022")
+
+    def test_disabled_profiler_records_nothing(self):
+        profiling.reset()
+        self.addCleanup(profiling.reset)
+        get_list_of_dataset()
+        self.assertEqual(profiling.report(), [])
+
+
+class BlockedTopKTests(SimpleTestCase):
+    def test_matches_full_sort_across_blocks(self):
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(1_000, 6)).astype(np.float32)
+        q = X[7]
+        allowed = rng.random(1_000) < 0.5
+        idx, sims = blocked_top_k(X, q, 10, allowed, block_rows=64)
+        expected = np.flatnonzero(allowed)[np.argsort(-(X[allowed] @ q))[:10]]
+        self.assertEqual(idx.tolist(), expected.tolist())
+        self.assertTrue(np.all(np.diff(sims) <= 0))
+
+    def test_fewer_allowed_rows_than_k(self):
+        X = np.eye(4, dtype=np.float32)
+        idx, _ = blocked_top_k(X, X[0], 3, np.array([False, True, False, False]), block_rows=2)
+        self.assertEqual(idx.tolist(), [1])
+
+
+@override_settings(FEATURE_CACHE_DIR=None)
+class CrossSeasonSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i, league in enumerate(["Liga 1 Indonesia", "Liga 1 Indonesia", "Liga 2 Indonesia"]):
+            df = make_upload_df(200, seed=i, realistic=True, missing=0, inf=0)
+            df["Player"] = [f"Pemain {j}" for j in range(len(df))]  # nama sama di tiap musim
+            insert_dataset_and_players(league, f"{2020 + i}/{2021 + i}", df)
+        cls.anchor = get_players_by_season("2022/2023", "CM")[0]
+
+    def test_searches_other_seasons_with_filters(self):
+        recs = get_cross_season_similar_players("2022/2023", "CM", self.anchor, top_n=10)
+        self.assertEqual(len(recs), 10)
+        self.assertGreater(recs["season"].nunique(), 1)
+        self.assertNotIn(self.anchor, set(recs["player"]))
+        self.assertTrue(recs["similarity"].is_monotonic_decreasing)
+
+        only = get_cross_season_similar_players("2022/2023", "CM", self.anchor, top_n=10,
+                                                seasons=["2020/2021"], only_indonesian=True)
+        self.assertEqual(set(only["season"]), {"2020/2021"})
+        self.assertEqual(set(only["nationality"]), {"Indonesia"})
+        league = get_cross_season_similar_players("2022/2023", "CM", self.anchor, leagues=["Liga 2 Indonesia"])
+        self.assertEqual(set(league["season"]), {"2022/2023"})
+
+    def test_same_player_history_is_opt_in(self):
+        recs = get_cross_season_similar_players("2022/2023", "CM", self.anchor, top_n=600,
+                                                include_same_player=True)
+        self.assertIn(self.anchor, set(recs["player"]))
+        self.assertTrue(get_cross_season_similar_players("2022/2023", "CM", "Tidak Ada").empty)
+
+
+class FeatureCacheAppendTests(TestCase):
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        override = override_settings(FEATURE_CACHE_DIR=folder.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        with self.captureOnCommitCallbacks(execute=True):
+            insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(50, seed=0))
+
+    def test_cache_written_before_append_commit_is_rejected(self):
+        old_version = get_dataset_version("2024/2025")
+        stale = get_player_features_df("2024/2025")
+        self.assertEqual(len(stale), 50)
+        with self.captureOnCommitCallbacks(execute=False):
+            insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(10, seed=1), append=True)
+        # pembaca lain sempat menulis ulang cache dari data sebelum append
+        write_feature_cache("2024/2025", stale, old_version)
+        self.assertEqual(len(get_player_features_df("2024/2025")), 60)
+
+    def test_append_commit_rebuilds_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(10, seed=1), append=True)
+        cached = read_feature_cache("2024/2025", get_dataset_version("2024/2025"))
+        self.assertEqual(len(cached), 60)
+
+
+def _group_matrix(n_rows: int, seed: int, group: str) -> np.ndarray:
+    """Matriks terstandarisasi satu kategori posisi dari dataset sintetis (tanpa database)."""
+    table = pd.DataFrame(_player_table(make_upload_df(n_rows, seed=seed, realistic=True, missing=0, inf=0)))
+    df = table[in_group(table["position_group_mask"].to_numpy(), group)]
+    return _prepare_matrix(df, FEATURES_BY_POS[group])[0]
+
+def _best_bw(results) -> float | None:
+    scored = [r for r in results if r["sil"] is not None]
+    return max(scored, key=lambda r: r["sil"])["bw"] if scored else None
+
+
+class FeatureFingerprintTests(SimpleTestCase):
+    def test_row_order_does_not_change_fingerprint(self):
+        df = pd.DataFrame(_player_table(make_upload_df(50, seed=0)))
+        df.insert(0, "id", np.arange(1, len(df) + 1))
+        shuffled = df.sample(frac=1, random_state=0).reset_index(drop=True)
+        self.assertEqual(_feature_fingerprint(shuffled), _feature_fingerprint(df))
+        changed = df.copy()
+        changed.loc[0, FEATURES_BY_POS["Pemain Bertahan"][0]] += 1
+        self.assertNotEqual(_feature_fingerprint(changed), _feature_fingerprint(df))
+
+
+class SilhouetteEvaluatorTests(SimpleTestCase):
+    def setUp(self):
+        self.X, self.labels = make_blobs(n_samples=600, centers=4, n_features=5, random_state=0)
+
+    def test_matches_sklearn_silhouette(self):
+        D = pairwise_distances(self.X)
+        singleton = self.labels.copy()
+        singleton[0] = 9  # cluster berisi satu titik: silhouette titik itu 0 (sama dengan sklearn)
+        noisy = np.random.default_rng(0).integers(0, 3, len(self.X))
+        for labels in (self.labels, singleton, noisy):
+            self.assertAlmostEqual(silhouette_from_distances(D, labels), silhouette_score(self.X, labels), places=10)
+        self.assertAlmostEqual(SilhouetteEvaluator(self.X).score(self.labels),
+                               silhouette_score(self.X, self.labels), places=10)
+        with self.assertRaises(ValueError):
+            silhouette_from_distances(D, np.zeros(len(self.X), dtype=int))
+
+    def test_sampled_above_matrix_limit(self):
+        limit = len(self.X) ** 2 * self.X.dtype.itemsize - 1
+        evaluator = SilhouetteEvaluator(self.X, max_matrix_bytes=limit, sample_size=200, seed=3)
+        self.assertTrue(evaluator.sampled)
+        self.assertEqual(evaluator.distances.shape, (200, 200))
+        idx = evaluator.sample_idx
+        self.assertAlmostEqual(evaluator.score(self.labels), silhouette_score(self.X[idx], self.labels[idx]), places=10)
+        self.assertAlmostEqual(evaluator.score(self.labels), silhouette_score(self.X, self.labels), delta=0.05)
+        again = SilhouetteEvaluator(self.X, max_matrix_bytes=limit, sample_size=200, seed=3)
+        np.testing.assert_array_equal(again.sample_idx, idx)
+        self.assertFalse(SilhouetteEvaluator(self.X, max_matrix_bytes=limit + 1).sampled)
+
+
+class BandwidthSweepTests(SimpleTestCase):
+    def test_adaptive_finds_grid_best(self):
+        for seed in (0, 1):
+            for group in FEATURES_BY_POS:
+                with self.subTest(seed=seed, group=group):
+                    Xs = _group_matrix(800, seed, group)
+                    evaluator = SilhouetteEvaluator(Xs)
+                    full = sweep_bandwidths(Xs, BANDWIDTH_GRID, evaluator=evaluator)
+                    self.assertEqual(_best_bw(adaptive_sweep(Xs, BANDWIDTH_GRID, evaluator=evaluator)),
+                                     _best_bw(full))
+
+    def test_adaptive_fits_fewer_bandwidths_and_agrees_with_grid(self):
+        grid = np.arange(0.5, 5.5, 0.5)
+        for seed in (0, 1, 2):
+            with self.subTest(seed=seed):
+                X, _ = make_blobs(n_samples=300, centers=4, n_features=6, cluster_std=1.5, random_state=seed)
+                Xs = StandardScaler().fit_transform(X)
+                evaluator = SilhouetteEvaluator(Xs)
+                full = sweep_bandwidths(Xs, grid, evaluator=evaluator)
+                adaptive = adaptive_sweep(Xs, grid, evaluator=evaluator)
+                self.assertLess(len(adaptive), len(full))
+                by_bw = {r["bw"]: r for r in full}
+                self.assertEqual([r["bw"] for r in adaptive], sorted(r["bw"] for r in adaptive))
+                for r in adaptive:
+                    np.testing.assert_array_equal(r["labels"], by_bw[r["bw"]]["labels"])
+                    self.assertEqual(r["sil"], by_bw[r["bw"]]["sil"])
+                self.assertEqual(_best_bw(adaptive), _best_bw(full))
+
+    def test_parallel_sweep_matches_serial(self):
+        rng = np.random.RandomState(5)
+        Xs = StandardScaler().fit_transform(rng.gamma(2.0, 1.0, size=(300, 9)))
+        bandwidths = np.arange(0.5, 5.5, 0.5)
+        serial = sweep_bandwidths(Xs, bandwidths, n_jobs=1)
+        parallel = sweep_bandwidths(Xs, bandwidths, n_jobs=2)
+        self.assertEqual([r["bw"] for r in parallel], [r["bw"] for r in serial])
+        for p, s in zip(parallel, serial):
+            with self.subTest(bw=s["bw"]):
+                np.testing.assert_array_equal(p["labels"], s["labels"])
+                self.assertEqual(p["sil"], s["sil"])
+                self.assertEqual(p["dbi"], s["dbi"])
+
+    def test_shared_pool_across_groups_matches_serial(self):
+        table = pd.DataFrame(_player_table(make_upload_df(300, seed=2, realistic=True, missing=0, inf=0)))
+        serial = _run_groups(table, FEATURES_BY_POS, n_jobs=1)
+        pooled = _run_groups(table, FEATURES_BY_POS, n_jobs=2)
+        for group in FEATURES_BY_POS:
+            with self.subTest(group=group):
+                pd.testing.assert_frame_equal(pooled[group]["res_table"], serial[group]["res_table"])
+                np.testing.assert_array_equal(pooled[group]["best_sil"]["labels"], serial[group]["best_sil"]["labels"])
+
+    def test_fit_groups_matches_serial_native(self):
+        rng = np.random.RandomState(6)
+        matrices = {g: StandardScaler().fit_transform(rng.gamma(2.0, 1.0, size=(150 + 50 * i, 9)))
+                    for i, g in enumerate(POS_GROUPS)}
+        done = []
+        fits = fit_groups(matrices, BANDWIDTH_GRID, n_jobs=2, engine="native", progress=lambda g, bw: done.append(g))
+        self.assertEqual(len(done), len(POS_GROUPS) * len(BANDWIDTH_GRID))
+        for group, Xs in matrices.items():
+            serial = sweep_bandwidths(Xs, BANDWIDTH_GRID, n_jobs=1, engine="native")
+            with self.subTest(group=group):
+                self.assertEqual([r["bw"] for r in fits[group]], [r["bw"] for r in serial])
+                for f, r in zip(fits[group], serial):
+                    np.testing.assert_array_equal(f["labels"], r["labels"])
+
+
+@override_settings(FEATURE_CACHE_DIR=None)
+class ClusterRunStoreTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(90, seed=0))
+
+    def _runs(self) -> dict:
+        return dict(ClusterRun.objects.filter(dataset__season="2024/2025").values_list("group", "fingerprint"))
+
+    def test_stored_run_reused_without_refit(self):
+        first = get_cluster_results("2024/2025")
+        self.assertEqual(set(self._runs()), {group for group, res in first.items() if res})
+        with CaptureQueriesContext(connection) as ctx:
+            again = get_cluster_results("2024/2025")
+        writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith(("INSERT", "UPDATE", "DELETE"))]
+        self.assertEqual(writes, [])
+        for group, res in first.items():
+            with self.subTest(group=group):
+                np.testing.assert_array_equal(again[group]["best_sil"]["labels"], res["best_sil"]["labels"])
+                np.testing.assert_allclose(again[group]["pca"], res["pca"])
+                np.testing.assert_allclose(again[group]["Xs"], res["Xs"])
+                pd.testing.assert_frame_equal(again[group]["res_table"], res["res_table"], check_dtype=False)
+
+    def test_changed_data_refits_and_delete_removes_runs(self):
+        get_cluster_results("2024/2025")
+        before = self._runs()
+        Player.objects.filter(dataset__season="2024/2025").update(goal_per_game=F("goal_per_game") + 1)
+        get_cluster_results("2024/2025")
+        after = self._runs()
+        self.assertEqual(set(after), set(before))
+        for group in before:
+            self.assertNotEqual(after[group], before[group])
+        delete_dataset(Dataset.objects.get(season="2024/2025").id)
+        self.assertEqual(self._runs(), {})
+
+
+@override_settings(FEATURE_CACHE_DIR=None)
+class PositionGroupRunTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(120, seed=2))
+
+    def test_group_runs_match_single_group_runs(self):
+        df_all = get_player_features_df("2024/2025")
+        results = run_meanshift_by_position("2024/2025", n_jobs=2)
+        self.assertEqual(set(results), set(POS_GROUPS))
+        for group in POS_GROUPS:
+            with self.subTest(group=group):
+                serial = run_meanshift(_select_group(df_all, group), FEATURES_BY_POS[group])
+                pd.testing.assert_frame_equal(results[group]["res_table"], serial["res_table"])
+                np.testing.assert_array_equal(results[group]["best_sil"]["labels"], serial["best_sil"]["labels"])
+                self.assertGreater(results[group]["elapsed"], 0)
+
+
+class PlayerIngestTests(TestCase):
+    def test_columns_resolved_once_and_coerced(self):
+        df = make_upload_df(4, seed=1)
+        df.columns = [f" {c.upper()} " if i % 2 else c for i, c in enumerate(df.columns)]
+        df = df.astype({df.columns[4]: object})
+        df.iloc[0, 1] = None            # Team kosong
+        df.iloc[1, 4] = "31.0"          # Age sebagai teks
+        df.iloc[3, 0] = "  Pemain Spasi "
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", df)
+        rows = {p.player: p for p in Player.objects.filter(dataset__season="2024/2025")}
+        self.assertEqual(len(rows), 4)
+        first, second = (rows[name] for name in df.iloc[:2, 0])
+        self.assertIsNone(first.team)
+        self.assertEqual(second.age, 31)
+        self.assertIn("Pemain Spasi", rows)
+        self.assertAlmostEqual(first.shot_per_game, float(df.iloc[0, 9]))
+
+    def test_missing_column_and_non_numeric_value_rejected(self):
+        with self.assertRaisesMessage(KeyError, "Kolom assist harus ada di dataset."):
+            insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(3).drop(columns="Assist"))
+        df = make_upload_df(3).astype({"Age": object})
+        df.loc[1, "Age"] = "dua puluh"
+        with self.assertRaisesMessage(ValueError, "Kolom age harus berisi angka (baris 3: 'dua puluh')"):
+            insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", df)
+        self.assertFalse(Dataset.objects.filter(season="2024/2025").exists())
+
+
+class PlayerLoaderTests(TestCase):
+    @skipUnless(connection.vendor == "postgresql", "COPY FROM STDIN khusus PostgreSQL")
+    def test_copy_and_bulk_create_store_same_rows(self):
+        df = make_upload_df(50, seed=3)
+        df.loc[0, "Team"] = None
+        df.loc[1, "Player"] = 'Pemain "Koma", Satu'
+        fields = [f.attname for f in Player._meta.concrete_fields if f.attname not in ("id", "dataset_id", "uploaded_at")]
+        rows = {}
+        for loader, season in (("copy", "2023/2024"), ("bulk_create", "2024/2025")):
+            insert_dataset_and_players("Liga 1 Indonesia", season, df, loader=loader)
+            rows[loader] = list(Player.objects.filter(dataset__season=season).order_by("player").values_list(*fields))
+        self.assertEqual(len(rows["copy"]), 50)
+        self.assertEqual(rows["copy"], rows["bulk_create"])
+
+    def test_unknown_loader_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Loader csv tidak dikenal."):
+            insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(3), loader="csv")
+        self.assertFalse(Dataset.objects.filter(season="2024/2025").exists())
+
+
+class PositionIndexTests(TestCase):
+    def test_group_mask_matches_substring_rule(self):
+        positions = ["DM, CM", "CM", "LWB", "GK", "st", "AM,LW", "", None, "RB, RWB"]
+        masks = group_masks(positions)
+        for group, group_codes in POS_GROUPS.items():
+            expected = [any(c in str(p).upper().replace(" ", "") for c in group_codes) for p in positions]
+            with self.subTest(group=group):
+                self.assertEqual(in_group(masks, group).tolist(), expected)
+
+    def test_players_by_season_matches_position_tokens(self):
+        df = make_upload_df(4, seed=0)
+        df["Player"] = ["Pemain A", "Pemain B", "Pemain C", "Pemain D"]
+        df["Position"] = ["DM, CM", "CM", "LWB", "GK"]
+        insert_dataset_and_players("Liga 1 Indonesia", "1990/1991", df)
+        self.assertEqual(get_players_by_season("1990/1991", "cm"), ["Pemain A", "Pemain B"])
+        self.assertEqual(get_players_by_season("1990/1991", "DM"), ["Pemain A"])
+        self.assertEqual(get_players_by_season("1990/1991", "LW"), [])
+        self.assertEqual(get_players_by_season("1990/1991", "lwb"), ["Pemain C"])
+        self.assertEqual(get_players_by_season("1990/1991", "GK"), ["Pemain D"])
+        self.assertEqual(get_players_by_season("1990/1991", "CF"), [])
+
+    def test_position_codes_keep_every_token(self):
+        codes = position_codes([1, 2, 3, 4], ["DM, CM", "GK", None, "lwb/ cf"])
+        self.assertEqual(list(codes.itertuples(index=False, name=None)),
+                         [(1, "CM"), (1, "DM"), (2, "GK"), (4, "CF"), (4, "LWB")])
+
+
+class ColumnarFetchTests(TestCase):
+    def test_typed_columns_match_values_query(self):
+        df = make_upload_df(30, seed=8)
+        df.loc[3, "Team"] = None
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", df)
+        qs = Player.objects.filter(dataset__season="2024/2025").order_by("player")
+        fields = ["id", "player", "team", "age", "goal_per_game"]
+        frame = fetch_columns(qs, fields, categorical=["team"])
+        self.assertEqual(frame["id"].dtype, np.int64)
+        self.assertEqual(frame["age"].dtype, np.int64)
+        self.assertEqual(frame["goal_per_game"].dtype, np.float64)
+        self.assertIsInstance(frame["team"].dtype, pd.CategoricalDtype)
+        expected = pd.DataFrame(list(qs.values(*fields)))
+        pd.testing.assert_frame_equal(frame.astype({"team": object}), expected, check_dtype=False)
+
+
+class FeatureCacheTests(TestCase):
+    def setUp(self):
+        self.folder = folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        override = override_settings(FEATURE_CACHE_DIR=folder.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(50, seed=3))
+
+    def test_cached_frame_matches_database(self):
+        self.assertIsNone(read_feature_cache("2024/2025"))
+        df = get_player_features_df("2024/2025")
+        write_feature_cache("2024/2025", df)
+        cached = read_feature_cache("2024/2025")
+        pd.testing.assert_frame_equal(cached, df)
+        self.assertFalse(cached["age"].to_numpy().flags.writeable)  # memory-map read-only, bukan salinan
+        pd.testing.assert_frame_equal(get_player_features_df("2024/2025"), df)
+
+    def test_failed_swap_is_logged_and_cleaned_up(self):
+        root = Path(self.folder.name)
+        (root / "2024-2025").write_text("bukan folder cache")  # os.replace folder -> file gagal
+        with self.assertLogs("players.feature_cache", level="WARNING"):
+            write_feature_cache("2024/2025", get_player_features_df("2024/2025"))
+        self.assertEqual([p.name for p in root.iterdir()], ["2024-2025"])
+        self.assertIsNone(read_feature_cache("2024/2025"))
+
+    def test_delete_invalidates_cache(self):
+        write_feature_cache("2024/2025", get_player_features_df("2024/2025"))
+        delete_dataset(Dataset.objects.get(season="2024/2025").id)
+        self.assertIsNone(read_feature_cache("2024/2025"))
+
+
+@override_settings(FEATURE_CACHE_DIR=None)
+class NeighborTableTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(400, seed=4))
+        cls.results = get_cluster_results("2024/2025")
+
+    def test_table_matches_live_recommender(self):
+        for code in ("ST", "CM", "CB"):
+            for anchor in get_players_by_season("2024/2025", code)[:5]:
+                for only_indonesian in (False, True):
+                    for filter_position in (False, True):
+                        args = ("2024/2025", _group_for_position(code), anchor, 10, only_indonesian, filter_position)
+                        with self.subTest(code=code, anchor=anchor, indo=only_indonesian, pos=filter_position):
+                            table, live = _recommend_from_table(*args), _recommend_live(*args)
+                            if live.empty:
+                                # jalur live mengosongkan hasil bila tinggal satu kandidat
+                                self.assertLessEqual(len(table), 1)
+                                continue
+                            self.assertEqual(table["id"].tolist(), live["id"].tolist())
+                            np.testing.assert_allclose(table["similarity"], live["similarity"])
+
+    def test_bulk_matches_per_anchor_live(self):
+        anchors = [(code, name) for code in ("ST", "CM", "CB") for name in get_players_by_season("2024/2025", code)[:5]]
+        anchors.append(("CM", "Tidak Ada"))
+        for only_indonesian in (False, True):
+            for filter_position in (False, True):
+                bulk = get_recommend_similar_players_bulk("2024/2025", anchors, top_n=7, only_indonesian=only_indonesian,
+                                                          filter_position=filter_position)
+                for code, name in anchors:
+                    with self.subTest(code=code, anchor=name, indo=only_indonesian, pos=filter_position):
+                        live = _recommend_live("2024/2025", _group_for_position(code), name, 7,
+                                               only_indonesian, filter_position)
+                        rows = bulk[(bulk["anchor_player"] == name) & (bulk["position_code"] == code)]
+                        if live.empty:
+                            self.assertLessEqual(len(rows), 1)
+                            continue
+                        self.assertEqual(rows["id"].tolist(), live["id"].tolist())
+                        np.testing.assert_allclose(rows["similarity"], live["similarity"])
+                        self.assertEqual(rows["rank"].tolist(), list(range(1, len(live) + 1)))
+
+    def test_row_blocks_do_not_change_table(self):
+        res = self.results["Pemain Gelandang"]
+        whole = neighbor_frame(res)
+        blocked = neighbor_frame(res, block_cells=500)
+        pd.testing.assert_frame_equal(blocked.drop(columns="similarity"), whole.drop(columns="similarity"))
+        np.testing.assert_allclose(blocked["similarity"], whole["similarity"])
+
+
+@override_settings(FEATURE_CACHE_DIR=None)
+class ClusterAppendTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", make_upload_df(300, seed=6))
+        get_cluster_results("2024/2025")
+        cls.dataset = Dataset.objects.get(season="2024/2025")
+        cls.since_id = Player.objects.filter(dataset=cls.dataset).latest("id").id
+
+    def _append(self, n_rows: int):
+        df = make_upload_df(n_rows, seed=7)
+        df["Player"] = [f"Pemain Baru {i}" for i in range(n_rows)]
+        insert_dataset_and_players("Liga 1 Indonesia", "2024/2025", df, append=True)
+
+    def test_appended_players_assigned_to_nearest_mode(self):
+        before = {r.group: r for r in ClusterRun.objects.filter(dataset=self.dataset)}
+        self._append(30)
+        df_all = get_player_features_df("2024/2025")
+        fingerprint = _feature_fingerprint(df_all)
+        for run in ClusterRun.objects.filter(dataset=self.dataset):
+            with self.subTest(group=run.group):
+                old = before[run.group]
+                df_pos = _select_group(df_all, run.group)
+                df_new = df_pos[df_pos["id"] > self.since_id]
+                self.assertEqual(run.fingerprint, fingerprint)
+                self.assertEqual(run.player_ids, [*old.player_ids, *df_new["id"].tolist()])
+                self.assertEqual(run.n_appended, len(df_new))
+                self.assertEqual(run.stale, len(df_new) > 0)
+                self.assertEqual(len(run.best_sil["labels"]), len(run.player_ids))
+                self.assertEqual(run.best_sil["labels"][:len(old.player_ids)], old.best_sil["labels"])
+                Xs_new = ((_feature_matrix(df_new, FEATURES_BY_POS[run.group]) - run.scaler_mean)
+                          / run.scaler_scale)
+                nearest = pairwise_distances(Xs_new, np.asarray(run.cluster_centers)).argmin(axis=1)
+                self.assertEqual(run.best_sil["labels"][len(old.player_ids):], nearest.tolist())
+                self.assertEqual(
+                    PlayerNeighbor.objects.filter(group=run.group, anchor_id__in=df_new["id"].tolist())
+                    .values("anchor_id").distinct().count(),
+                    len(df_new),
+                )
+
+    def test_drift_above_threshold_refits(self):
+        self._append(30)
+        drift = max(r.drift for r in ClusterRun.objects.filter(dataset=self.dataset))
+        self.assertGreater(drift, 0)
+        with override_settings(CLUSTERING_DRIFT_THRESHOLD=drift):
+            get_cluster_results("2024/2025")
+            self.assertTrue(ClusterRun.objects.filter(dataset=self.dataset, stale=True).exists())
+        before = {r.group: r.drift for r in ClusterRun.objects.filter(dataset=self.dataset)}
+        with override_settings(CLUSTERING_DRIFT_THRESHOLD=drift / 2):
+            get_cluster_results("2024/2025")
+        for run in ClusterRun.objects.filter(dataset=self.dataset):
+            with self.subTest(group=run.group):
+                self.assertEqual(run.drift, 0 if before[run.group] > drift / 2 else before[run.group])
+
+    def test_drift_above_threshold_stops_serving_neighbor_table(self):
+        self._append(30)
+        run = max(ClusterRun.objects.filter(dataset=self.dataset), key=lambda r: r.drift)
+        anchor = Player.objects.get(pk=run.player_ids[0]).player
+        args = ("2024/2025", run.group, anchor, 5, False, False)
+        with override_settings(CLUSTERING_DRIFT_THRESHOLD=run.drift):
+            self.assertFalse(_recommend_from_table(*args, fit=False).empty)
+        with override_settings(CLUSTERING_DRIFT_THRESHOLD=run.drift / 2):
+            with self.assertRaises(ClusteringRequired):
+                get_stored_cluster_results("2024/2025")
+            with self.assertRaises(ClusteringRequired):
+                _recommend_from_table(*args, fit=False)
+            refit = _recommend_from_table(*args)
+        self.assertFalse(refit.empty)
+        self.assertEqual(ClusterRun.objects.get(pk=run.pk).drift, 0)
+
+
+def _upload_file(df: pd.DataFrame, name: str) -> io.BytesIO:
+    """File upload kecil di memori (.csv atau .xlsx), seperti UploadedFile Streamlit."""
+    buf = io.BytesIO()
+    if name.endswith(".csv"):
+        df.to_csv(buf, index=False)
+    else:
+        df.to_excel(buf, index=False)
+    buf.seek(0)
+    buf.name = name
+    return buf
+
+
+@override_settings(FEATURE_CACHE_DIR=None)
+class StreamingIngestTests(TestCase):
+    def setUp(self):
+        self.df = make_upload_df(12, seed=0)
+
+    def test_chunks_csv_and_xlsx(self):
+        with_blank = pd.concat([self.df.iloc[:6], self.df.iloc[:1].map(lambda _: None), self.df.iloc[6:]])
+        for name, df in (("data.csv", self.df), ("data.xlsx", with_blank)):
+            with self.subTest(name=name):
+                chunks = list(iter_upload_chunks(_upload_file(df, name), chunk_rows=5))
+                self.assertEqual([len(c) for c in chunks], [5, 5, 2])  # baris kosong xlsx dilewati
+                read = pd.concat(chunks, ignore_index=True)
+                self.assertEqual(read["Player"].tolist(), self.df["Player"].tolist())
+                self.assertEqual(read["Age"].astype(int).tolist(), self.df["Age"].tolist())
+
+    def test_chunks_stored_in_one_dataset(self):
+        insert_dataset_and_players_stream(
+            "Liga 1 Indonesia", "1990/1991", iter_upload_chunks(_upload_file(self.df, "data.xlsx"), chunk_rows=5),
+        )
+        players = Player.objects.filter(dataset__season="1990/1991")
+        self.assertEqual(sorted(players.values_list("player", flat=True)), sorted(self.df["Player"]))
+
+    def test_append_skips_existing_and_repeated_players(self):
+        insert_dataset_and_players_stream(
+            "Liga 1 Indonesia", "1990/1991", iter_upload_chunks(_upload_file(self.df, "data.csv"), chunk_rows=5),
+        )
+        new = make_upload_df(3, seed=1)
+        new["Player"] = ["Pemain Baru A", "Pemain Baru B", "Pemain Baru C"]
+        existing = self.df.iloc[:4].assign(Player=self.df["Player"].iloc[:4].str.upper())
+        upload = pd.concat([existing, new, new.iloc[:1]], ignore_index=True)
+        insert_dataset_and_players_stream(
+            "Liga 1 Indonesia", "1990/1991", iter_upload_chunks(_upload_file(upload, "tambah.xlsx"), chunk_rows=3),
+            append=True,
+        )
+        players = Player.objects.filter(dataset__season="1990/1991")
+        self.assertEqual(players.count(), 15)
+        self.assertEqual(players.filter(player__startswith="Pemain Baru").count(), 3)
+
+    def test_non_numeric_value_rejected_and_rolled_back(self):
+        df = self.df.astype({"Age": object})
+        df.loc[7, "Age"] = "dua puluh"
+        with self.assertRaisesMessage(ValueError, "Kolom age harus berisi angka (baris 9: 'dua puluh')"):
+            insert_dataset_and_players_stream(
+                "Liga 1 Indonesia", "1990/1991", iter_upload_chunks(_upload_file(df, "data.csv"), chunk_rows=5),
+            )
+        self.assertFalse(Dataset.objects.filter(season="1990/1991").exists())
@@ -0,0 +1,16 @@
+from django.urls import path
+
+from . import views
+
+app_name = "players"
+
+urlpatterns = [
+    path("seasons/", views.seasons, name="seasons"),
+    path("players/", views.players, name="players"),
+    path("players/detail/", views.player_detail, name="player-detail"),
+    path("clusters/", views.clusters, name="clusters"),
+    path("recommendations/", views.recommendations, name="recommendations"),
+    path("recommendations/cross-season/", views.cross_season_recommendations, name="cross-season-recommendations"),
+    path("jobs/clustering/", views.submit_job, name="submit-job"),
+    path("jobs/<int:job_id>/", views.job_status, name="job-status"),
+]
@@ -1,3 +1,284 @@
-from django.shortcuts import render
+import hashlib
+import json
+from functools import wraps
+import numpy as np
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
+from django.db.models import Count, Max, Q
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_GET, require_POST
 
-# Create your views here.
+from . import metrics
+from .clustering import ClusteringRequired, get_stored_cluster_results
+from .cross_season import get_cross_season_similar_players
+from .jobs import submit_clustering_job
+from .models import ClusterRun, ClusteringJob, Dataset
+from .recommend import get_recommend_similar_players
+from .services import (
+    get_data_version, get_dataset_version, get_player_detail, get_players_by_season, get_seasons,
+)
+
+# =============================
+# JSON API (hanya baca)
+# =============================
+# Respons 200 membawa ETag dari versi data (id + uploaded_at Dataset), ditambah
+# versi hasil clustering untuk endpoint cluster & rekomendasi; klien yang
+# mengirim If-None-Match yang sama mendapat 304 tanpa query berat. Respons
+# error (400/404/409) tidak membawa validator supaya tidak di-cache.
+
+def _etag(*parts) -> str:
+    return hashlib.sha1(":".join(str(p) for p in parts).encode()).hexdigest()
+
+def _seasons_etag(request, *args, **kwargs):
+    return _etag(get_data_version())
+
+def _all_seasons_etag(request, *args, **kwargs):
+    return _etag(get_data_version(), request.get_full_path())
+
+def _season_etag(request, *args, **kwargs):
+    version = get_dataset_version(request.GET.get("season", ""))
+    if version is None:
+        return None
+    return _etag(version, request.get_full_path())
+
+def _cluster_state(season: str) -> dict:
+    """Versi ClusterRun musim: updated_at & id terakhir, jumlah run, jumlah run usang."""
+    return ClusterRun.objects.filter(dataset__season=season).aggregate(
+        last=Max("updated_at"), last_id=Max("id"), n=Count("id"), stale=Count("id", filter=Q(stale=True)),
+    )
+
+def _cluster_etag(request, *args, **kwargs):
+    season = request.GET.get("season", "")
+    version = get_dataset_version(season)
+    if version is None:
+        return None
+    state = _cluster_state(season)
+    return _etag(version, state["last"], state["last_id"], state["n"], state["stale"], request.get_full_path())
+
+def _cluster_last_modified(request, *args, **kwargs):
+    season = request.GET.get("season", "")
+    uploaded = Dataset.objects.filter(season=season).values_list("uploaded_at", flat=True).first()
+    if uploaded is None:
+        return None
+    last = _cluster_state(season)["last"]
+    return max(uploaded, last) if last else uploaded
+
+def _validated(etag_func, last_modified_func=None):
+    """condition() yang validatornya hanya dikirim pada respons 200 (dan 304)."""
+    def decorator(view):
+        conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                for header in ("ETag", "Last-Modified"):
+                    if response.has_header(header):
+                        del response[header]
+            return response
+        return inner
+    return decorator
+
+def _error(message: str, status: int) -> JsonResponse:
+    return JsonResponse({"error": message}, status=status)
+
+def _clustering_required(error: ClusteringRequired) -> JsonResponse:
+    """GET tidak pernah menjalankan clustering: arahkan klien ke endpoint job."""
+    return JsonResponse({"error": str(error), "job": reverse("players:submit-job")}, status=409)
+
+def _required(request, *names):
+    values = [request.GET.get(name, "").strip() for name in names]
+    missing = [name for name, value in zip(names, values) if not value]
+    return values, missing
+
+def _flag(request, name: str) -> bool:
+    return request.GET.get(name, "").strip().lower() in ("1", "true", "yes")
+
+def _list(request, name: str) -> list[str]:
+    """Parameter berulang (?seasons=a&seasons=b) atau dipisah koma."""
+    return [v.strip() for raw in request.GET.getlist(name) for v in raw.split(",") if v.strip()]
+
+def _top_n(request):
+    """(top_n, pesan error)."""
+    try:
+        top_n = int(request.GET.get("top_n", 5))
+    except ValueError:
+        return None, "Parameter top_n harus berupa angka."
+    if not 1 <= top_n <= 100:
+        return None, "Parameter top_n harus antara 1 dan 100."
+    return top_n, None
+
+def _records(df: pd.DataFrame) -> list[dict]:
+    """DataFrame -> list dict yang aman untuk JSON (NaN -> null, tipe NumPy -> Python)."""
+    df = df.astype(object).where(df.notna(), None)
+    return [{k: (v.item() if isinstance(v, np.generic) else v) for k, v in row.items()}
+            for row in df.to_dict("records")]
+
+# DAFTAR MUSIM
+@require_GET
+@_validated(_seasons_etag)
+def seasons(request):
+    return JsonResponse({"seasons": get_seasons()})
+
+# DAFTAR PEMAIN PER MUSIM & POSISI
+@require_GET
+@_validated(_season_etag)
+def players(request):
+    (season, position), missing = _required(request, "season", "position")
+    if missing:
+        return _error(f"Parameter {', '.join(missing)} wajib diisi.", 400)
+    if not Dataset.objects.filter(season=season).exists():
+        return _error(f"Musim {season} tidak ditemukan.", 404)
+    return JsonResponse({"season": season, "position": position,
+                         "players": get_players_by_season(season, position)})
+
+# DETAIL PEMAIN
+@require_GET
+@_validated(_season_etag)
+def player_detail(request):
+    (season, player), missing = _required(request, "season", "player")
+    if missing:
+        return _error(f"Parameter {', '.join(missing)} wajib diisi.", 400)
+    detail = get_player_detail(season, player)
+    if detail is None:
+        return _error(f"Pemain {player} tidak ditemukan di musim {season}.", 404)
+    return JsonResponse({"season": season, "player": detail})
+
+# RINGKASAN HASIL CLUSTERING PER KATEGORI POSISI
+def _cluster_summary(res, run: ClusterRun | None) -> dict | None:
+    if not res:
+        return None
+    best = res["best_sil"]
+    labels, counts = np.unique(best["labels"], return_counts=True) if best else ([], [])
+    return {
+        "players": len(res["meta"]),
+        "bandwidth": best["bw"] if best else None,
+        "n_clusters": int(best["n_clusters"]) if best else 0,
+        "silhouette": best["sil"] if best else None,
+        "dbi": best["dbi"] if best else None,
+        "cluster_sizes": {str(int(l)): int(c) for l, c in zip(labels, counts)},
+        "evaluation": _records(res["res_table"]),
+        "stale": bool(run and run.stale),
+    }
+
+@require_GET
+@_validated(_cluster_etag, _cluster_last_modified)
+def clusters(request):
+    (season,), missing = _required(request, "season")
+    if missing:
+        return _error("Parameter season wajib diisi.", 400)
+    if not Dataset.objects.filter(season=season).exists():
+        return _error(f"Musim {season} tidak ditemukan.", 404)
+    try:
+        results = get_stored_cluster_results(season)
+    except ClusteringRequired as e:
+        return _clustering_required(e)
+    runs = {r.group: r for r in ClusterRun.objects.filter(dataset__season=season).only("group", "stale")}
+    return JsonResponse({
+        "season": season,
+        "groups": {group: _cluster_summary(res, runs.get(group)) for group, res in results.items()},
+    })
+
+# REKOMENDASI PEMAIN TERMIRIP
+@require_GET
+@_validated(_cluster_etag, _cluster_last_modified)
+def recommendations(request):
+    (season, position, player), missing = _required(request, "season", "position", "player")
+    if missing:
+        return _error(f"Parameter {', '.join(missing)} wajib diisi.", 400)
+    top_n, problem = _top_n(request)
+    if problem:
+        return _error(problem, 400)
+    try:
+        recs = get_recommend_similar_players(
+            season, position, player, top_n=top_n,
+            only_indonesian=_flag(request, "only_indonesian"),
+            filter_position=_flag(request, "filter_position"),
+            fit=False,
+        )
+    except ClusteringRequired as e:
+        return _clustering_required(e)
+    except ValueError as ve:
+        return _error(str(ve), 400)
+    return JsonResponse({"season": season, "position": position, "player": player,
+                         "recommendations": _records(recs)})
+
+# REKOMENDASI LINTAS MUSIM (players.cross_season)
+@require_GET
+@_validated(_all_seasons_etag)
+def cross_season_recommendations(request):
+    """Seperti recommendations, plus filter seasons & leagues (berulang atau dipisah koma)."""
+    (season, position, player), missing = _required(request, "season", "position", "player")
+    if missing:
+        return _error(f"Parameter {', '.join(missing)} wajib diisi.", 400)
+    top_n, problem = _top_n(request)
+    if problem:
+        return _error(problem, 400)
+    try:
+        recs = get_cross_season_similar_players(
+            season, position, player, top_n=top_n,
+            seasons=_list(request, "seasons"), leagues=_list(request, "leagues"),
+            only_indonesian=_flag(request, "only_indonesian"),
+            filter_position=_flag(request, "filter_position"),
+            include_same_player=_flag(request, "include_same_player"),
+        )
+    except ValueError as ve:
+        return _error(str(ve), 400)
+    return JsonResponse({"season": season, "position": position, "player": player,
+                         "recommendations": _records(recs)})
+
+# =============================
+# JOB CLUSTERING ASINKRON (view async, dilayani lewat iprs/asgi.py)
+# =============================
+def _job_json(job: ClusteringJob) -> dict:
+    return {
+        "id": job.pk,
+        "season": job.dataset.season,
+        "status": job.status,
+        "refresh": job.refresh,
+        "progress": job.progress,
+        "error": job.error or None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+@csrf_exempt
+@require_POST
+async def submit_job(request):
+    """Body form atau JSON: season, refresh (opsional). Job aktif untuk data yang sama dipakai ulang."""
+    data = request.POST
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return _error("Body JSON tidak valid.", 400)
+    season = str(data.get("season", "")).strip()
+    if not season:
+        return _error("Parameter season wajib diisi.", 400)
+    refresh = str(data.get("refresh", "")).strip().lower() in ("1", "true", "yes")
+    try:
+        job = await sync_to_async(submit_clustering_job)(season, refresh)
+    except ValueError as ve:
+        return _error(str(ve), 404)
+    job = await ClusteringJob.objects.select_related("dataset").aget(pk=job.pk)
+    return JsonResponse({"job": _job_json(job)}, status=202)
+
+@require_GET
+async def job_status(request, job_id: int):
+    job = await ClusteringJob.objects.select_related("dataset").filter(pk=job_id).afirst()
+    if job is None:
+        return _error(f"Job {job_id} tidak ditemukan.", 404)
+    return JsonResponse({"job": _job_json(job)})
+
+# =============================
+# METRIK (FORMAT TEKS PROMETHEUS)
+# =============================
+@require_GET
+def metrics_view(request):
+    """Histogram durasi tahap (players.metrics); 404 jika METRICS_ENABLED nonaktif."""
+    if not metrics.is_enabled():
+        raise Http404("Metrik nonaktif.")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
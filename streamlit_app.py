@@ -1,13 +1,14 @@
 # streamlit_app.py
-import os, sys, datetime as dt
+import functools, logging, os, sys, time, datetime as dt
 import pandas as pd
 import streamlit as st
 from django.core.exceptions import ValidationError
 import matplotlib.pyplot as plt
 import numpy as np
-import altair as alt
 
-from players.bar_chart import BarDataMissing, build_cluster_feature_bar_df, get_features_for_group
+from players.bar_chart import (
+    BarDataMissing, build_cluster_feature_bar_df, build_cluster_feature_chart, build_comparison_chart, get_features_for_group
+)
 
 # === INIT DJANGO
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,14 +17,55 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "iprs.settings")
 import django
 django.setup()
 
-from players.clustering import FEATURE_LABELS, FEATURES_BY_POS, get_player_features_df, run_meanshift, run_meanshift_by_position
+from django.conf import settings
+from players import profiling
+from players.jobs import submit_clustering_job
+from players.models import ClusteringJob
+from players.clustering import FEATURE_LABELS, FEATURES_BY_POS, get_cluster_results, get_player_features_df, run_meanshift
 from players.services import (
-    delete_dataset, get_list_of_dataset, get_player_detail, insert_dataset_and_players, get_seasons, get_players_by_season, make_template_excel_bytes
+    delete_dataset, get_data_version, get_dataset_version, get_list_of_dataset, get_player_detail,
+    insert_dataset_and_players_stream, iter_upload_chunks, get_seasons, get_players_by_season, make_template_excel_bytes
 )
+from players.cross_season import get_cross_season_similar_players
 from players.recommend import FEATURES_TO_COMPARE, get_recommend_similar_players, prepare_comparison_long_df
 
 st.set_page_config(page_title="IPRS", layout="wide")
 
+# ====== CACHE LINTAS SESI ======
+# Dipakai bersama oleh semua sesi. Argumen version (get_data_version /
+# get_dataset_version) ikut jadi kunci, jadi upload, append, atau hapus data
+# otomatis membuat entri lama tidak terpakai; clear_data_cache() membuangnya.
+@st.cache_data(show_spinner=False)
+def cached_seasons(version: str):
+    return get_seasons()
+
+@st.cache_data(show_spinner=False)
+def cached_list_of_dataset(version: str):
+    return get_list_of_dataset()
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cached_players_by_season(version: str, season: str, position: str):
+    return get_players_by_season(season, position)
+
+@st.cache_data(show_spinner=False, max_entries=1024)
+def cached_player_detail(version: str, season: str, player: str):
+    return get_player_detail(season, player)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_cluster_results(season: str, dataset_version: str):
+    return get_cluster_results(season)
+
+@st.cache_resource
+def _clustered_versions() -> set:
+    """(musim, versi dataset) yang ClusterRun-nya sudah lengkap -> tidak perlu job baru."""
+    return set()
+
+def clear_data_cache():
+    st.cache_data.clear()
+    _clustered_versions().clear()
+
+data_version = get_data_version()
+
 # ====== STYLE ======
 st.markdown(
     """
@@ -39,9 +81,317 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# ====== FRAGMENT HALAMAN ANALISIS ======
+# Interaksi di dalam fragment (mis. "Bandingkan", slider rekomendasi) hanya
+# menjalankan ulang fragment itu; durasi tiap render dicatat ke log iprs.streamlit.
+logger = logging.getLogger("iprs.streamlit")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+def timed_fragment(func):
+    """st.fragment yang mencatat lama render/rerun-nya."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            logger.info("fragment %s: %.1f ms", func.__name__, (time.perf_counter() - started) * 1000)
+    return st.fragment(wrapper)
+
+def _clear_reco_state():
+    st.session_state["recs_df"] = None
+    st.session_state["feat_df"] = None
+    st.session_state["cmp_target"] = None
+
+def _clear_cluster_state():
+    st.session_state["cluster_result"] = None
+    st.session_state["selected_season"] = None
+
+# HASIL CLUSTERING
+@timed_fragment
+def cluster_results_section(results):
+    with st.expander("Hasil Clustering"):
+        group_items = list(results.items())
+        N_COLS = 3
+
+        def plot_clusters(x2, labels, title):
+            fig, ax = plt.subplots(figsize=(4,3))
+            sc = ax.scatter(x2[:, 0], x2[:, 1], c=labels, s=28, alpha=0.9)
+            ax.set_xlabel("PCA 1"); ax.set_ylabel("PCA 2")
+            ax.set_title(title)
+            uniq, counts = np.unique(labels, return_counts=True)
+            ax.legend(sc.legend_elements()[0], [f"C{c}: {n}" for c,n in zip(uniq, counts)], loc="best")
+            st.pyplot(fig)
+            plt.close(fig)
+
+        # tampilkan per posisi
+        for start in range(0, len(group_items), N_COLS):
+            cols = st.columns(N_COLS)
+            for c, (group_name, res) in zip(cols, group_items[start:start+N_COLS]):
+                with c:
+                    st.markdown(f"### {group_name}")
+                    if not res:
+                        st.warning(f"Tidak cukup data untuk posisi {group_name.lower()}.")
+                        continue
+
+                    df_eval = res["res_table"]
+                    X2 = res["pca"]
+                    best = res["best_sil"]
+
+                    # tabel hasil loop clustering dengan bandwidth
+                    if best:
+                        st.caption(
+                            f"BW={best['bw']:.1f} | Clusters={best['n_clusters']} | "
+                            f"Sil={best['sil']:.4f} | DBI={best['dbi']:.4f}"
+                        )
+                    if res.get("elapsed") is not None:
+                        st.caption(f"Waktu clustering: {res['elapsed']:.2f} detik")
+                    if isinstance(df_eval, pd.DataFrame) and not df_eval.empty:
+                        st.data_editor(
+                            df_eval.reset_index(drop=True),
+                            hide_index=True,
+                            disabled=True,
+                            height=180
+                        )
+
+                    # menampilkan scatter plot nilai silhouette terbaik
+                    if best and X2 is not None:
+                        st.write("Nilai Silhouette Terbaik")
+                        plot_clusters(X2, best["labels"], f"{group_name}")
+
+                    # init bar chart tiap fitur
+                    try:
+                        feature_cols = get_features_for_group(group_name, FEATURES_BY_POS)
+                        bar_long = build_cluster_feature_bar_df(res, feature_cols)
+                    except BarDataMissing as e:
+                        st.info(f"Bar chart tidak dapat ditampilkan: {e}")
+                    else:
+                        # satu chart facet (satu panel per fitur) untuk seluruh kategori
+                        st.altair_chart(build_cluster_feature_chart(bar_long, feature_cols, FEATURE_LABELS))
+
+        if st.button("🔄 Reset Hasil Clustering"):
+            _clear_reco_state()
+            _clear_cluster_state()
+            st.rerun()
+
+# PROGRESS JOB CLUSTERING
+@st.fragment(run_every=1)
+def cluster_job_progress(job_id, season):
+    """
+    Dicek ulang tiap detik tanpa menjalankan ulang seluruh halaman. Setelah job
+    selesai, hasilnya disimpan ke session state lalu halaman di-rerun sekali.
+    """
+    job = ClusteringJob.objects.filter(pk=job_id).first()
+    if job is not None and job.status in ClusteringJob.ACTIVE:
+        total = sum(p["total"] for p in job.progress.values()) or 1
+        done = sum(len(p["bandwidths"]) for p in job.progress.values())
+        st.progress(min(done / total, 1.0), text=f"Sedang menjalankan clustering... ({done}/{total} bandwidth)")
+        for group, p in job.progress.items():
+            st.caption(f"{group}: {len(p['bandwidths'])}/{p['total']}" + (" ✓" if p["done"] else ""))
+        return
+
+    st.session_state.cluster_job = None
+    if job is not None and job.status == ClusteringJob.DONE:
+        dataset_version = get_dataset_version(season)
+        if job.refresh:
+            cached_cluster_results.clear()
+        st.session_state.cluster_result = cached_cluster_results(season, dataset_version)
+        _clustered_versions().add((season, dataset_version))
+        st.session_state.selected_season = season
+        st.session_state.cluster_notice = ("success", "Clustering berhasil.")
+    else:
+        st.session_state.cluster_notice = ("error", f"Clustering gagal: {job.error if job else 'job tidak ditemukan.'}")
+    st.rerun()
+
+# DETAIL PEMAIN ACUAN
+@timed_fragment
+def anchor_detail_section(player, detail):
+    st.subheader("Tentang Pemain")
+    st.write(f"Pemain: **{player}**")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.write(f"Team: **{detail.get('team')}**")
+        st.write(f"Nationality: **{detail.get('nationality')}**")
+        st.write(f"Position: **{detail.get('position')}**")
+
+    with col2:
+        st.write(f"Age: **{detail.get('age')}**")
+        st.write(f"Appearance: **{detail.get('appearance')}**")
+        st.write(f"Total Minutes Played: **{detail.get('total_minute')}**")
+
+    st.markdown("---")
+    st.subheader("Statistik Pemain Acuan")
+
+    col3, col4, col5 = st.columns(3)
+
+    with col3:
+        st.write(f"Total Goal: **{detail.get('total_goal')}**")
+        st.write(f"Total Assist: **{detail.get('assist')}**")
+        st.write(f"Shot/Game: **{detail.get('shot_per_game'):.2f}**")
+        st.write(f"Shot On Target/Game: **{detail.get('sot_per_game'):.2f}**")
+        st.write(f"Successful Dribble/Game: **{detail.get('successful_dribble_per_game'):.2f}**")
+
+    with col4:
+        st.write(f"Successful Pass/Game: **{detail.get('successful_pass_per_game'):.2f}**")
+        st.write(f"Key Pass/Game: **{detail.get('key_pass_per_game'):.2f}**")
+        st.write(f"Long Ball Pass/Game: **{detail.get('long_ball_per_game'):.2f}**")
+        st.write(f"Successful Crossing/Game: **{detail.get('successful_crossing_per_game'):.2f}**")
+
+    with col5:
+        st.write(f"Ball Recovered/Game: **{detail.get('ball_recovered_per_game'):.2f}**")
+        st.write(f"Dribbled Past/Game: **{detail.get('dribbled_past_per_game'):.2f}**")
+        st.write(f"Clearance/Game: **{detail.get('clearance_per_game'):.2f}**")
+        st.write(f"Error Leading to Shot: **{detail.get('error')}**")
+        st.write(f"Total Duel Won/Game: **{detail.get('total_duel_per_game'):.2f}**")
+        st.write(f"Aerial Duel Won/Game: **{detail.get('aerial_duel_per_game'):.2f}**")
+
+    st.markdown("---")
+
+# PEMAIN REKOMENDASI
+@timed_fragment
+def recommendation_section(season, position, player):
+    st.subheader("Pemain Rekomendasi")
+
+    st.session_state.setdefault("recs_df", None)
+    st.session_state.setdefault("feat_df", None)
+    st.session_state.setdefault("cmp_target", None)
+
+    recommend_count = st.slider(
+        "Jumlah pemain rekomendasi",
+        min_value=1,
+        max_value=10,
+        step=1
+    )
+
+    col7, col8, col9, col10 = st.columns(4)
+
+    with col7:
+        only_indo = st.checkbox("Pemain Indonesia saja", value=False)
+
+    with col8:
+        filter_position = st.checkbox("Posisi yang sama saja", value=False)
+
+    with col9:
+        cross_season = st.checkbox("Cari di semua musim", value=False)
+
+    # FILTER MUSIM & LIGA UNTUK PENCARIAN LINTAS MUSIM
+    if cross_season:
+        datasets = cached_list_of_dataset(data_version)
+        col11, col12 = st.columns(2)
+        with col11:
+            filter_seasons = st.multiselect("Musim", sorted({d["season"] for d in datasets}), placeholder="Semua musim")
+        with col12:
+            filter_leagues = st.multiselect("Liga", sorted({d["league_name"] for d in datasets}), placeholder="Semua liga")
+
+    if recommend_count and st.button("Cari pemain rekomendasi"):
+        if cross_season:
+            recs = get_cross_season_similar_players(
+                season=season,
+                position_code=position,
+                anchor_player=player,
+                top_n=recommend_count,
+                seasons=filter_seasons,
+                leagues=filter_leagues,
+                only_indonesian=only_indo,
+                filter_position=filter_position
+            )
+        else:
+            recs = get_recommend_similar_players(
+                season=season,
+                position_code=position,
+                anchor_player=player,
+                top_n=recommend_count,
+                only_indonesian=only_indo,
+                filter_position=filter_position
+            )
+
+        if recs.empty:
+            st.info("Tidak ada pemain rekomendasi yang cocok untuk konfigurasi ini.")
+            st.session_state["recs_df"] = None
+            st.session_state["feat_df"] = None
+            st.session_state["cmp_target"] = None
+        elif cross_season:
+            # nama pemain diberi musim supaya unik; fitur pembanding diambil dari hasil itu sendiri
+            recs["player"] = recs["player"] + " (" + recs["season"] + ")"
+            feat_df = get_player_features_df(season)
+            st.session_state["recs_df"] = recs
+            st.session_state["feat_df"] = pd.concat(
+                [feat_df.loc[feat_df["player"] == player, ["player", *FEATURES_TO_COMPARE]],
+                 recs[["player", *FEATURES_TO_COMPARE]]],
+                ignore_index=True,
+            )
+            st.session_state["cmp_target"] = None
+        else:
+            st.session_state["recs_df"] = recs
+            st.session_state["feat_df"] = get_player_features_df(season)
+            st.session_state["cmp_target"] = None                                                                                
+
+    recs_df = st.session_state.get("recs_df")
+
+    # DAFTAR PEMAIN REKOMENDASI
+    if recs_df is not None and isinstance(recs_df, pd.DataFrame) and not recs_df.empty:
+        st.subheader("Hasil Pemain Rekomendasi")
+        col_head1, col_head2, col_head3, col_head4, col_head5, col_head6 = st.columns([3, 3, 2, 2, 2, 2])
+        col_head1.write("**Pemain**")
+        col_head2.write("**Tim**")
+        col_head3.write("**Posisi**")
+        col_head4.write("**Nationality**")
+        col_head5.write("**Kemiripan**")
+        # col_head6.write("**Aksi**")
+
+        cols_show = ["player", "team", "position", "nationality", "similarity"]
+        cols_show = [c for c in cols_show if c in recs_df.columns]
+
+        for i, ds in recs_df[cols_show].iterrows():
+            col1, col2, col3, col4, col5, col6 = st.columns([3, 3, 2, 2, 2, 2])
+
+            sim_pct = float(ds.get("similarity", 0.0))
+            sim_pct = max(0.0, min(1.0, sim_pct)) * 100.0  
+
+            col1.write(ds.get("player", "-"))
+            col2.write(ds.get("team", "-"))
+            col3.write(ds.get("position", "-"))
+            col4.write(ds.get("nationality", "-"))
+            col5.write(f"{sim_pct:.2f}%")
+
+            # BUTTON BANDINGKAN PER PEMAIN
+            if col6.button("Bandingkan", key=f"cmp_{i}_{ds.get('player','')}"):
+                st.session_state["cmp_target"] = ds['player']
+
+        comparison_section(player)
+
+# PERBANDINGAN PEMAIN ACUAN VS REKOMENDASI
+@timed_fragment
+def comparison_section(anchor_player):
+    target_player = st.session_state["cmp_target"]
+    feat_df = st.session_state.get("feat_df")
+    if target_player and feat_df is not None:
+        with st.expander(f"Perbandingan {anchor_player} dengan {target_player}", expanded=True):                                
+            try:
+                long_df = prepare_comparison_long_df(
+                    feat_df=feat_df,
+                    anchor_player=anchor_player,
+                    target_player=target_player,
+                    features=FEATURES_TO_COMPARE
+                )
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                if not FEATURES_TO_COMPARE:
+                    st.warning("Daftar fitur kosong. Isi `FEATURES_TO_COMPARE` dulu.")
+                else:
+                    # menampilkan bar chart (satu chart facet, 2 panel per baris)
+                    st.altair_chart(build_comparison_chart(long_df, FEATURES_TO_COMPARE, FEATURE_LABELS))
+
 # =========================
 # SIDEBAR
 # =========================
+_rerun_started = time.perf_counter()
 st.sidebar.title("IPRS")
 if "page" not in st.session_state:
     st.session_state.page = "Beranda"
@@ -59,6 +409,34 @@ for label, target in col_map.items():
 
 page = st.session_state.page
 
+# PANEL DEBUG: PROFIL QUERY SQL (players.profiling)
+# Hanya saat DEBUG / QUERY_PROFILE_ENABLED; berlaku untuk seluruh proses Streamlit.
+# Isi laporan ditulis di akhir rerun supaya panggilan halaman ini ikut terhitung.
+_debug_panel = None
+if settings.DEBUG or getattr(settings, "QUERY_PROFILE_ENABLED", False):
+    _debug_panel = st.sidebar.expander("🛠️ Debug: query SQL")
+    with _debug_panel:
+        profiling.configure(st.checkbox("Profil query per fungsi", value=profiling.is_enabled()))
+        if st.button("Reset profil"):
+            profiling.reset()
+
+def query_profile_panel():
+    rows = profiling.report()
+    if not rows:
+        st.caption("Belum ada panggilan tercatat (hasil dari cache Streamlit tidak memanggil database).")
+        return
+    st.dataframe(pd.DataFrame([{
+        "Fungsi": r["function"],
+        "Panggilan": r["calls"],
+        "Query/panggilan": round(r["queries_per_call"], 1),
+        "Maks": r["max_queries"],
+        "ms SQL": round(r["sql_seconds"] * 1000, 1),
+    } for r in rows]), hide_index=True)
+    chosen = st.selectbox("Query paling lambat", [r["function"] for r in rows])
+    for sec, sql in next(r for r in rows if r["function"] == chosen)["slowest"]:
+        st.caption(f"{sec * 1000:.2f} ms")
+        st.code(sql, language="sql")
+
 # =========================
 # BERANDA
 # =========================
@@ -125,7 +503,8 @@ elif page == "Unggah Dataset":
     with st.form("upload_form"):
         league_name = st.text_input("Nama Liga", value="Liga 1 Indonesia")
         season = st.text_input("Musim", placeholder=f"misal 2024/2025", value="2024/2025")
-        file = st.file_uploader("Unggah file dataset", type="xlsx")
+        file = st.file_uploader("Unggah file dataset", type=["xlsx", "csv"])
+        append = st.checkbox("Tambahkan pemain baru ke musim yang sudah ada", value=False)
         submitted = st.form_submit_button("Simpan")
 
     if submitted:
@@ -138,8 +517,8 @@ elif page == "Unggah Dataset":
             if not file:
                 st.error("Unggah file dataset terlebih dahulu.")
             else:
-                df = pd.read_excel(file)
-                insert_dataset_and_players(league_name, season, df)
+                insert_dataset_and_players_stream(league_name, season, iter_upload_chunks(file), append=append)
+                clear_data_cache()
                 st.success(f"Sukses menyimpan dataset: {league_name} – {season}.")
                 st.rerun()
         except KeyError as ke:
@@ -153,7 +532,7 @@ elif page == "Unggah Dataset":
 
     st.markdown("---")
 
-    datasets = get_list_of_dataset()
+    datasets = cached_list_of_dataset(data_version)
 
     if not datasets:
         st.info("Belum ada data yang tersimpan")
@@ -175,6 +554,7 @@ elif page == "Unggah Dataset":
             if col5.button("Hapus", key=f"del_{ds['id']}"):
                 ok = delete_dataset(ds["id"])
                 if ok:
+                    clear_data_cache()
                     st.success(f"Data {ds['league_name']} musim ({ds['season']}) berhasil dihapus.")
                     st.rerun()
                 else:
@@ -190,17 +570,9 @@ elif page == "Analisis":
     st.session_state.setdefault("cmp_target", None)
     st.session_state.setdefault("cluster_result", None)
     st.session_state.setdefault("selected_season", None)
+    st.session_state.setdefault("cluster_job", None)
 
-    def _clear_reco_state():
-        st.session_state["recs_df"] = None
-        st.session_state["feat_df"] = None
-        st.session_state["cmp_target"] = None
-
-    def _clear_cluster_state():
-        st.session_state["cluster_result"] = None
-        st.session_state["selected_season"] = None
-
-    seasons = get_seasons()
+    seasons = cached_seasons(data_version)
     if not seasons:
         st.warning("Belum ada data liga yang diunggah. Unggah dataset terlebih dahulu di halaman Unggah Dataset.")
     else:
@@ -214,105 +586,30 @@ elif page == "Analisis":
         if selected_season != "Pilih Musim":            
             if st.button("Clustering"):
                 _clear_reco_state()
-                with st.spinner("Sedang menjalankan clustering..."):
-                    result = run_meanshift_by_position(selected_season)
-                st.session_state.cluster_result = result
-                st.session_state.selected_season = selected_season                
-                st.success("Clustering berhasil.")
+                dataset_version = get_dataset_version(selected_season)
+                if (selected_season, dataset_version) in _clustered_versions():
+                    st.session_state.cluster_result = cached_cluster_results(selected_season, dataset_version)
+                    st.session_state.selected_season = selected_season
+                    st.success("Clustering berhasil.")
+                else:
+                    st.session_state.cluster_job = submit_clustering_job(selected_season).pk
+            if st.button("Clustering ulang"):
+                _clear_reco_state()
+                cached_cluster_results.clear()  # job aktif yang sudah berjalan bisa diikuti tanpa refresh
+                st.session_state.cluster_job = submit_clustering_job(selected_season, refresh=True).pk
+
+            # PROGRESS JOB CLUSTERING
+            job_id = st.session_state.get("cluster_job")
+            if job_id and ClusteringJob.objects.filter(pk=job_id, dataset__season=selected_season).exists():
+                cluster_job_progress(job_id, selected_season)
+            notice = st.session_state.pop("cluster_notice", None)
+            if notice:
+                getattr(st, notice[0])(notice[1])
 
         # HASIL CLUSTERING
         results = st.session_state.get("cluster_result")
         if results and st.session_state.get("selected_season") == selected_season:
-            with st.expander("Hasil Clustering"):
-                group_items = list(results.items())
-                N_COLS = 3
-
-                def plot_clusters(x2, labels, title):
-                    fig, ax = plt.subplots(figsize=(4,3))
-                    sc = ax.scatter(x2[:, 0], x2[:, 1], c=labels, s=28, alpha=0.9)
-                    ax.set_xlabel("PCA 1"); ax.set_ylabel("PCA 2")
-                    ax.set_title(title)
-                    uniq, counts = np.unique(labels, return_counts=True)
-                    ax.legend(sc.legend_elements()[0], [f"C{c}: {n}" for c,n in zip(uniq, counts)], loc="best")
-                    st.pyplot(fig)
-                    plt.close(fig)
-
-                # tampilkan per posisi
-                for start in range(0, len(group_items), N_COLS):
-                    cols = st.columns(N_COLS)
-                    for c, (group_name, res) in zip(cols, group_items[start:start+N_COLS]):
-                        with c:
-                            st.markdown(f"### {group_name}")
-                            if not res:
-                                st.warning(f"Tidak cukup data untuk posisi {group_name.lower()}.")
-                                continue
-
-                            df_eval = res["res_table"]
-                            X2 = res["pca"]
-                            best = res["best_sil"]
-
-                            # tabel hasil loop clustering dengan bandwidth
-                            if best:
-                                st.caption(
-                                    f"BW={best['bw']:.1f} | Clusters={best['n_clusters']} | "
-                                    f"Sil={best['sil']:.4f} | DBI={best['dbi']:.4f}"
-                                )
-                            if isinstance(df_eval, pd.DataFrame) and not df_eval.empty:
-                                st.data_editor(
-                                    df_eval.reset_index(drop=True),
-                                    hide_index=True,
-                                    disabled=True,
-                                    height=180
-                                )
-
-                            # menampilkan scatter plot nilai silhouette terbaik
-                            if best and X2 is not None:
-                                st.write("Nilai Silhouette Terbaik")
-                                plot_clusters(X2, best["labels"], f"{group_name}")
-
-                            # init bar chart tiap fitur
-                            try:
-                                feature_cols = get_features_for_group(group_name, FEATURES_BY_POS)
-                                bar_long = build_cluster_feature_bar_df(res, feature_cols)
-                            except BarDataMissing as e:
-                                st.info(f"Bar chart tidak dapat ditampilkan: {e}")
-                            else:
-                                bar_long["Fitur"] = pd.Categorical(
-                                    bar_long["Fitur"],
-                                    categories=feature_cols,
-                                    ordered=True
-                                )
-                                clusters_order = sorted(bar_long["Cluster"].unique(), key=lambda s: int(s[1:]))  # "C0","C1",...
-                                bar_long["Cluster"] = pd.Categorical(bar_long["Cluster"], categories=clusters_order, ordered=True)
-
-                                # tampilkan tiap fitur satu bar chart
-                                for fitur in feature_cols:
-                                    sub = bar_long[bar_long["Fitur"] == fitur]
-                                    chart_title = FEATURE_LABELS.get(fitur, fitur)
-                                    chart = (
-                                        alt.Chart(sub)
-                                        .mark_bar()
-                                        .encode(
-                                            x=alt.X("Cluster:N", axis=alt.Axis(title=None, labelAngle=0)),
-                                            y=alt.Y("Mean:Q", axis=alt.Axis(title=None)),
-                                            color=alt.Color("Cluster:N", title=None, scale=alt.Scale(scheme="tableau10")),
-                                            tooltip=[
-                                                "Cluster:N",
-                                                alt.Tooltip("Mean:Q", title="Rata-rata", format=".3f")
-                                            ],
-                                        )
-                                        .properties(
-                                            title={"text": chart_title, "anchor": "middle", "align": "center"},
-                                            width="container",
-                                            height=220
-                                        )
-                                    )
-                                    st.altair_chart(chart)
-
-                if st.button("🔄 Reset Hasil Clustering"):
-                    _clear_reco_state()
-                    _clear_cluster_state()
-                    st.rerun()
+            cluster_results_section(results)
     
             position_choices = [
                 "Pilih posisi pemain acuan",
@@ -332,7 +629,7 @@ elif page == "Analisis":
             selected_position = st.selectbox("Pilih Posisi Pemain Acuan", position_choices, index=0)
 
             if selected_position != "Pilih posisi pemain acuan":
-                players = get_players_by_season(selected_season, selected_position) if selected_season and selected_position else []
+                players = cached_players_by_season(data_version, selected_season, selected_position) if selected_season and selected_position else []
                 player_option = ["Pilih Pemain Acuan"] + players
                 selected_player = st.selectbox("Pilih Pemain Acuan", player_option, index=0)
             else:
@@ -344,15 +641,6 @@ elif page == "Analisis":
         st.session_state.setdefault("prev_position", None)
         st.session_state.setdefault("prev_anchor", None)
 
-        def _clear_reco_state():
-            st.session_state["recs_df"] = None
-            st.session_state["feat_df"] = None
-            st.session_state["cmp_target"] = None
-
-        def _clear_cluster_state():
-            st.session_state["cluster_result"] = None
-            st.session_state["selected_season"] = None
-
         season_changed   = (st.session_state["prev_season"]   != selected_season)
         position_changed = (st.session_state["prev_position"] != selected_position)
         anchor_changed   = (st.session_state["prev_anchor"]   != selected_player)
@@ -381,171 +669,11 @@ elif page == "Analisis":
         
         # DETAIL PEMAIN ACUAN
         if selected_season and selected_position and selected_player:
-            detail = get_player_detail(selected_season, selected_player)
+            detail = cached_player_detail(data_version, selected_season, selected_player)
 
             if detail:
-                st.subheader("Tentang Pemain")
-                # st.write(f"**Musim**: {selected_season}")
-                st.write(f"Pemain: **{selected_player}**")
-                col1, col2 = st.columns(2)
-
-                with col1:
-                    st.write(f"Team: **{detail.get('team')}**")
-                    st.write(f"Nationality: **{detail.get('nationality')}**")
-                    st.write(f"Position: **{detail.get('position')}**")
-
-                with col2:
-                    st.write(f"Age: **{detail.get('age')}**")
-                    st.write(f"Appearance: **{detail.get('appearance')}**")
-                    st.write(f"Total Minutes Played: **{detail.get('total_minute')}**")
-
-                st.markdown("---")
-                st.subheader("Statistik Pemain Acuan")
-                
-                col3, col4, col5 = st.columns(3)
-
-                with col3:
-                    st.write(f"Total Goal: **{detail.get('total_goal')}**")
-                    st.write(f"Total Assist: **{detail.get('assist')}**")
-                    st.write(f"Shot/Game: **{detail.get('shot_per_game'):.2f}**")
-                    st.write(f"Shot On Target/Game: **{detail.get('sot_per_game'):.2f}**")
-                    st.write(f"Successful Dribble/Game: **{detail.get('successful_dribble_per_game'):.2f}**")
-
-                with col4:
-                    st.write(f"Successful Pass/Game: **{detail.get('successful_pass_per_game'):.2f}**")
-                    st.write(f"Key Pass/Game: **{detail.get('key_pass_per_game'):.2f}**")
-                    st.write(f"Long Ball Pass/Game: **{detail.get('long_ball_per_game'):.2f}**")
-                    st.write(f"Successful Crossing/Game: **{detail.get('successful_crossing_per_game'):.2f}**")
-
-                with col5:
-                    st.write(f"Ball Recovered/Game: **{detail.get('ball_recovered_per_game'):.2f}**")
-                    st.write(f"Dribbled Past/Game: **{detail.get('dribbled_past_per_game'):.2f}**")
-                    st.write(f"Clearance/Game: **{detail.get('clearance_per_game'):.2f}**")
-                    st.write(f"Error Leading to Shot: **{detail.get('error')}**")
-                    st.write(f"Total Duel Won/Game: **{detail.get('total_duel_per_game'):.2f}**")
-                    st.write(f"Aerial Duel Won/Game: **{detail.get('aerial_duel_per_game'):.2f}**")
-
-                st.markdown("---")
-                st.subheader("Pemain Rekomendasi")
-                
-                st.session_state.setdefault("recs_df", None)
-                st.session_state.setdefault("feat_df", None)
-                st.session_state.setdefault("cmp_target", None)
-
-                recommend_count = st.slider(
-                    "Jumlah pemain rekomendasi",
-                    min_value=1,
-                    max_value=10,
-                    step=1
-                )
-
-                col7, col8, col9, col10 = st.columns(4)
-
-                with col7:
-                    only_indo = st.checkbox("Pemain Indonesia saja", value=False)
-
-                with col8:
-                    filter_position = st.checkbox("Posisi yang sama saja", value=False)
-                
-                if recommend_count and st.button("Cari pemain rekomendasi"):
-                    recs = get_recommend_similar_players(
-                        season=selected_season,
-                        position_code=selected_position,
-                        anchor_player=selected_player,
-                        top_n=recommend_count,
-                        only_indonesian=only_indo,
-                        filter_position=filter_position
-                    )
-
-                    if recs.empty:
-                        st.info("Tidak ada pemain rekomendasi yang cocok untuk konfigurasi ini.")
-                        st.session_state["recs_df"] = None
-                        st.session_state["feat_df"] = None
-                        st.session_state["cmp_target"] = None
-                    else:
-                        st.session_state["recs_df"] = recs
-                        st.session_state["feat_df"] = get_player_features_df(selected_season)
-                        st.session_state["cmp_target"] = None                                                                                
-
-                recs_df = st.session_state.get("recs_df")
-                feat_df = st.session_state.get("feat_df")
-
-                # DAFTAR PEMAIN REKOMENDASI
-                if recs_df is not None and isinstance(recs_df, pd.DataFrame) and not recs_df.empty:
-                    st.subheader("Hasil Pemain Rekomendasi")
-                    col_head1, col_head2, col_head3, col_head4, col_head5, col_head6 = st.columns([3, 3, 2, 2, 2, 2])
-                    col_head1.write("**Pemain**")
-                    col_head2.write("**Tim**")
-                    col_head3.write("**Posisi**")
-                    col_head4.write("**Nationality**")
-                    col_head5.write("**Kemiripan**")
-                    # col_head6.write("**Aksi**")
-
-                    cols_show = ["player", "team", "position", "nationality", "similarity"]
-                    cols_show = [c for c in cols_show if c in recs_df.columns]
-
-                    for i, ds in recs_df[cols_show].iterrows():
-                        col1, col2, col3, col4, col5, col6 = st.columns([3, 3, 2, 2, 2, 2])
-
-                        sim_pct = float(ds.get("similarity", 0.0))
-                        sim_pct = max(0.0, min(1.0, sim_pct)) * 100.0  
-
-                        col1.write(ds.get("player", "-"))
-                        col2.write(ds.get("team", "-"))
-                        col3.write(ds.get("position", "-"))
-                        col4.write(ds.get("nationality", "-"))
-                        col5.write(f"{sim_pct:.2f}%")
-
-                        # BUTTON BANDINGKAN PER PEMAIN
-                        if col6.button("Bandingkan", key=f"cmp_{i}_{ds.get('player','')}"):
-                            st.session_state["cmp_target"] = ds['player']
-                    
-                    target_player = st.session_state["cmp_target"]
-                    if target_player and feat_df is not None:
-                        with st.expander(f"Perbandingan {selected_player} dengan {target_player}", expanded=True):                                
-                            try:
-                                long_df = prepare_comparison_long_df(
-                                    feat_df=feat_df,
-                                    anchor_player=selected_player,
-                                    target_player=target_player,
-                                    features=FEATURES_TO_COMPARE
-                                )
-                            except ValueError as e:
-                                st.error(str(e))
-                            else:
-                                if not FEATURES_TO_COMPARE:
-                                    st.warning("Daftar fitur kosong. Isi `FEATURES_TO_COMPARE` dulu.")
-                                else:
-                                    # menampilkan bar chart
-                                    N_COLS = 2
-                                    fitur_list = list(long_df["Fitur"].unique())
-                                    for start in range(0, len(fitur_list), N_COLS):
-                                        cols_plot = st.columns(N_COLS)
-                                        batch = fitur_list[start:start+N_COLS]
-                                        for c, fitur in zip(cols_plot, batch):
-                                            sub = long_df[long_df["Fitur"] == fitur]
-                                            chart_title = FEATURE_LABELS.get(fitur, fitur)
-                                            chart = (
-                                                alt.Chart(sub)
-                                                .mark_bar()
-                                                .encode(
-                                                    x=alt.X("Pemain:N", axis=alt.Axis(title=None, labelAngle=0)),
-                                                    y=alt.Y("Nilai:Q", axis=alt.Axis(title=None)),
-                                                    color=alt.Color("Pemain:N", title=None, scale=alt.Scale(scheme="tableau10")),
-                                                    tooltip=["Pemain:N", "Nilai:Q"],
-                                                )
-                                                .properties(
-                                                    title={
-                                                        "text": chart_title,
-                                                        "anchor": "middle",
-                                                        "align": "center",                                                        
-                                                    },                                                    
-                                                    width="container", 
-                                                    height=220
-                                                )
-                                            )
-                                            with c:
-                                                st.altair_chart(chart)
+                anchor_detail_section(selected_player, detail)
+                recommendation_section(selected_season, selected_position, selected_player)
 
 # ABOUT
 elif page == "About":
@@ -588,3 +716,8 @@ elif page == "About":
     st.markdown("---")
     st.markdown("📧 **Kontak:** [richard.s050804@gmail.com](https://mail.google.com/mail/?view=cm&fs=1&to=richard.s050804@gmail.com) | [GitHub](https://github.com/RichardxSW) | [LinkedIn](https://www.linkedin.com/in/richardxsw)")
 
+if _debug_panel is not None:
+    with _debug_panel:
+        query_profile_panel()
+
+logger.info("rerun halaman %s: %.1f ms", page, (time.perf_counter() - _rerun_started) * 1000)